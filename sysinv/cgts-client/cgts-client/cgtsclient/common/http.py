@@ -15,6 +15,8 @@
 #    under the License.
 #
 
+import collections
+import copy
 import logging
 import os
 import requests
@@ -43,6 +45,9 @@ _logger = logging.getLogger(__name__)
 
 CHUNKSIZE = 1024 * 64  # 64kB
 
+# Maximum number of GET responses kept to be revalidated with their ETag
+ETAG_CACHE_SIZE = 32
+
 # httplib2 retries requests on socket.timeout which
 # is not idempotent and can lead to orhan objects.
 # See: https://code.google.com/p/httplib2/issues/detail?id=124
@@ -115,7 +120,7 @@ class HTTPClient(httplib2.Http):
                  endpoint_url=None, insecure=False,
                  endpoint_type='publicURL',
                  auth_strategy='keystone', ca_cert=None, log_credentials=False,
-                 **kwargs):
+                 etag_cache_size=ETAG_CACHE_SIZE, **kwargs):
         if 'ca_file' in kwargs:
             ca_cert = kwargs['ca_file']
 
@@ -137,6 +142,11 @@ class HTTPClient(httplib2.Http):
         self.log_credentials = log_credentials
         self.connection_params = self.get_connection_params(self.endpoint_url, **kwargs)
 
+        # The ETag and body of the most recent GET responses, sent back as
+        # If-None-Match so that unchanged resources are not returned again
+        self.etag_cache = collections.OrderedDict()
+        self.etag_cache_size = etag_cache_size
+
         # httplib2 overrides
         self.disable_ssl_certificate_validation = insecure
 
@@ -238,6 +248,11 @@ class HTTPClient(httplib2.Http):
             kwargs['body'] = json.dumps(kwargs['body'])
 
         connection_url = self._get_connection_url(url)
+        cached = None
+        if method == 'GET':
+            cached = self.etag_cache.pop(connection_url, None)
+            if cached:
+                kwargs['headers']['If-None-Match'] = cached[0]
         try:
             resp, body_iter = self._cs_request(connection_url,
                                                method, **kwargs)
@@ -246,6 +261,10 @@ class HTTPClient(httplib2.Http):
             resp, body_iter = self._cs_request(
                 connection_url, method, **kwargs)
 
+        if resp.status == 304 and cached:
+            self.etag_cache[connection_url] = cached
+            return resp, copy.deepcopy(cached[1])
+
         content_type = resp['content-type'] \
             if resp.get('content-type', None) else None
 
@@ -261,6 +280,13 @@ class HTTPClient(httplib2.Http):
         else:
             body = None
 
+        if (method == 'GET' and resp.status == 200 and resp.get('etag') and
+                self.etag_cache_size > 0):
+            self.etag_cache[connection_url] = (resp['etag'],
+                                               copy.deepcopy(body))
+            while len(self.etag_cache) > self.etag_cache_size:
+                self.etag_cache.popitem(last=False)
+
         return resp, body
 
     def raw_request(self, method, url, **kwargs):
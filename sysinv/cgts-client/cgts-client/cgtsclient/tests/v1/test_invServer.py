@@ -66,6 +66,15 @@ fixtures = {
             CREATE_IHOST,
         ),
     },
+    '/v1/ihosts?fields=hostname,personality':
+    {
+        'GET': (
+            {},
+            {"ihosts": [{'uuid': IHOST['uuid'],
+                         'hostname': IHOST['hostname'],
+                         'personality': IHOST['personality']}]},
+        ),
+    },
     '/v1/ihosts/%s' % IHOST['uuid']:
     {
         'GET': (
@@ -106,6 +115,14 @@ class ihostManagerTest(testtools.TestCase):
         self.assertEqual(self.api.calls, expect)
         self.assertEqual(len(ihost), 1)
 
+    def test_ihost_list_fields(self):
+        ihost = self.mgr.list(fields=['hostname', 'personality'])
+        expect = [
+            ('GET', '/v1/ihosts?fields=hostname,personality', {}, None),
+        ]
+        self.assertEqual(self.api.calls, expect)
+        self.assertEqual(ihost[0].hostname, IHOST['hostname'])
+
     def test_ihost_show(self):
         ihost = self.mgr.get(IHOST['uuid'])
         expect = [
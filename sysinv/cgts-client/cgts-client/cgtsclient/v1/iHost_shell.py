@@ -67,8 +67,17 @@ def do_host_show(cc, args):
     _print_ihost_show(ihost)
 
 
+@utils.arg('--fields', metavar='<field,field,...>',
+           help="Comma separated list of the host fields to list, "
+                "only these fields are retrieved")
 def do_host_list(cc, args):
     """List hosts."""
+    if args.fields:
+        fields = [f.strip() for f in args.fields.split(',') if f.strip()]
+        ihosts = cc.ihost.list(fields=fields)
+        utils.print_list(ihosts, fields, fields, sortby=0)
+        return
+
     ihosts = cc.ihost.list()
     field_labels = ['id', 'hostname', 'personality',
                     'administrative', 'operational', 'availability']
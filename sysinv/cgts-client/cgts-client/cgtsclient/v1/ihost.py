@@ -35,8 +35,11 @@ class ihostManager(base.Manager):
     def _path(id=None):
         return '/v1/ihosts/%s' % id if id else '/v1/ihosts'
 
-    def list(self):
-        return self._list(self._path(), "ihosts")
+    def list(self, fields=None):
+        path = self._path()
+        if fields:
+            path += "?fields=%s" % ','.join(fields)
+        return self._list(path, "ihosts")
 
     def list_profiles(self):
         path = "/v1/ihosts/personality_profile"
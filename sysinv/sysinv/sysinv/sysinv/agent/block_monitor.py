@@ -0,0 +1,102 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# All Rights Reserved.
+#
+
+""" inventory block device udev event monitor."""
+
+import eventlet
+import threading
+
+from sysinv.agent import udev_monitor
+from sysinv.common import inventory
+from sysinv.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+# Inventory categories derived from the block devices
+CATEGORIES = frozenset([inventory.CATEGORY_DISK,
+                        inventory.CATEGORY_PARTITION,
+                        inventory.CATEGORY_PV,
+                        inventory.CATEGORY_LVG])
+
+# Seconds to wait for a burst of udev events to settle before rescanning
+SETTLE_TIME = 2
+
+# Kernel devices that never show up in the block device inventory
+IGNORED_DEVICE_PREFIXES = ('loop', 'ram', 'sr', 'zram', 'nbd')
+
+
+class BlockDeviceMonitor(udev_monitor.UdevMonitor):
+    '''Track the block device inventory categories changed by udev events'''
+
+    subsystem = 'block'
+
+    def __init__(self, callback=None):
+        super(BlockDeviceMonitor, self).__init__()
+        self._callback = callback
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        super(BlockDeviceMonitor, self).stop()
+
+    @staticmethod
+    def device_categories(device):
+        """Return the inventory categories affected by a block device."""
+        name = device.sys_name or ''
+        if name.startswith(IGNORED_DEVICE_PREFIXES):
+            return set()
+
+        if name.startswith('dm-') or device.get('DM_NAME'):
+            # device mapper: logical volumes and their volume groups
+            return set([inventory.CATEGORY_PV, inventory.CATEGORY_LVG])
+
+        if device.get('DEVTYPE') == 'partition':
+            # the disk available space changes along with its partitions
+            return set([inventory.CATEGORY_DISK,
+                        inventory.CATEGORY_PARTITION,
+                        inventory.CATEGORY_PV])
+
+        return set(CATEGORIES)
+
+    def _device_event(self, action, device):
+        categories = self.device_categories(device)
+        if not categories:
+            return
+
+        LOG.debug("Block device %s %s, marking %s" %
+                  (device.sys_name, action, ', '.join(sorted(categories))))
+        self.mark_dirty(categories)
+
+        if self._callback is not None and self._timer is None:
+            self._timer = eventlet.spawn_after(SETTLE_TIME, self._notify)
+
+    def _notify(self):
+        self._timer = None
+        try:
+            self._callback()
+        except Exception as e:
+            LOG.exception("Block device rescan failed: %s" % e)
+
+    def mark_dirty(self, categories):
+        with self._lock:
+            self._dirty.update(categories)
+
+    def pop_dirty(self):
+        """Return and clear the categories changed since the last call."""
+        with self._lock:
+            dirty = self._dirty
+            self._dirty = set()
+        return dirty
@@ -18,6 +18,9 @@ import six
 class SysinvLldpDriverBase(object):
     """Sysinv LLDP Driver Base Class."""
 
+    # Whether the driver reports the neighbour changes as they happen
+    lldp_watch_supported = False
+
     @abc.abstractmethod
     def lldp_has_neighbour(self, name):
         pass
@@ -45,3 +48,13 @@ class SysinvLldpDriverBase(object):
     @abc.abstractmethod
     def lldp_update_systemname(self, systemname):
         pass
+
+    @abc.abstractmethod
+    def lldp_neighbours_watch(self, callback):
+        """Report the neighbour changes until the watch stops.
+
+        :param callback: called with the change (plugin.NEIGHBOUR_ADDED,
+                         NEIGHBOUR_UPDATED or NEIGHBOUR_REMOVED) and the
+                         neighbour for every change
+        """
+        pass
@@ -20,9 +20,16 @@ from sysinv.common import constants
 
 LOG = logging.getLogger(__name__)
 
+# lldpcli watch event keys and the neighbour changes they report
+LLDPD_WATCH_EVENTS = [("lldp-added", plugin.NEIGHBOUR_ADDED),
+                      ("lldp-updated", plugin.NEIGHBOUR_UPDATED),
+                      ("lldp-deleted", plugin.NEIGHBOUR_REMOVED)]
+
 
 class SysinvLldpdAgentDriver(base.SysinvLldpDriverBase):
 
+    lldp_watch_supported = True
+
     def __init__(self, **kwargs):
         self.client = ""
         self.agents = []
@@ -297,6 +304,50 @@ class SysinvLldpdAgentDriver(base.SysinvLldpDriverBase):
 
         return lldp_neighbours
 
+    @staticmethod
+    def _lldpd_watch_events(stream):
+        """Return (change, iface) for every event of a lldpcli watch stream.
+
+        lldpcli writes one JSON document per event, the documents are
+        decoded as soon as they are complete.
+        """
+        decoder = json.JSONDecoder()
+        buf = ""
+        for line in iter(stream.readline, ""):
+            buf += line
+            while True:
+                buf = buf.lstrip()
+                if not buf:
+                    break
+                try:
+                    data, end = decoder.raw_decode(buf)
+                except ValueError:
+                    # incomplete document, wait for more output
+                    break
+                buf = buf[end:]
+                if not isinstance(data, dict):
+                    continue
+                for event, change in LLDPD_WATCH_EVENTS:
+                    for lldp in _as_list(data.get(event)):
+                        for iface in _as_list(lldp.get('interface')):
+                            yield change, iface
+
+    def lldp_neighbours_watch(self, callback):
+        # read the events as text, the stream is split on lines
+        p = subprocess.Popen(["lldpcli", "-f", "json", "watch"],
+                             stdout=subprocess.PIPE, universal_newlines=True)
+        try:
+            for change, iface in self._lldpd_watch_events(p.stdout):
+                neighbour_attrs = self._lldpd_get_attrs(iface)
+                if not neighbour_attrs:
+                    continue
+                callback(change, plugin.Neighbour(**neighbour_attrs))
+        finally:
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+        LOG.info("lldpcli watch exited with %s", p.returncode)
+
     def lldp_neighbours_clear(self):
         self.current_neighbours = []
         self.previous_neighbours = []
@@ -319,3 +370,11 @@ class SysinvLldpdAgentDriver(base.SysinvLldpDriverBase):
 
         p = subprocess.Popen(["lldpcli", "configure", "system", "hostname",
                               newname], stdout=subprocess.PIPE)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return [value]
+    return value
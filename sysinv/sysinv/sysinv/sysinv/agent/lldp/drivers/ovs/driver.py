@@ -22,6 +22,9 @@ LOG = logging.getLogger(__name__)
 
 class SysinvOVSAgentDriver(lldpd_driver.SysinvLldpdAgentDriver):
 
+    # lldpcli watch does not report the neighbours seen through OVS flows
+    lldp_watch_supported = False
+
     def run_cmd(self, cmd):
         p = subprocess.Popen(cmd.split(), stdout=subprocess.PIPE,
                              stderr=subprocess.PIPE)
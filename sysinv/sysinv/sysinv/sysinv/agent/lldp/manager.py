@@ -9,6 +9,8 @@
 # All Rights Reserved.
 #
 
+import eventlet
+
 from oslo_config import cfg
 from oslo_log import log
 from stevedore.named import NamedExtensionManager
@@ -150,6 +152,32 @@ class SysinvLldpDriverManager(NamedExtensionManager):
             LOG.exception(e)
             return []
 
+    def lldp_watch_supported(self):
+        return (bool(self.ordered_drivers) and
+                all(driver.obj.lldp_watch_supported
+                    for driver in self.ordered_drivers))
+
+    def lldp_neighbours_watch(self, callback):
+        """Watch the neighbour changes of all drivers.
+
+        Returns once every driver watch has stopped.
+        """
+        pool = eventlet.GreenPool(len(self.ordered_drivers))
+        for driver in self.ordered_drivers:
+            pool.spawn(self._watch_driver, driver, callback)
+        pool.waitall()
+
+    @staticmethod
+    def _watch_driver(driver, callback):
+        try:
+            driver.obj.lldp_neighbours_watch(callback)
+        except Exception as e:
+            LOG.exception(e)
+            LOG.error("Sysinv LLDP agent driver '%(name)s' "
+                      "failed in %(method)s",
+                      {'name': driver.name,
+                       'method': 'lldp_neighbours_watch'})
+
     def lldp_agents_clear(self):
         try:
             return self._call_drivers("lldp_agents_clear",
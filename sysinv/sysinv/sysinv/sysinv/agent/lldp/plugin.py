@@ -18,6 +18,11 @@ from sysinv.openstack.common import excutils
 
 LOG = logging.getLogger(__name__)
 
+# Neighbour changes reported by the driver watches
+NEIGHBOUR_ADDED = 'added'
+NEIGHBOUR_UPDATED = 'updated'
+NEIGHBOUR_REMOVED = 'removed'
+
 
 class Key(object):
     def __init__(self, chassisid, portid, portname):
@@ -228,6 +233,12 @@ class SysinvLldpPlugin():
 
         return neighbours
 
+    def lldp_watch_supported(self):
+        return self.manager.lldp_watch_supported()
+
+    def lldp_neighbours_watch(self, callback):
+        self.manager.lldp_neighbours_watch(callback)
+
     def lldp_neighbours_clear(self):
         try:
             self.manager.lldp_neighbours_clear()
@@ -11,10 +11,9 @@
 
 """ inventory ipy Utilities and helper functions."""
 
-import subprocess
 import sys
 
-from sysinv.common import constants
+from sysinv.agent import lvm_report
 from sysinv.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
@@ -31,101 +30,56 @@ class LVGOperator(object):
         LOG.error("%s @ %s:%s" % (e, traceback.tb_frame.f_code.co_filename,
                                   traceback.tb_lineno))
 
-    def thinpools_in_vg(self, vg, cinder_device=None):
-        """Return number of thinpools in the specified vg. """
-        try:
-            command = ['vgs', '--noheadings', '-o', 'lv_name', vg]
-            if cinder_device:
-                if vg == constants.LVG_CINDER_VOLUMES:
-                    global_filer = 'devices/global_filter=["a|' + \
-                                   cinder_device + '|","r|.*|"]'
-                    command = command + ['--config', global_filer]
-            output = subprocess.check_output(command)
-        except Exception as e:
-            self.handle_exception("Could not retrieve vgdisplay "
-                                  "information: %s" % e)
-            output = ""
-        thinpools = 0
-        for line in output.splitlines():
-            # This makes some assumptions, the suffix is defined in nova.
-            if constants.LVM_POOL_SUFFIX in line:
-                thinpools += 1
-
-        return thinpools
-
-    def ilvg_get(self, cinder_device=None):
+    def ilvg_get(self, cinder_device=None, report=None):
         '''Enumerate physical volume topology based on:
 
         :param self
         :param cinder_device: by-path of cinder device
+        :param report: LVMReport snapshot, collected if not provided
         :returns list of disk and attributes
         '''
         ilvg = []
 
-        # keys: matching the field order of pvdisplay command
-        string_keys = ['lvm_vg_name', 'lvm_vg_uuid', 'lvm_vg_access',
-                       'lvm_max_lv', 'lvm_cur_lv', 'lvm_max_pv',
-                       'lvm_cur_pv', 'lvm_vg_size', 'lvm_vg_total_pe',
-                       'lvm_vg_free_pe']
+        # keys: matching the vg fields of the lvm report
+        key_map = [('lvm_vg_name', 'vg_name'),
+                   ('lvm_vg_uuid', 'vg_uuid'),
+                   ('lvm_vg_access', 'vg_attr'),
+                   ('lvm_max_lv', 'max_lv'),
+                   ('lvm_cur_lv', 'lv_count'),
+                   ('lvm_max_pv', 'max_pv'),
+                   ('lvm_cur_pv', 'pv_count'),
+                   ('lvm_vg_size', 'vg_size'),
+                   ('lvm_vg_total_pe', 'vg_extent_count'),
+                   ('lvm_vg_free_pe', 'vg_free_count')]
 
         # keys that need to be translated into ints
         int_keys = ['lvm_max_lv', 'lvm_cur_lv', 'lvm_max_pv',
                     'lvm_cur_pv', 'lvm_vg_size', 'lvm_vg_total_pe',
                     'lvm_vg_free_pe']
 
-        # pvdisplay command to retrieve the pv data of all pvs present
-        vgdisplay_command = 'vgdisplay -C --aligned -o vg_name,vg_uuid,vg_attr'\
-                            ',max_lv,lv_count,max_pv,pv_count,vg_size,'\
-                            'vg_extent_count,vg_free_count'\
-                            ' --units B --nosuffix --noheadings'
-
-        # Execute the command
-        try:
-            vgdisplay_process = subprocess.Popen(vgdisplay_command,
-                                                 stdout=subprocess.PIPE,
-                                                 shell=True)
-            vgdisplay_output = vgdisplay_process.stdout.read()
-        except Exception as e:
-            self.handle_exception("Could not retrieve vgdisplay "
-                                  "information: %s" % e)
-            vgdisplay_output = ""
-
-        # Cinder devices are hidden by global_filter, list them separately.
-        if cinder_device:
-            new_global_filer = ' --config \'devices/global_filter=["a|' + \
-                               cinder_device + '|","r|.*|"]\''
-            vgdisplay_command = vgdisplay_command + new_global_filer
-
-            try:
-                vgdisplay_process = subprocess.Popen(vgdisplay_command,
-                                                     stdout=subprocess.PIPE,
-                                                     shell=True)
-                vgdisplay_output = vgdisplay_output + vgdisplay_process.stdout.read()
-            except Exception as e:
-                self.handle_exception("Could not retrieve vgdisplay "
-                                      "information: %s" % e)
-
-        # parse the output 1 vg/row
-        for row in vgdisplay_output.split('\n'):
-            # get the values of fields as strings
-            values = row.split()
+        if report is None:
+            report = lvm_report.LVMReport.collect(cinder_device)
 
+        vg_names = set()
+        for vg, lvs in report.volume_groups():
             # create the dict of attributes
-            attr = dict(zip(string_keys, values))
+            attr = dict((k, vg.get(f, '').strip()) for k, f in key_map)
+            if attr['lvm_vg_name'] in vg_names:
+                continue
 
             # convert required values from strings to ints
-            for k in int_keys:
-                if k in attr.keys():
+            try:
+                for k in int_keys:
                     attr[k] = int(attr[k])
+            except ValueError:
+                LOG.warn("Skipping vg with invalid attributes: %s" % vg)
+                continue
 
             # subtract any thinpools from the lv count
-            if 'lvm_cur_lv' in attr:
-                attr['lvm_cur_lv'] -= self.thinpools_in_vg(attr['lvm_vg_name'],
-                                                           cinder_device)
+            attr['lvm_cur_lv'] -= report.thinpool_count(lvs)
 
-            # Make sure we have attributes
-            if attr:
-                ilvg.append(attr)
+            vg_names.add(attr['lvm_vg_name'])
+            ilvg.append(attr)
 
         LOG.debug("ilvg= %s" % ilvg)
 
@@ -0,0 +1,119 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# All Rights Reserved.
+#
+
+""" inventory LVM report Utilities and helper functions."""
+
+import json
+import subprocess
+import sys
+
+from sysinv.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+VG_FIELDS = ['vg_name', 'vg_uuid', 'vg_attr', 'max_lv', 'lv_count',
+             'max_pv', 'pv_count', 'vg_size', 'vg_extent_count',
+             'vg_free_count']
+
+PV_FIELDS = ['pv_name', 'pv_uuid', 'pv_size', 'pv_pe_count',
+             'pv_pe_alloc_count']
+
+LV_FIELDS = ['lv_name', 'lv_attr']
+
+# Only the vg, pv and lv sub-reports are used, keep the segment ones small
+FULLREPORT_COMMAND = ['lvm', 'fullreport', '--reportformat', 'json',
+                      '--units', 'B', '--nosuffix',
+                      '--configreport', 'vg', '-o', ','.join(VG_FIELDS),
+                      '--configreport', 'pv', '-o', ','.join(PV_FIELDS),
+                      '--configreport', 'lv', '-o', ','.join(LV_FIELDS),
+                      '--configreport', 'pvseg', '-o', 'pvseg_start',
+                      '--configreport', 'seg', '-o', 'seg_start']
+
+
+def handle_exception(e):
+    traceback = sys.exc_info()[-1]
+    LOG.error("%s @ %s:%s" % (e, traceback.tb_frame.f_code.co_filename,
+                              traceback.tb_lineno))
+
+
+def cinder_device_filter(cinder_device):
+    """Return the lvm config override exposing only the cinder device.
+
+    Cinder devices are hidden by global_filter on the standby controller.
+    """
+    return 'devices/global_filter=["a|' + cinder_device + '|","r|.*|"]'
+
+
+class LVMReport(object):
+    '''Snapshot of the volume groups, physical and logical volumes'''
+
+    def __init__(self, entries=None):
+        # one entry per volume group, orphan PVs have an entry without vg
+        self.entries = entries or []
+
+    @classmethod
+    def collect(cls, cinder_device=None):
+        """Run lvm fullreport once, plus once for the cinder device."""
+        entries = cls._fullreport()
+        if cinder_device:
+            entries += cls._fullreport(
+                ['--config', cinder_device_filter(cinder_device)])
+        return cls(entries)
+
+    @classmethod
+    def _fullreport(cls, args=None):
+        try:
+            output = subprocess.check_output(FULLREPORT_COMMAND + (args or []))
+        except Exception as e:
+            handle_exception("Could not retrieve lvm fullreport "
+                             "information: %s" % e)
+            return []
+        return cls.parse(output)
+
+    @staticmethod
+    def parse(output):
+        """Return the report entries of the lvm fullreport JSON output."""
+        try:
+            report = json.loads(output)['report']
+        except (ValueError, KeyError, TypeError) as e:
+            handle_exception("Could not parse lvm fullreport "
+                             "information: %s" % e)
+            return []
+
+        entries = []
+        for entry in report:
+            if not isinstance(entry, dict):
+                continue
+            vgs = entry.get('vg') or [{}]
+            entries.append({'vg': vgs[0],
+                            'pv': entry.get('pv') or [],
+                            'lv': entry.get('lv') or []})
+        return entries
+
+    def physical_volumes(self):
+        """Return (vg_name, pv) for every physical volume."""
+        for entry in self.entries:
+            vg_name = entry['vg'].get('vg_name', '')
+            for pv in entry['pv']:
+                yield vg_name, pv
+
+    def volume_groups(self):
+        """Return (vg, lvs) for every volume group."""
+        for entry in self.entries:
+            if entry['vg'].get('vg_name'):
+                yield entry['vg'], entry['lv']
+
+    @staticmethod
+    def thinpool_count(lvs):
+        """Return the number of thin pools in a list of logical volumes."""
+        return len([lv for lv in lvs
+                    if lv.get('lv_attr', '').startswith('t') and
+                    not lv.get('lv_name', '').startswith('[')])
@@ -35,6 +35,7 @@ Commands (from conductors) are received via RPC calls.
 
 from __future__ import print_function
 import errno
+import eventlet
 import fcntl
 import fileinput
 import os
@@ -49,15 +50,18 @@ import yaml
 
 from six.moves import configparser
 from six import StringIO
+from sysinv.agent import block_monitor
 from sysinv.agent import disk
 from sysinv.agent import partition
 from sysinv.agent import pv
 from sysinv.agent import lvg
+from sysinv.agent import lvm_report
 from sysinv.agent import pci
 from sysinv.agent import node
 from sysinv.agent.lldp import plugin as lldp_plugin
 from sysinv.common import constants
 from sysinv.common import exception
+from sysinv.common import inventory
 from sysinv.common import service
 from sysinv.common import utils
 from sysinv.objects import base as objects_base
@@ -88,6 +92,32 @@ agent_opts = [
        cfg.IntOpt('audit_interval',
                   default=60,
                   help='Maximum time since the last check-in of a agent'),
+       cfg.IntOpt('inventory_resync_interval',
+                  default=3600,
+                  help=('Maximum time in seconds between full inventory '
+                        'reports, in between only the changed records are '
+                        'reported. 0 disables delta reports.')),
+       cfg.IntOpt('audit_workers',
+                  default=4,
+                  help=('Number of green threads collecting the inventory '
+                        'categories of an audit concurrently')),
+       cfg.BoolOpt('block_device_monitor',
+                   default=True,
+                   help=('Rescan the block device inventory on udev events '
+                         'instead of on every audit')),
+       cfg.IntOpt('block_device_scan_interval',
+                  default=600,
+                  help=('Maximum time in seconds between full block device '
+                        'scans when the block device monitor is enabled')),
+       cfg.BoolOpt('pci_device_monitor',
+                   default=True,
+                   help=('Keep the PCI device scan between inventories, '
+                         'rescanning on udev PCI events and SR-IOV VF '
+                         'changes')),
+       cfg.BoolOpt('lldp_neighbour_watch',
+                   default=True,
+                   help=('Report the LLDP neighbour changes as the LLDP '
+                         'drivers see them instead of on every audit')),
               ]
 
 CONF = cfg.CONF
@@ -110,6 +140,20 @@ PUPPET_HIERADATA_PATH = os.path.join(tsc.PUPPET_PATH, 'hieradata')
 LOCK_AGENT_ACTION = 'agent-exclusive-action'
 UNLOCK_READY_FLAG = os.path.join(tsc.PLATFORM_CONF_PATH, ".unlock_ready")
 
+# Audit collectors that are not inventory categories of their own
+COLLECTOR_LVM = 'lvm'
+COLLECTOR_LLDP = 'lldp'
+
+LOCK_LLDP_NEIGHBOUR_REPORT = 'agent-lldp-neighbour-report'
+
+# Seconds to wait for a burst of LLDP neighbour changes before reporting
+LLDP_WATCH_SETTLE_TIME = 1
+# Seconds to wait before restarting a stopped LLDP neighbour watch
+LLDP_WATCH_RETRY = 30
+# Seconds to wait before retrying the inventory delta reports with a
+# conductor that does not support them, e.g. during an upgrade
+INVENTORY_DELTA_RETRY = 600
+
 
 class FakeGlobalSectionHead(object):
     def __init__(self, fp):
@@ -153,6 +197,14 @@ class AgentManager(service.PeriodicService):
         self._prev_partition = None
         self._prev_lvg = None
         self._prev_pv = None
+        self._inventory_reports = {}
+        self._inventory_delta_retry_time = 0
+        self._block_device_monitor = None
+        self._block_device_scan_time = 0
+        self._pci_device_monitor = None
+        self._lldp_neighbours = None
+        self._lldp_neighbours_time = 0
+        self._lldp_watch_timer = None
         self._subfunctions = None
         self._subfunctions_configured = False
         self._notify_subfunctions_alarm_clear = False
@@ -175,6 +227,29 @@ class AgentManager(service.PeriodicService):
         if tsc.system_mode == constants.SYSTEM_MODE_SIMPLEX:
             utils.touch(SYSINV_READY_FLAG)
 
+        if CONF.agent.block_device_monitor:
+            monitor = block_monitor.BlockDeviceMonitor(
+                callback=self._block_devices_changed)
+            try:
+                monitor.start()
+                self._block_device_monitor = monitor
+            except Exception as e:
+                LOG.warn("Block device monitor unavailable, scanning block "
+                         "devices on every audit: %s" % e)
+
+        if CONF.agent.pci_device_monitor:
+            monitor = pci.PCIDeviceMonitor(self._ipci_operator)
+            try:
+                monitor.start()
+                self._pci_device_monitor = monitor
+            except Exception as e:
+                LOG.warn("PCI device monitor unavailable, scanning PCI "
+                         "devices on every inventory: %s" % e)
+
+        if (CONF.agent.lldp_neighbour_watch and
+                self._lldp_operator.lldp_watch_supported()):
+            eventlet.spawn(self._lldp_watch)
+
     def _report_to_conductor_iplatform_avail(self):
         # First report sent to conductor since boot
         utils.touch(SYSINV_FIRST_REPORT_FLAG)
@@ -368,53 +443,139 @@ class AgentManager(service.PeriodicService):
 
         return config_uuid
 
+    @staticmethod
+    def _lldp_neighbour_dict(neighbour):
+        return {
+            'name_or_uuid': neighbour.key.portname,
+            'msap': neighbour.msap,
+            'state': neighbour.state,
+            constants.LLDP_TLV_TYPE_CHASSIS_ID: neighbour.key.chassisid,
+            constants.LLDP_TLV_TYPE_PORT_ID: neighbour.key.portid,
+            constants.LLDP_TLV_TYPE_TTL: neighbour.ttl,
+            constants.LLDP_TLV_TYPE_SYSTEM_NAME: neighbour.system_name,
+            constants.LLDP_TLV_TYPE_SYSTEM_DESC: neighbour.system_desc,
+            constants.LLDP_TLV_TYPE_SYSTEM_CAP: neighbour.capabilities,
+            constants.LLDP_TLV_TYPE_MGMT_ADDR: neighbour.mgmt_addr,
+            constants.LLDP_TLV_TYPE_PORT_DESC: neighbour.port_desc,
+            constants.LLDP_TLV_TYPE_DOT1_LAG: neighbour.dot1_lag,
+            constants.LLDP_TLV_TYPE_DOT1_PORT_VID: neighbour.dot1_port_vid,
+            constants.LLDP_TLV_TYPE_DOT1_VID_DIGEST: neighbour.dot1_vid_digest,
+            constants.LLDP_TLV_TYPE_DOT1_MGMT_VID: neighbour.dot1_mgmt_vid,
+            constants.LLDP_TLV_TYPE_DOT1_PROTO_VIDS: neighbour.dot1_proto_vids,
+            constants.LLDP_TLV_TYPE_DOT1_PROTO_IDS: neighbour.dot1_proto_ids,
+            constants.LLDP_TLV_TYPE_DOT1_VLAN_NAMES: neighbour.dot1_vlan_names,
+            constants.LLDP_TLV_TYPE_DOT3_MAC_STATUS: neighbour.dot3_mac_status,
+            constants.LLDP_TLV_TYPE_DOT3_MAX_FRAME: neighbour.dot3_max_frame,
+            constants.LLDP_TLV_TYPE_DOT3_POWER_MDI: neighbour.dot3_power_mdi,
+        }
+
+    @staticmethod
+    def _lldp_neighbour_key(neighbour_dict):
+        return (neighbour_dict['name_or_uuid'], neighbour_dict['msap'])
+
+    def _lldp_neighbours_seed(self):
+        neighbours = self._lldp_operator.lldp_neighbours_list()
+        neighbour_dicts = [self._lldp_neighbour_dict(n) for n in neighbours]
+        self._lldp_neighbours = dict((self._lldp_neighbour_key(n), n)
+                                     for n in neighbour_dicts)
+        self._lldp_neighbours_time = time.time()
+
+    def _lldp_neighbours_get(self):
+        """Return the lldp neighbour records.
+
+        While the neighbour watch runs the records it keeps are returned,
+        they are listed again from the drivers once per resync interval.
+        """
+        if self._lldp_neighbours is None:
+            neighbours = self._lldp_operator.lldp_neighbours_list()
+            neighbour_dicts = [self._lldp_neighbour_dict(n)
+                               for n in neighbours]
+        else:
+            interval = CONF.agent.inventory_resync_interval
+            if time.time() - self._lldp_neighbours_time >= interval:
+                self._lldp_neighbours_seed()
+            neighbour_dicts = self._lldp_neighbours.values()
+        return sorted(neighbour_dicts, key=self._lldp_neighbour_key)
+
+    @utils.synchronized(LOCK_LLDP_NEIGHBOUR_REPORT, external=False)
+    def _lldp_neighbours_report(self, context, rpcapi, host_uuid,
+                                neighbour_dict_array):
+        try:
+            self._report_inventory_category(
+                context, rpcapi, host_uuid,
+                inventory.CATEGORY_LLDP_NEIGHBOUR, neighbour_dict_array)
+        except exception.SysinvException:
+            LOG.exception("Sysinv Agent exception updating lldp neighbours.")
+            self._lldp_operator.lldp_neighbours_clear()
+
+    def _lldp_watch(self):
+        """Keep the lldp neighbours up to date with the driver watches"""
+        while True:
+            try:
+                # The watch only reports changes, start from the current
+                # neighbours. Changes missed in between are caught up by
+                # the next resync.
+                self._lldp_neighbours_seed()
+                self._lldp_operator.lldp_neighbours_watch(
+                    self._lldp_neighbour_changed)
+            except Exception as e:
+                LOG.exception("LLDP neighbour watch failed: %s" % e)
+
+            self._lldp_neighbours = None
+            LOG.warn("LLDP neighbour watch stopped, polling LLDP neighbours "
+                     "until it restarts in %d seconds" % LLDP_WATCH_RETRY)
+            time.sleep(LLDP_WATCH_RETRY)
+
+    def _lldp_neighbour_changed(self, change, neighbour):
+        if self._lldp_neighbours is None:
+            return
+
+        neighbour_dict = self._lldp_neighbour_dict(neighbour)
+        key = self._lldp_neighbour_key(neighbour_dict)
+        LOG.debug("LLDP neighbour %s %s" % (neighbour, change))
+        if change == lldp_plugin.NEIGHBOUR_REMOVED:
+            self._lldp_neighbours.pop(key, None)
+        else:
+            self._lldp_neighbours[key] = neighbour_dict
+
+        if self._lldp_watch_timer is None:
+            self._lldp_watch_timer = eventlet.spawn_after(
+                LLDP_WATCH_SETTLE_TIME, self._lldp_neighbours_changed)
+
+    def _lldp_neighbours_changed(self):
+        """Report the lldp neighbours changed since the last report"""
+        self._lldp_watch_timer = None
+        if not self._ihost_uuid or self._lldp_neighbours is None:
+            return
+
+        # Until the initial configuration is complete the audit reports the
+        # neighbours with the interfaces temporarily enabled
+        if not self._is_config_complete():
+            return
+
+        icontext = mycontext.get_admin_context()
+        rpcapi = conductor_rpcapi.ConductorAPI(
+            topic=conductor_rpcapi.MANAGER_TOPIC)
+        try:
+            # Unlike the audit, report the last neighbour going away
+            self._lldp_neighbours_report(icontext, rpcapi, self._ihost_uuid,
+                                         self._lldp_neighbours_get())
+        except Exception as e:
+            LOG.exception("Failed to report LLDP neighbour changes: %s" % e)
+
     def host_lldp_get_and_report(self, context, rpcapi, host_uuid):
         neighbour_dict_array = []
         agent_dict_array = []
-        neighbours = []
         agents = []
 
         try:
-            neighbours = self._lldp_operator.lldp_neighbours_list()
+            neighbour_dict_array = self._lldp_neighbours_get()
         except Exception as e:
             LOG.error("Failed to get LLDP neighbours: %s", str(e))
 
-        for neighbour in neighbours:
-            neighbour_dict = {
-                'name_or_uuid': neighbour.key.portname,
-                'msap': neighbour.msap,
-                'state': neighbour.state,
-                constants.LLDP_TLV_TYPE_CHASSIS_ID: neighbour.key.chassisid,
-                constants.LLDP_TLV_TYPE_PORT_ID: neighbour.key.portid,
-                constants.LLDP_TLV_TYPE_TTL: neighbour.ttl,
-                constants.LLDP_TLV_TYPE_SYSTEM_NAME: neighbour.system_name,
-                constants.LLDP_TLV_TYPE_SYSTEM_DESC: neighbour.system_desc,
-                constants.LLDP_TLV_TYPE_SYSTEM_CAP: neighbour.capabilities,
-                constants.LLDP_TLV_TYPE_MGMT_ADDR: neighbour.mgmt_addr,
-                constants.LLDP_TLV_TYPE_PORT_DESC: neighbour.port_desc,
-                constants.LLDP_TLV_TYPE_DOT1_LAG: neighbour.dot1_lag,
-                constants.LLDP_TLV_TYPE_DOT1_PORT_VID: neighbour.dot1_port_vid,
-                constants.LLDP_TLV_TYPE_DOT1_VID_DIGEST: neighbour.dot1_vid_digest,
-                constants.LLDP_TLV_TYPE_DOT1_MGMT_VID: neighbour.dot1_mgmt_vid,
-                constants.LLDP_TLV_TYPE_DOT1_PROTO_VIDS: neighbour.dot1_proto_vids,
-                constants.LLDP_TLV_TYPE_DOT1_PROTO_IDS: neighbour.dot1_proto_ids,
-                constants.LLDP_TLV_TYPE_DOT1_VLAN_NAMES: neighbour.dot1_vlan_names,
-                constants.LLDP_TLV_TYPE_DOT1_VID_DIGEST: neighbour.dot1_vid_digest,
-                constants.LLDP_TLV_TYPE_DOT3_MAC_STATUS: neighbour.dot3_mac_status,
-                constants.LLDP_TLV_TYPE_DOT3_MAX_FRAME: neighbour.dot3_max_frame,
-                constants.LLDP_TLV_TYPE_DOT3_POWER_MDI: neighbour.dot3_power_mdi,
-            }
-            neighbour_dict_array.append(neighbour_dict)
-
         if neighbour_dict_array:
-            try:
-                rpcapi.lldp_neighbour_update_by_host(context,
-                                                     host_uuid,
-                                                     neighbour_dict_array)
-            except exception.SysinvException:
-                LOG.exception("Sysinv Agent exception updating lldp neighbours.")
-                self._lldp_operator.lldp_neighbours_clear()
-                pass
+            self._lldp_neighbours_report(context, rpcapi, host_uuid,
+                                         neighbour_dict_array)
 
         try:
             agents = self._lldp_operator.lldp_agents_list()
@@ -442,14 +603,95 @@ class AgentManager(service.PeriodicService):
 
         if agent_dict_array:
             try:
-                rpcapi.lldp_agent_update_by_host(context,
-                                                 host_uuid,
-                                                 agent_dict_array)
+                self._report_inventory_category(
+                    context, rpcapi, host_uuid,
+                    inventory.CATEGORY_LLDP_AGENT, agent_dict_array)
             except exception.SysinvException:
                 LOG.exception("Sysinv Agent exception updating lldp agents.")
                 self._lldp_operator.lldp_agents_clear()
                 pass
 
+    def _report_inventory_category(self, context, rpcapi, host_uuid,
+                                   category, records, force=False):
+        """Report the records of an inventory category to the conductor.
+
+        Only the records changed since the last report applied by the
+        conductor are sent, unless there is no such report, the conductor
+        cannot apply the delta or the last full report is older than the
+        resync interval. Unchanged records are not reported unless forced.
+
+        Conductors that do not support the delta reports get the records
+        through the update method of the category.
+        """
+        if time.time() < self._inventory_delta_retry_time:
+            self._report_inventory_category_full(context, rpcapi, host_uuid,
+                                                 category, records)
+            return
+
+        try:
+            self._report_inventory_category_delta(context, rpcapi, host_uuid,
+                                                  category, records, force)
+        except (AttributeError, RemoteError) as e:
+            if (isinstance(e, RemoteError) and
+                    e.exc_type != 'AttributeError'):
+                raise
+            LOG.warn("Conductor does not support inventory delta reports, "
+                     "reporting the full inventory %s. Upgrade in "
+                     "progress?" % category)
+            self._inventory_delta_retry_time = (time.time() +
+                                                INVENTORY_DELTA_RETRY)
+            self._report_inventory_category_full(context, rpcapi, host_uuid,
+                                                 category, records)
+
+    def _report_inventory_category_full(self, context, rpcapi, host_uuid,
+                                        category, records):
+        """Report the records of a category with its update method."""
+        if category == inventory.CATEGORY_MEMORY:
+            rpcapi.imemory_update_by_ihost(context, host_uuid, records)
+            return
+
+        handlers = {
+            inventory.CATEGORY_DISK: rpcapi.idisk_update_by_ihost,
+            inventory.CATEGORY_PARTITION: rpcapi.ipartition_update_by_ihost,
+            inventory.CATEGORY_PV: rpcapi.ipv_update_by_ihost,
+            inventory.CATEGORY_LVG: rpcapi.ilvg_update_by_ihost,
+            inventory.CATEGORY_LLDP_AGENT: rpcapi.lldp_agent_update_by_host,
+            inventory.CATEGORY_LLDP_NEIGHBOUR:
+                rpcapi.lldp_neighbour_update_by_host,
+        }
+        handlers[category](context, host_uuid, records)
+
+    def _report_inventory_category_delta(self, context, rpcapi, host_uuid,
+                                         category, records, force):
+        interval = CONF.agent.inventory_resync_interval
+        digest, records_sent, full_time = self._inventory_reports.pop(
+            category, (None, None, 0))
+        resync = not interval or (time.time() - full_time) >= interval
+
+        report = None
+        if digest is not None and not resync:
+            report = inventory.delta_report(category, records_sent, digest,
+                                            records)
+            if report and report['digest'] == digest and not force:
+                # Unchanged since the last report
+                self._inventory_reports[category] = (digest, records_sent,
+                                                     full_time)
+                return
+
+        if (report is None or
+                not rpcapi.inventory_delta_update_by_ihost(
+                    context, host_uuid, category, report)):
+            report = inventory.full_report(records)
+            if not rpcapi.inventory_delta_update_by_ihost(
+                    context, host_uuid, category, report):
+                LOG.error("Conductor rejected the full inventory %s "
+                          "report" % category)
+                return
+            full_time = time.time()
+
+        self._inventory_reports[category] = (report['digest'], records,
+                                             full_time)
+
     def synchronized_network_config(func):
         """ Synchronization decorator to acquire and release
             network_config_lock.
@@ -876,7 +1118,8 @@ class AgentManager(service.PeriodicService):
         self._update_disk_partitions(rpcapi, icontext,
                                      ihost['uuid'], force_update=True)
 
-        ipv = self._ipv_operator.ipv_get()
+        report = lvm_report.LVMReport.collect()
+        ipv = self._ipv_operator.ipv_get(report=report)
         try:
             rpcapi.ipv_update_by_ihost(icontext,
                                        ihost['uuid'],
@@ -885,7 +1128,7 @@ class AgentManager(service.PeriodicService):
             LOG.exception("Sysinv Agent exception updating ipv conductor.")
             pass
 
-        ilvg = self._ilvg_operator.ilvg_get()
+        ilvg = self._ilvg_operator.ilvg_get(report=report)
         try:
             rpcapi.ilvg_update_by_ihost(icontext,
                                         ihost['uuid'],
@@ -1040,14 +1283,17 @@ class AgentManager(service.PeriodicService):
     @utils.synchronized(constants.PARTITION_MANAGE_LOCK)
     def _update_disk_partitions(self, rpcapi, icontext,
                                 host_uuid, force_update=False):
+        # the partitions are read and reported under the same lock, so
+        # that a partition being managed is not reported half way
         ipartition = self._ipartition_operator.ipartition_get()
         if not force_update:
             if self._prev_partition == ipartition:
                 return
             self._prev_partition = ipartition
         try:
-            rpcapi.ipartition_update_by_ihost(
-                icontext, host_uuid, ipartition)
+            self._report_inventory_category(
+                icontext, rpcapi, host_uuid,
+                inventory.CATEGORY_PARTITION, ipartition, force=True)
         except AttributeError:
             # safe to ignore during upgrades
             LOG.warn("Skip updating ipartition conductor. "
@@ -1163,18 +1409,6 @@ class AgentManager(service.PeriodicService):
                           (', '.join(force_updates)))
 
             self._update_ttys_dcd_status(icontext, self._ihost_uuid)
-            if self._agent_throttle > 5:
-                # throttle updates
-                self._agent_throttle = 0
-                imemory = self._inode_operator.inodes_get_imemory()
-                rpcapi.imemory_update_by_ihost(icontext,
-                                               self._ihost_uuid,
-                                               imemory)
-                if self._is_config_complete():
-                    self.host_lldp_get_and_report(icontext, rpcapi, self._ihost_uuid)
-                else:
-                    self._lldp_enable_and_report(icontext, rpcapi, self._ihost_uuid)
-            self._agent_throttle += 1
 
             if self._ihost_personality == constants.CONTROLLER:
                 # Audit TPM configuration only on Controller
@@ -1195,62 +1429,36 @@ class AgentManager(service.PeriodicService):
                 if constants.PARTITION_AUDIT_REQUEST in force_updates:
                     self._prev_partition = None
 
-            # Update disks
-            idisk = self._idisk_operator.idisk_get()
-            if ((self._prev_disk is None) or
-                    (self._prev_disk != idisk)):
-                self._prev_disk = idisk
-                try:
-                    rpcapi.idisk_update_by_ihost(icontext,
-                                                 self._ihost_uuid,
-                                                 idisk)
-                except RemoteError as e:
-                    # TODO (oponcea): Valid for R4->R5, remove in R6.
-                    # safe to ignore during upgrades
-                    if 'has no property' in str(e) and 'available_mib' in str(e):
-                        LOG.warn("Skip updating idisk conductor. "
-                                 "Upgrade in progress?")
-                    else:
-                        LOG.exception("Sysinv Agent exception updating idisk "
-                                      "conductor.")
-                except exception.SysinvException:
-                    LOG.exception("Sysinv Agent exception updating idisk"
-                                  "conductor.")
-                    self._prev_disk = None
+            # Collect all the inventory categories concurrently, then
+            # report them to the conductor in dependency order
+            categories = self._get_block_device_categories()
+            collectors = self._block_device_collectors(categories,
+                                                       cinder_device)
+            if self._agent_throttle > 5:
+                # throttle updates
+                self._agent_throttle = 0
+                collectors.append((inventory.CATEGORY_MEMORY,
+                                   self._inode_operator.inodes_get_imemory))
+                if self._is_config_complete():
+                    lldp_report = self.host_lldp_get_and_report
+                else:
+                    lldp_report = self._lldp_enable_and_report
+                # LLDP is reported on its own, independent of the others
+                collectors.append((COLLECTOR_LLDP,
+                                   lambda: lldp_report(icontext, rpcapi,
+                                                       self._ihost_uuid)))
+            self._agent_throttle += 1
 
-            # Update disk partitions
-            if self._ihost_personality != constants.STORAGE:
-                self._update_disk_partitions(rpcapi, icontext, self._ihost_uuid)
+            results = self._collect_inventory(collectors)
 
-            # Update physical volumes
-            ipv = self._ipv_operator.ipv_get(cinder_device=cinder_device)
-            if ((self._prev_pv is None) or
-                    (self._prev_pv != ipv)):
-                self._prev_pv = ipv
-                try:
-                    rpcapi.ipv_update_by_ihost(icontext,
-                                               self._ihost_uuid,
-                                               ipv)
-                except exception.SysinvException:
-                    LOG.exception("Sysinv Agent exception updating ipv"
-                                  "conductor.")
-                    self._prev_pv = None
-                    pass
+            imemory = results.get(inventory.CATEGORY_MEMORY)
+            if imemory is not None:
+                self._report_inventory_category(
+                    icontext, rpcapi, self._ihost_uuid,
+                    inventory.CATEGORY_MEMORY, imemory)
 
-            # Update local volume groups
-            ilvg = self._ilvg_operator.ilvg_get(cinder_device=cinder_device)
-            if ((self._prev_lvg is None) or
-                    (self._prev_lvg != ilvg)):
-                self._prev_lvg = ilvg
-                try:
-                    rpcapi.ilvg_update_by_ihost(icontext,
-                                                self._ihost_uuid,
-                                                ilvg)
-                except exception.SysinvException:
-                    LOG.exception("Sysinv Agent exception updating ilvg"
-                                  "conductor.")
-                    self._prev_lvg = None
-                    pass
+            self._report_block_devices(icontext, rpcapi, categories, results,
+                                       cinder_device)
 
             self._report_config_applied(icontext)
 
@@ -1261,6 +1469,165 @@ class AgentManager(service.PeriodicService):
                     with open(tsc.PLATFORM_CONF_FILE, "a") as fd:
                         fd.write("UUID=" + self._ihost_uuid)
 
+    def _get_block_device_categories(self):
+        """Return the block device inventory categories to collect.
+
+        With the block device monitor running, only the categories changed
+        since the last audit, or whose last report must be resent, are
+        collected until the next periodic full scan is due.
+        """
+        categories = set(block_monitor.CATEGORIES)
+        if self._block_device_monitor is None:
+            return categories
+
+        now = time.time()
+        dirty = self._block_device_monitor.pop_dirty()
+        if (now - self._block_device_scan_time >=
+                CONF.agent.block_device_scan_interval):
+            self._block_device_scan_time = now
+            return categories
+
+        prev = {inventory.CATEGORY_DISK: self._prev_disk,
+                inventory.CATEGORY_PARTITION: self._prev_partition,
+                inventory.CATEGORY_PV: self._prev_pv,
+                inventory.CATEGORY_LVG: self._prev_lvg}
+        return dirty | set(c for c in categories if prev[c] is None)
+
+    def _collect_inventory(self, collectors):
+        """Run the inventory collectors concurrently.
+
+        :param collectors: list of (category, function) tuples
+        :returns: dict of category to the collected inventory, a failed
+                  collector is left out
+        """
+        def _collect(collector):
+            category, function = collector
+            start = time.time()
+            try:
+                result = function()
+            except Exception:
+                LOG.exception("Sysinv Agent exception collecting %s" %
+                              category)
+                result = None
+            return category, result, time.time() - start
+
+        results = {}
+        start = time.time()
+        pool = eventlet.GreenPool(CONF.agent.audit_workers)
+        for category, result, elapsed in pool.imap(_collect, collectors):
+            LOG.debug("Sysinv Agent audit collected %s in %.3f seconds" %
+                      (category, elapsed))
+            if result is not None:
+                results[category] = result
+        LOG.debug("Sysinv Agent audit collection took %.3f seconds" %
+                  (time.time() - start))
+        return results
+
+    def _block_device_collectors(self, categories, cinder_device=None):
+        """Return the collectors of the requested block device categories"""
+        collectors = []
+        if inventory.CATEGORY_DISK in categories:
+            collectors.append((inventory.CATEGORY_DISK,
+                               self._idisk_operator.idisk_get))
+        if (inventory.CATEGORY_PV in categories or
+                inventory.CATEGORY_LVG in categories):
+            # a single LVM snapshot for both the PVs and the LVGs
+            collectors.append((COLLECTOR_LVM,
+                               lambda: lvm_report.LVMReport.collect(
+                                   cinder_device)))
+        return collectors
+
+    def _audit_block_devices(self, icontext, rpcapi, cinder_device=None):
+        """Collect and report the disks, partitions, PVs and LVGs"""
+        categories = self._get_block_device_categories()
+        results = self._collect_inventory(
+            self._block_device_collectors(categories, cinder_device))
+        self._report_block_devices(icontext, rpcapi, categories, results,
+                                   cinder_device)
+
+    def _report_block_devices(self, icontext, rpcapi, categories, results,
+                              cinder_device=None):
+        """Report the collected block devices in dependency order"""
+        # Update disks
+        idisk = results.get(inventory.CATEGORY_DISK)
+        if idisk is not None and ((self._prev_disk is None) or
+                                  (self._prev_disk != idisk)):
+            self._prev_disk = idisk
+            try:
+                self._report_inventory_category(
+                    icontext, rpcapi, self._ihost_uuid,
+                    inventory.CATEGORY_DISK, idisk, force=True)
+            except RemoteError as e:
+                # TODO (oponcea): Valid for R4->R5, remove in R6.
+                # safe to ignore during upgrades
+                if 'has no property' in str(e) and 'available_mib' in str(e):
+                    LOG.warn("Skip updating idisk conductor. "
+                             "Upgrade in progress?")
+                else:
+                    LOG.exception("Sysinv Agent exception updating idisk "
+                                  "conductor.")
+            except exception.SysinvException:
+                LOG.exception("Sysinv Agent exception updating idisk"
+                              "conductor.")
+                self._prev_disk = None
+
+        # Update disk partitions
+        if (self._ihost_personality != constants.STORAGE and
+                inventory.CATEGORY_PARTITION in categories):
+            self._update_disk_partitions(rpcapi, icontext, self._ihost_uuid)
+
+        report = results.get(COLLECTOR_LVM)
+
+        # Update physical volumes
+        ipv = None
+        if report is not None and inventory.CATEGORY_PV in categories:
+            ipv = self._ipv_operator.ipv_get(cinder_device=cinder_device,
+                                             report=report)
+        if ipv is not None and ((self._prev_pv is None) or
+                                (self._prev_pv != ipv)):
+            self._prev_pv = ipv
+            try:
+                self._report_inventory_category(
+                    icontext, rpcapi, self._ihost_uuid,
+                    inventory.CATEGORY_PV, ipv, force=True)
+            except exception.SysinvException:
+                LOG.exception("Sysinv Agent exception updating ipv"
+                              "conductor.")
+                self._prev_pv = None
+                pass
+
+        # Update local volume groups
+        ilvg = None
+        if report is not None and inventory.CATEGORY_LVG in categories:
+            ilvg = self._ilvg_operator.ilvg_get(cinder_device=cinder_device,
+                                                report=report)
+        if ilvg is not None and ((self._prev_lvg is None) or
+                                 (self._prev_lvg != ilvg)):
+            self._prev_lvg = ilvg
+            try:
+                self._report_inventory_category(
+                    icontext, rpcapi, self._ihost_uuid,
+                    inventory.CATEGORY_LVG, ilvg, force=True)
+            except exception.SysinvException:
+                LOG.exception("Sysinv Agent exception updating ilvg"
+                              "conductor.")
+                self._prev_lvg = None
+                pass
+
+    def _block_devices_changed(self):
+        """Rescan the block devices as soon as udev reports a change"""
+        if not self._ihost_uuid:
+            return
+
+        icontext = mycontext.get_admin_context()
+        rpcapi = conductor_rpcapi.ConductorAPI(
+            topic=conductor_rpcapi.MANAGER_TOPIC)
+
+        @utils.synchronized(LOCK_AGENT_ACTION, external=False)
+        def _audit():
+            self._audit_block_devices(icontext, rpcapi)
+        _audit()
+
     def configure_lldp_systemname(self, context, systemname):
         """Configure the systemname into the lldp agent with the supplied data.
 
@@ -13,7 +13,6 @@
 
 import os
 from os import listdir
-from os.path import isfile
 from os.path import join
 import re
 import subprocess
@@ -51,6 +50,14 @@ COMPUTE_MIN_MB = 1600
 # units
 COMPUTE_MIN_NON_0_MB = 500
 
+NODE_SYSFS_PATH = '/sys/devices/system/node'
+
+WORKER_RESERVED_CONF = '/etc/platform/worker_reserved.conf'
+
+# Per node meminfo counters (in KB) used by the memory inventory
+MEMINFO_KEYS = ('MemTotal', 'MemFree', 'FilePages', 'SReclaimable',
+                'CommitLimit', 'Committed_AS')
+
 
 class CPU:
     '''Class to encapsulate CPU data for System Inventory'''
@@ -88,6 +95,56 @@ class CPU:
         return "<CPU '%s'>" % str(self)
 
 
+class NodeMemory(object):
+    '''Memory counters of a NUMA node, read once per collection'''
+
+    __slots__ = ('node', 'meminfo', 'hugepages')
+
+    def __init__(self, node):
+        self.node = node
+        self.meminfo = dict.fromkeys(MEMINFO_KEYS, 0)
+        # (size_mib, nr_hugepages, free_hugepages) per hugepage size
+        self.hugepages = []
+
+    def read(self, path=None):
+        node_path = "%s/node%d" % (path or NODE_SYSFS_PATH, self.node)
+
+        try:
+            with open(node_path + '/meminfo', 'r') as infile:
+                for line in infile:
+                    # Node <n> <key>: <value> kB
+                    fields = line.split()
+                    if len(fields) < 4:
+                        continue
+                    key = fields[2].rstrip(':')
+                    if key in self.meminfo:
+                        self.meminfo[key] = int(fields[3])
+        except IOError:
+            # silently ignore IO errors (eg. file missing)
+            pass
+
+        hugepages = node_path + '/hugepages'
+        try:
+            for subdir in listdir(hugepages):
+                mydir = join(hugepages, subdir)
+                if not os.path.isdir(mydir):
+                    continue
+                if subdir.split('-')[1].startswith("1048576kB"):
+                    size = SIZE_1G_MB
+                else:
+                    size = SIZE_2M_MB
+                with open(mydir + '/nr_hugepages', 'r') as f:
+                    nr_hugepages = int(f.readline())
+                with open(mydir + '/free_hugepages', 'r') as f:
+                    free_hugepages = int(f.readline())
+                self.hugepages.append((size, nr_hugepages, free_hugepages))
+        except (IOError, OSError):
+            # silently ignore IO errors (eg. file missing)
+            pass
+
+        return self
+
+
 class NodeOperator(object):
     '''Class to encapsulate CPU operations for System Inventory'''
 
@@ -109,16 +166,12 @@ class NodeOperator(object):
         # self._get_free_memory_nodes_mb()
 
     def _is_strict(self):
-        with open(os.devnull, "w") as fnull:
-            try:
-                output = subprocess.check_output(
-                    ["cat", "/proc/sys/vm/overcommit_memory"],
-                    stderr=fnull)
-                if int(output) == 2:
+        try:
+            with open("/proc/sys/vm/overcommit_memory", 'r') as f:
+                if int(f.readline()) == 2:
                     return True
-            except subprocess.CalledProcessError as e:
-                LOG.info("Failed to check for overcommit, error (%s)",
-                         e.output)
+        except (IOError, ValueError) as e:
+            LOG.info("Failed to check for overcommit, error (%s)", e)
         return False
 
     def convert_range_string_to_list(self, s):
@@ -288,40 +341,58 @@ class NodeOperator(object):
 
         return inumas, icpus
 
-    def _get_immediate_subdirs(self, dir):
-        return [name for name in listdir(dir)
-                if os.path.isdir(join(dir, name))]
+    def _get_nodes_memory(self):
+        """Read the memory counters of all the nodes in a single pass."""
+        return [NodeMemory(node).read() for node in range(self.num_nodes)]
+
+    @staticmethod
+    def _read_worker_reserved():
+        """Return the settings of worker_reserved.conf, unquoted."""
+        reserved = {}
+        with open(WORKER_RESERVED_CONF, 'r') as infile:
+            for line in infile:
+                if line.startswith('#') or '=' not in line:
+                    continue
+                key, val = line.split('=', 1)
+                reserved[key.strip()] = val.strip('\n')[1:-1]
+        return reserved
 
-    def _get_vswitch_reserved_memory(self, node):
+    def _get_vswitch_reserved_memory(self, node, reserved):
         # Read vswitch memory from worker_reserved.conf
 
         vswitch_hugepages_nr = 0
         vswitch_hugepages_size = 0
         try:
-            with open('/etc/platform/worker_reserved.conf', 'r') as infile:
-                for line in infile:
-                    if line.startswith("COMPUTE_VSWITCH_MEMORY="):
-                        val = line.split("=")
-                        vswitch_reserves = val[1].strip('\n')[1:-1]
-                        for idx, reserve in enumerate(vswitch_reserves.split()):
-                            if idx != node:
-                                continue
-                            reserve = reserve.split(":")
-                            if reserve[0].strip('"') == "node%d" % node:
-                                pages_nr = re.sub('[^0-9]', '', reserve[2])
-                                pages_size = reserve[1]
-
-                                vswitch_hugepages_nr = int(pages_nr)
-                                if pages_size == "1048576kB":
-                                    vswitch_hugepages_size = SIZE_1G_MB
-                                else:
-                                    vswitch_hugepages_size = SIZE_2M_MB
-                        break
+            vswitch_reserves = reserved.get("COMPUTE_VSWITCH_MEMORY", '')
+            for idx, reserve in enumerate(vswitch_reserves.split()):
+                if idx != node:
+                    continue
+                reserve = reserve.split(":")
+                if reserve[0].strip('"') == "node%d" % node:
+                    pages_nr = re.sub('[^0-9]', '', reserve[2])
+                    pages_size = reserve[1]
+
+                    vswitch_hugepages_nr = int(pages_nr)
+                    if pages_size == "1048576kB":
+                        vswitch_hugepages_size = SIZE_1G_MB
+                    else:
+                        vswitch_hugepages_size = SIZE_2M_MB
         except Exception as e:
             LOG.debug("Could not read vswitch reserved memory: %s", e)
 
         return vswitch_hugepages_nr, vswitch_hugepages_size
 
+    @staticmethod
+    def _get_base_reserved_memory(node, reserved):
+        # Read base memory from worker_reserved.conf
+        base_mem_mb = 0
+        base_reserves = reserved.get("WORKER_BASE_RESERVED", '')
+        for reserve in base_reserves.split():
+            reserve = reserve.split(":")
+            if reserve[0].strip('"') == "node%d" % node:
+                base_mem_mb = int(reserve[1].strip('MB'))
+        return base_mem_mb
+
     def _inode_get_memory_hugepages(self):
         """Collect hugepage info, including vswitch, and vm.
            Collect platform reserved if config.
@@ -346,7 +417,11 @@ class NodeOperator(object):
                 not worker_config_completed):
             return imemory
 
-        for node in range(self.num_nodes):
+        reserved = self._read_worker_reserved()
+        strict = self._is_strict()
+
+        for memory in self._get_nodes_memory():
+            node = memory.node
             attr = {}
             total_hp_mb = 0  # Total memory (MB) currently configured in HPs
             free_hp_mb = 0
@@ -354,140 +429,73 @@ class NodeOperator(object):
             # Check vswitch and libvirt memory
             # Loop through configured hugepage sizes of this node and record
             # total number and number free
-            hugepages = "/sys/devices/system/node/node%d/hugepages" % node
-
-            try:
-                subdirs = self._get_immediate_subdirs(hugepages)
+            vs_hp_nr, vs_hp_size = self._get_vswitch_reserved_memory(
+                node, reserved)
+            if vs_hp_nr == 0 or vs_hp_size == 0:
+                vs_hp_nr = vs_hp_size = None
+
+            for size, nr_hugepages, free_hugepages in memory.hugepages:
+                total_hp_mb = total_hp_mb + int(nr_hugepages * size)
+                free_hp_mb = free_hp_mb + int(free_hugepages * size)
+
+                if vs_hp_size is None:
+                    hp_nr = VSWITCH_MEMORY_MB // size
+                    hp_size = size
+                else:
+                    hp_nr = vs_hp_nr
+                    hp_size = vs_hp_size
 
-                for subdir in subdirs:
+                # Libvirt hugepages can be 1G and 2M
+                if size == SIZE_1G_MB:
                     hp_attr = {}
-                    sizesplit = subdir.split('-')
-                    if sizesplit[1].startswith("1048576kB"):
-                        size = SIZE_1G_MB
+                    if hp_size == size:
+                        nr_hugepages -= hp_nr
+                        hp_attr.update({
+                            'vswitch_hugepages_size_mib': hp_size,
+                            'vswitch_hugepages_nr': hp_nr,
+                            'vswitch_hugepages_avail': 0
+                        })
+                    hp_attr.update({
+                        'vm_hugepages_nr_1G': nr_hugepages,
+                        'vm_hugepages_avail_1G': free_hugepages,
+                        'vm_hugepages_use_1G': 'True'
+                    })
+                else:
+                    if len(memory.hugepages) == 1:
+                        # No 1G hugepage support.
+                        hp_attr = {
+                            'vm_hugepages_use_1G': 'False',
+                            'vswitch_hugepages_size_mib': hp_size,
+                            'vswitch_hugepages_nr': hp_nr,
+                            'vswitch_hugepages_avail': 0
+                        }
                     else:
-                        size = SIZE_2M_MB
-
-                    nr_hugepages = 0
-                    free_hugepages = 0
-
-                    mydir = hugepages + '/' + subdir
-                    files = [f for f in listdir(mydir) if isfile(join(mydir, f))]
-
-                    if files:
-                        for file in files:
-                            with open(mydir + '/' + file, 'r') as f:
-                                if file.startswith("nr_hugepages"):
-                                    nr_hugepages = int(f.readline())
-                                if file.startswith("free_hugepages"):
-                                    free_hugepages = int(f.readline())
-
-                    total_hp_mb = total_hp_mb + int(nr_hugepages * size)
-                    free_hp_mb = free_hp_mb + int(free_hugepages * size)
-
-                    vs_hp_nr, vs_hp_size = self._get_vswitch_reserved_memory(
-                        node)
-                    if vs_hp_nr == 0 or vs_hp_size == 0:
-                        vs_hp_nr = VSWITCH_MEMORY_MB // size
-                        vs_hp_size = size
-
-                    # Libvirt hugepages can be 1G and 2M
-                    if size == SIZE_1G_MB:
                         hp_attr = {}
-                        if vs_hp_size == size:
-                            nr_hugepages -= vs_hp_nr
+                        if hp_size == size and initial_report is False:
+                            # User manually set 2M pages
+                            nr_hugepages -= hp_nr
                             hp_attr.update({
-                                'vswitch_hugepages_size_mib': vs_hp_size,
-                                'vswitch_hugepages_nr': vs_hp_nr,
+                                'vswitch_hugepages_size_mib': hp_size,
+                                'vswitch_hugepages_nr': hp_nr,
                                 'vswitch_hugepages_avail': 0
                             })
-                        hp_attr.update({
-                            'vm_hugepages_nr_1G': nr_hugepages,
-                            'vm_hugepages_avail_1G': free_hugepages,
-                            'vm_hugepages_use_1G': 'True'
-                        })
-                    else:
-                        if len(subdirs) == 1:
-                            # No 1G hugepage support.
-                            hp_attr = {
-                                'vm_hugepages_use_1G': 'False',
-                                'vswitch_hugepages_size_mib': vs_hp_size,
-                                'vswitch_hugepages_nr': vs_hp_nr,
-                                'vswitch_hugepages_avail': 0
-                            }
-                        else:
-                            hp_attr = {}
-                            if vs_hp_size == size and initial_report is False:
-                                # User manually set 2M pages
-                                nr_hugepages -= vs_hp_nr
-                                hp_attr.update({
-                                    'vswitch_hugepages_size_mib': vs_hp_size,
-                                    'vswitch_hugepages_nr': vs_hp_nr,
-                                    'vswitch_hugepages_avail': 0
-                                })
-
-                        hp_attr.update({
-                            'vm_hugepages_avail_2M': free_hugepages,
-                            'vm_hugepages_nr_2M': nr_hugepages
-                        })
 
-                    attr.update(hp_attr)
+                    hp_attr.update({
+                        'vm_hugepages_avail_2M': free_hugepages,
+                        'vm_hugepages_nr_2M': nr_hugepages
+                    })
 
-            except IOError:
-                # silently ignore IO errors (eg. file missing)
-                pass
+                attr.update(hp_attr)
 
             # Get the free and total memory from meminfo for this node
-            re_node_memtotal = re.compile(r'^Node\s+\d+\s+\MemTotal:\s+(\d+)')
-            re_node_memfree = re.compile(r'^Node\s+\d+\s+\MemFree:\s+(\d+)')
-            re_node_filepages = \
-                re.compile(r'^Node\s+\d+\s+\FilePages:\s+(\d+)')
-            re_node_sreclaim = \
-                re.compile(r'^Node\s+\d+\s+\SReclaimable:\s+(\d+)')
-            re_node_commitlimit = \
-                re.compile(r'^Node\s+\d+\s+\CommitLimit:\s+(\d+)')
-            re_node_committed_as = \
-                re.compile(r'^Node\s+\d+\s+\'Committed_AS:\s+(\d+)')
-
-            free_kb = 0    # Free Memory (KB) available
-            total_kb = 0   # Total Memory (KB)
-            limit = 0      # only used in strict accounting
-            committed = 0  # only used in strict accounting
-
-            meminfo = "/sys/devices/system/node/node%d/meminfo" % node
-            try:
-                with open(meminfo, 'r') as infile:
-                    for line in infile:
-                        match = re_node_memtotal.search(line)
-                        if match:
-                            total_kb += int(match.group(1))
-                            continue
-                        match = re_node_memfree.search(line)
-                        if match:
-                            free_kb += int(match.group(1))
-                            continue
-                        match = re_node_filepages.search(line)
-                        if match:
-                            free_kb += int(match.group(1))
-                            continue
-                        match = re_node_sreclaim.search(line)
-                        if match:
-                            free_kb += int(match.group(1))
-                            continue
-                        match = re_node_commitlimit.search(line)
-                        if match:
-                            limit = int(match.group(1))
-                            continue
-                        match = re_node_committed_as.search(line)
-                        if match:
-                            committed = int(match.group(1))
-                            continue
-
-                if self._is_strict():
-                    free_kb = limit - committed
-
-            except IOError:
-                # silently ignore IO errors (eg. file missing)
-                pass
+            meminfo = memory.meminfo
+            total_kb = meminfo['MemTotal']  # Total Memory (KB)
+            if strict:
+                free_kb = meminfo['CommitLimit'] - meminfo['Committed_AS']
+            else:
+                # Free Memory (KB) available
+                free_kb = (meminfo['MemFree'] + meminfo['FilePages'] +
+                           meminfo['SReclaimable'])
 
             # Calculate PSS
             pss_mb = 0
@@ -509,17 +517,7 @@ class NodeOperator(object):
             # need to multiply total_mb by 1024
             node_total_kb = total_hp_mb * SIZE_KB + free_kb + pss_mb * SIZE_KB
 
-            # Read base memory from worker_reserved.conf
-            base_mem_mb = 0
-            with open('/etc/platform/worker_reserved.conf', 'r') as infile:
-                for line in infile:
-                    if "WORKER_BASE_RESERVED" in line:
-                        val = line.split("=")
-                        base_reserves = val[1].strip('\n')[1:-1]
-                        for reserve in base_reserves.split():
-                            reserve = reserve.split(":")
-                            if reserve[0].strip('"') == "node%d" % node:
-                                base_mem_mb = int(reserve[1].strip('MB'))
+            base_mem_mb = self._get_base_reserved_memory(node, reserved)
 
             # On small systems, clip memory overhead to more reasonable minimal
             # settings
@@ -579,47 +577,17 @@ class NodeOperator(object):
         imemory = []
         self.total_memory_mb = 0
 
-        re_node_memtotal = re.compile(r'^Node\s+\d+\s+\MemTotal:\s+(\d+)')
-        re_node_memfree = re.compile(r'^Node\s+\d+\s+\MemFree:\s+(\d+)')
-        re_node_filepages = re.compile(r'^Node\s+\d+\s+\FilePages:\s+(\d+)')
-        re_node_sreclaim = re.compile(r'^Node\s+\d+\s+\SReclaimable:\s+(\d+)')
-
-        for node in range(self.num_nodes):
-            attr = {}
-            total_mb = 0
-            free_mb = 0
-
-            meminfo = "/sys/devices/system/node/node%d/meminfo" % node
-            try:
-                with open(meminfo, 'r') as infile:
-                    for line in infile:
-                        match = re_node_memtotal.search(line)
-                        if match:
-                            total_mb += int(match.group(1))
-                            continue
-
-                        match = re_node_memfree.search(line)
-                        if match:
-                            free_mb += int(match.group(1))
-                            continue
-                        match = re_node_filepages.search(line)
-                        if match:
-                            free_mb += int(match.group(1))
-                            continue
-                        match = re_node_sreclaim.search(line)
-                        if match:
-                            free_mb += int(match.group(1))
-                            continue
-
-            except IOError:
-                # silently ignore IO errors (eg. file missing)
-                pass
+        for memory in self._get_nodes_memory():
+            meminfo = memory.meminfo
+            total_mb = meminfo['MemTotal']
+            free_mb = (meminfo['MemFree'] + meminfo['FilePages'] +
+                       meminfo['SReclaimable'])
 
             total_mb /= 1024
             free_mb /= 1024
             self.total_memory_nodes_mb.append(total_mb)
             attr = {
-                'numa_node': node,
+                'numa_node': memory.node,
                 'memtotal_mib': total_mb,
                 'memavail_mib': free_mb,
                 'hugepages_configured': 'False',
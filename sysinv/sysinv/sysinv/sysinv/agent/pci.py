@@ -13,9 +13,9 @@
 
 import glob
 import os
-import shlex
 import subprocess
 
+from sysinv.agent import udev_monitor
 from sysinv.common import constants
 from sysinv.common import utils
 from sysinv.openstack.common import log as logging
@@ -52,13 +52,10 @@ IGNORE_PCI_CLASSES = ETHERNET_PCI_CLASSES + IGNORE_BRIDGE_PCI_CLASSES + \
                      IGNORE_PERIPHERAL_PCI_CLASSES + \
                      IGNORE_SIGNAL_PROCESSING_PCI_CLASSES
 
-pciaddr = 0
-pclass = 1
-pvendor = 2
-pdevice = 3
-prevision = 4
-psvendor = 5
-psdevice = 6
+SYSFS_PCI_DEVICES = '/sys/bus/pci/devices/'
+
+# Locations of the PCI ID database, as searched by lspci
+PCI_IDS_PATHS = ['/usr/share/hwdata/pci.ids', '/usr/share/misc/pci.ids']
 
 VALID_PORT_SPEED = ['10', '100', '1000', '10000', '40000', '100000']
 
@@ -81,6 +78,117 @@ IFF_AUTOMEDIA = 1 << 14
 IFF_DYNAMIC = 1 << 15
 
 
+class PCIIds(object):
+    '''Index of the vendor, device and class names of the pci.ids file'''
+
+    _cache = {}
+
+    def __init__(self, path=None):
+        self.vendors = {}
+        self.devices = {}
+        self.subsystems = {}
+        self.classes = {}
+        if path:
+            with open(path, 'r') as f:
+                self._parse(f)
+
+    @classmethod
+    def load(cls):
+        """Return the index of the installed pci.ids, parsed only once."""
+        for path in PCI_IDS_PATHS:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            ids = cls._cache.get(path)
+            if ids is None or ids.mtime != mtime:
+                try:
+                    ids = cls(path)
+                except Exception as e:
+                    LOG.error("Could not parse %s: %s" % (path, e))
+                    continue
+                ids.mtime = mtime
+                cls._cache[path] = ids
+            return ids
+        LOG.warning("No pci.ids found, PCI names are not resolved")
+        return cls()
+
+    def _parse(self, lines):
+        vendor = device = pclass = None
+        for line in lines:
+            if not line.strip() or line.startswith('#'):
+                continue
+            depth = len(line) - len(line.lstrip('\t'))
+            fields = line.strip().split(None, 1)
+            if len(fields) != 2:
+                continue
+            key, name = fields
+            if depth == 0:
+                if key == 'C':
+                    # class section: "C cc  name"
+                    key, name = name.split(None, 1)
+                    pclass = key.lower()
+                    vendor = None
+                    self.classes[pclass] = name
+                else:
+                    vendor = key.lower()
+                    pclass = None
+                    self.vendors[vendor] = name
+            elif depth == 1:
+                if vendor is not None:
+                    device = key.lower()
+                    self.devices[(vendor, device)] = name
+                elif pclass is not None:
+                    self.classes[pclass + key.lower()] = name
+            elif depth == 2 and vendor is not None:
+                # subsystem: "\t\tssss dddd  name"
+                subfields = name.split(None, 1)
+                if len(subfields) == 2:
+                    self.subsystems[(vendor, device, key.lower(),
+                                     subfields[0].lower())] = subfields[1]
+
+    def vendor_name(self, vendor_id):
+        return self.vendors.get(vendor_id, 'Vendor %s' % vendor_id)
+
+    def device_name(self, vendor_id, device_id):
+        return self.devices.get((vendor_id, device_id),
+                                'Device %s' % device_id)
+
+    def subsystem_name(self, vendor_id, device_id,
+                       subvendor_id, subdevice_id):
+        return self.subsystems.get(
+            (vendor_id, device_id, subvendor_id, subdevice_id),
+            'Device %s' % subdevice_id)
+
+    def class_name(self, class_id):
+        """Return the name of a class (ccss) as reported by lspci."""
+        return (self.classes.get(class_id[:4]) or
+                self.classes.get(class_id[:2]) or
+                'Class %s' % class_id[:4])
+
+
+class PCIDeviceMonitor(udev_monitor.UdevMonitor):
+    '''Invalidate the PCI scan of an operator on PCI udev events'''
+
+    subsystem = 'pci'
+
+    def __init__(self, operator):
+        super(PCIDeviceMonitor, self).__init__()
+        self._operator = operator
+
+    def start(self):
+        super(PCIDeviceMonitor, self).start()
+        self._operator.enable_cache()
+
+    def stop(self):
+        self._operator.disable_cache()
+        super(PCIDeviceMonitor, self).stop()
+
+    def _device_event(self, action, device):
+        LOG.debug("PCI device %s %s" % (device.sys_name, action))
+        self._operator.invalidate()
+
+
 class PCI:
     '''Class to encapsulate PCI data for System Inventory'''
 
@@ -168,58 +276,54 @@ class PCIDevice:
 class PCIOperator(object):
     '''Class to encapsulate PCI operations for System Inventory'''
 
-    def format_lspci_output(self, device):
-        # hack for now
-        if device[prevision].strip() == device[pvendor].strip():
-            # no revision info
-            device.append(device[psvendor])
-            device[psvendor] = device[prevision]
-            device[prevision] = "0"
-        elif len(device) <= 6:  # one less entry, no revision
-            LOG.debug("update psdevice length=%s" % len(device))
-            device.append(device[psvendor])
-        return device
+    def __init__(self):
+        # The sysfs scan is kept between audits only while a PCI device
+        # monitor invalidates it
+        self._cache_enabled = False
+        self._scan = None
+        self._dpdksupport = {}
 
-    def get_pci_numa_node(self, pciaddr):
-        fnuma_node = '/sys/bus/pci/devices/' + pciaddr + '/numa_node'
+    def enable_cache(self):
+        self._cache_enabled = True
+
+    def disable_cache(self):
+        self._cache_enabled = False
+        self._scan = None
+
+    def invalidate(self):
+        self._scan = None
+
+    @staticmethod
+    def _read_attr(pciaddr, attr):
         try:
-            with open(fnuma_node, 'r') as f:
-                numa_node = f.readline().strip()
-                LOG.debug("ATTR numa_node: %s " % numa_node)
+            with open(SYSFS_PCI_DEVICES + pciaddr + '/' + attr, 'r') as f:
+                return f.readline().strip()
         except Exception:
-            LOG.debug("ATTR numa_node unknown for: %s " % pciaddr)
-            numa_node = None
-        return numa_node
+            LOG.debug("ATTR %s unknown for: %s " % (attr, pciaddr))
+            return None
+
+    @staticmethod
+    def _read_id(pciaddr, attr):
+        value = PCIOperator._read_attr(pciaddr, attr)
+        if value is not None:
+            value = value.replace('0x', '')
+        return value
+
+    def get_pci_numa_node(self, pciaddr):
+        return self._read_attr(pciaddr, 'numa_node')
 
     def get_pci_sriov_totalvfs(self, pciaddr):
-        fsriov_totalvfs = '/sys/bus/pci/devices/' + pciaddr + '/sriov_totalvfs'
-        try:
-            with open(fsriov_totalvfs, 'r') as f:
-                sriov_totalvfs = f.readline()
-                LOG.debug("ATTR sriov_totalvfs: %s " % sriov_totalvfs)
-                f.close()
-        except Exception:
-            LOG.debug("ATTR sriov_totalvfs unknown for: %s " % pciaddr)
-            sriov_totalvfs = None
-            pass
-        return sriov_totalvfs
+        return self._read_attr(pciaddr, 'sriov_totalvfs')
 
     def get_pci_sriov_numvfs(self, pciaddr):
-        fsriov_numvfs = '/sys/bus/pci/devices/' + pciaddr + '/sriov_numvfs'
-        try:
-            with open(fsriov_numvfs, 'r') as f:
-                sriov_numvfs = f.readline()
-                LOG.debug("ATTR sriov_numvfs: %s " % sriov_numvfs)
-                f.close()
-        except Exception:
-            LOG.debug("ATTR sriov_numvfs unknown for: %s " % pciaddr)
+        sriov_numvfs = self._read_attr(pciaddr, 'sriov_numvfs')
+        if sriov_numvfs is None:
             sriov_numvfs = 0
-            pass
         LOG.debug("sriov_numvfs: %s" % sriov_numvfs)
         return sriov_numvfs
 
     def get_pci_sriov_vfs_pci_address(self, pciaddr, sriov_numvfs):
-        dirpcidev = '/sys/bus/pci/devices/' + pciaddr
+        dirpcidev = SYSFS_PCI_DEVICES + pciaddr
         sriov_vfs_pci_address = []
         i = 0
         while i < int(sriov_numvfs):
@@ -235,7 +339,7 @@ class PCIOperator(object):
         return sriov_vfs_pci_address
 
     def get_pci_driver_name(self, pciaddr):
-        ddriver = '/sys/bus/pci/devices/' + pciaddr + '/driver/module/drivers'
+        ddriver = SYSFS_PCI_DEVICES + pciaddr + '/driver/module/drivers'
         try:
             drivers = [
                 os.path.basename(os.readlink(ddriver + '/' + d)) for d in os.listdir(ddriver)
@@ -249,64 +353,130 @@ class PCIOperator(object):
         LOG.debug("driver: %s" % driver)
         return driver
 
-    def pci_devices_get(self):
+    def _scan_device(self, pciaddr, pci_ids):
+        """Read the attributes of a PCI device from sysfs."""
+        vendor_id = self._read_id(pciaddr, 'vendor') or ''
+        device_id = self._read_id(pciaddr, 'device') or ''
+        class_id = self._read_id(pciaddr, 'class') or ''
+        subvendor_id = self._read_id(pciaddr, 'subsystem_vendor') or ''
+        subdevice_id = self._read_id(pciaddr, 'subsystem_device') or ''
+        revision = self._read_id(pciaddr, 'revision') or '00'
+
+        # names formatted as reported by lspci -m
+        if subvendor_id and subvendor_id not in ('0000', 'ffff'):
+            psvendor = pci_ids.vendor_name(subvendor_id)
+            psdevice = pci_ids.subsystem_name(vendor_id, device_id,
+                                              subvendor_id, subdevice_id)
+        else:
+            psvendor = psdevice = ''
+        if int(revision, 16):
+            prevision = '-r' + revision
+        else:
+            prevision = '0'
+
+        sriov_numvfs = self.get_pci_sriov_numvfs(pciaddr)
+        return {
+            'pciaddr': pciaddr,
+            'class_id': class_id,
+            'vendor_id': vendor_id,
+            'device_id': device_id,
+            'pclass': pci_ids.class_name(class_id),
+            'pvendor': pci_ids.vendor_name(vendor_id),
+            'pdevice': pci_ids.device_name(vendor_id, device_id),
+            'prevision': prevision,
+            'psvendor': psvendor,
+            'psdevice': psdevice,
+            'is_vf': os.path.isdir(SYSFS_PCI_DEVICES + pciaddr + '/physfn'),
+            'numa_node': self.get_pci_numa_node(pciaddr),
+            'sriov_totalvfs': self.get_pci_sriov_totalvfs(pciaddr),
+            'sriov_numvfs': sriov_numvfs,
+            'sriov_vfs_pci_address':
+                self.get_pci_sriov_vfs_pci_address(pciaddr, sriov_numvfs),
+            'driver': self.get_pci_driver_name(pciaddr),
+        }
+
+    def _numvfs_changed(self, scan):
+        for device in scan.values():
+            if (device['sriov_totalvfs'] is not None and
+                    self.get_pci_sriov_numvfs(device['pciaddr']) !=
+                    device['sriov_numvfs']):
+                LOG.info("sriov_numvfs of %s changed, rescanning PCI "
+                         "devices" % device['pciaddr'])
+                return True
+        return False
 
-        p = subprocess.Popen(["lspci", "-Dm"], stdout=subprocess.PIPE)
+    def pci_scan(self):
+        """Walk the PCI devices in sysfs once.
+
+        Called once per inventory pass, by pci_devices_get and inics_get.
+        The result is reused until invalidated by the PCI device monitor or
+        by a change of the number of SR-IOV VFs of a device. The driver of
+        each device is read again on every pass, since older kernels emit no
+        PCI uevent when a driver is bound or unbound.
+
+        :returns dict of PCI address to the device attributes
+        """
+        scan = self._scan
+        if (scan is not None and self._cache_enabled and
+                not self._numvfs_changed(scan)):
+            for pciaddr, device in scan.items():
+                device['driver'] = self.get_pci_driver_name(pciaddr)
+            return scan
+
+        pci_ids = PCIIds.load()
+        scan = {}
+        for pciaddr in sorted(os.listdir(SYSFS_PCI_DEVICES)):
+            scan[pciaddr] = self._scan_device(pciaddr, pci_ids)
+        self._scan = scan
+        return scan
+
+    def _current_scan(self):
+        """Return the scan of the current inventory pass.
+
+        The per device lookups use it as is, without checking the SR-IOV
+        VFs of every device again.
+        """
+        if self._scan is None:
+            return self.pci_scan()
+        return self._scan
+
+    def _find_device(self, pciaddr):
+        scan = self._current_scan()
+        for a in (pciaddr, "0000:" + pciaddr):
+            if a in scan:
+                return scan[a]
+        return None
+
+    @staticmethod
+    def _make_pci(device):
+        return PCI(device['pciaddr'], device['pclass'], device['pvendor'],
+                   device['pdevice'], device['prevision'],
+                   device['psvendor'], device['psdevice'])
 
-        pci_devices = []
-        for line in p.stdout:
-            pci_device = shlex.split(line.strip())
-            pci_device = self.format_lspci_output(pci_device)
+    def pci_devices_get(self):
 
-            if any(x in pci_device[pclass].lower() for x in
+        pci_devices = []
+        for pciaddr, device in sorted(self.pci_scan().items()):
+            if any(x in device['pclass'].lower() for x in
                    IGNORE_PCI_CLASSES):
                 continue
 
-            dirpcidev = '/sys/bus/pci/devices/'
-            physfn = dirpcidev + pci_device[pciaddr] + '/physfn'
-            if not os.path.isdir(physfn):
+            if not device['is_vf']:
                 # Do not report VFs
-                pci_devices.append(PCI(pci_device[pciaddr],
-                                       pci_device[pclass],
-                                       pci_device[pvendor],
-                                       pci_device[pdevice],
-                                       pci_device[prevision],
-                                       pci_device[psvendor],
-                                       pci_device[psdevice]))
-
-        p.wait()
+                pci_devices.append(self._make_pci(device))
 
         return pci_devices
 
     def inics_get(self):
 
-        p = subprocess.Popen(["lspci", "-Dm"], stdout=subprocess.PIPE)
-
         pci_inics = []
-        for line in p.stdout:
-            inic = shlex.split(line.strip())
-            if any(x in inic[pclass].lower() for x in ETHERNET_PCI_CLASSES):
-                # hack for now
-                if inic[prevision].strip() == inic[pvendor].strip():
-                    # no revision info
-                    inic.append(inic[psvendor])
-                    inic[psvendor] = inic[prevision]
-                    inic[prevision] = "0"
-                elif len(inic) <= 6:  # one less entry, no revision
-                    LOG.debug("update psdevice length=%s" % len(inic))
-                    inic.append(inic[psvendor])
-
-                dirpcidev = '/sys/bus/pci/devices/'
-                physfn = dirpcidev + inic[pciaddr] + '/physfn'
-                if os.path.isdir(physfn):
+        for pciaddr, device in sorted(self.pci_scan().items()):
+            if any(x in device['pclass'].lower() for x in
+                   ETHERNET_PCI_CLASSES):
+                if device['is_vf']:
                     # Do not report VFs
                     continue
-                pci_inics.append(PCI(inic[pciaddr], inic[pclass],
-                                     inic[pvendor], inic[pdevice],
-                                     inic[prevision], inic[psvendor],
-                                     inic[psdevice]))
-
-        p.wait()
+                pci_inics.append(self._make_pci(device))
 
         return pci_inics
 
@@ -322,64 +492,34 @@ class PCIOperator(object):
         ''' For this pciaddr, build a list of device attributes '''
         pci_attrs_array = []
 
-        dirpcidev = '/sys/bus/pci/devices/'
-        pciaddrs = os.listdir(dirpcidev)
-
-        for a in pciaddrs:
-            if ((a == pciaddr) or (a == ("0000:" + pciaddr))):
-                LOG.debug("Found device pci bus: %s " % a)
-
-                dirpcideva = dirpcidev + a
-
-                numa_node = self.get_pci_numa_node(a)
-                sriov_totalvfs = self.get_pci_sriov_totalvfs(a)
-                sriov_numvfs = self.get_pci_sriov_numvfs(a)
-                sriov_vfs_pci_address = self.get_pci_sriov_vfs_pci_address(a, sriov_numvfs)
-                driver = self.get_pci_driver_name(a)
-
-                fclass = dirpcideva + '/class'
-                fvendor = dirpcideva + '/vendor'
-                fdevice = dirpcideva + '/device'
-                try:
-                    with open(fvendor, 'r') as f:
-                        pvendor_id = f.readline().strip('0x').strip()
-                except Exception:
-                    LOG.debug("ATTR vendor unknown for: %s " % a)
-                    pvendor_id = None
-
-                try:
-                    with open(fdevice, 'r') as f:
-                        pdevice_id = f.readline().replace('0x', '').strip()
-                except Exception:
-                    LOG.debug("ATTR device unknown for: %s " % a)
-                    pdevice_id = None
-
-                try:
-                    with open(fclass, 'r') as f:
-                        pclass_id = f.readline().replace('0x', '').strip()
-                except Exception:
-                    LOG.debug("ATTR class unknown for: %s " % a)
-                    pclass_id = None
-
-                name = "pci_" + a.replace(':', '_').replace('.', '_')
-
-                attrs = {
-                    "name": name,
-                    "pci_address": a,
-                    "pclass_id": pclass_id,
-                    "pvendor_id": pvendor_id,
-                    "pdevice_id": pdevice_id,
-                    "numa_node": numa_node,
-                    "sriov_totalvfs": sriov_totalvfs,
-                    "sriov_numvfs": sriov_numvfs,
-                    "sriov_vfs_pci_address":
-                        ','.join(str(x) for x in sriov_vfs_pci_address),
-                    "driver": driver,
-                    "enabled": self.pci_get_enabled_attr(pclass_id,
-                        pvendor_id, pdevice_id),
-                         }
-
-                pci_attrs_array.append(attrs)
+        device = self._find_device(pciaddr)
+        if device is not None:
+            a = device['pciaddr']
+            LOG.debug("Found device pci bus: %s " % a)
+
+            pclass_id = device['class_id'] or None
+            pvendor_id = device['vendor_id'] or None
+            pdevice_id = device['device_id'] or None
+
+            name = "pci_" + a.replace(':', '_').replace('.', '_')
+
+            attrs = {
+                "name": name,
+                "pci_address": a,
+                "pclass_id": pclass_id,
+                "pvendor_id": pvendor_id,
+                "pdevice_id": pdevice_id,
+                "numa_node": device['numa_node'],
+                "sriov_totalvfs": device['sriov_totalvfs'],
+                "sriov_numvfs": device['sriov_numvfs'],
+                "sriov_vfs_pci_address":
+                    ','.join(str(x) for x in device['sriov_vfs_pci_address']),
+                "driver": device['driver'],
+                "enabled": self.pci_get_enabled_attr(pclass_id,
+                    pvendor_id, pdevice_id),
+                     }
+
+            pci_attrs_array.append(attrs)
 
         return pci_attrs_array
 
@@ -424,11 +564,42 @@ class PCIOperator(object):
                 names.append(name)
         return names
 
+    def _get_dpdksupport(self, vendor, device):
+        """Return whether DPDK supports a NIC, queried once per NIC model."""
+        key = (vendor, device)
+        if key in self._dpdksupport:
+            return self._dpdksupport[key]
+
+        try:
+            with open(os.devnull, "w") as fnull:
+                subprocess.check_call(["query_pci_id", "-v " + str(vendor),
+                                       "-d " + str(device)],
+                                      stdout=fnull, stderr=fnull)
+                dpdksupport = True
+                LOG.debug("DPDK does support NIC "
+                          "(vendor: %s device: %s)",
+                          vendor, device)
+        except subprocess.CalledProcessError as e:
+            dpdksupport = False
+            if e.returncode == 1:
+                # NIC is not supprted
+                LOG.debug("DPDK does not support NIC "
+                          "(vendor: %s device: %s)",
+                          vendor, device)
+            else:
+                # command failed, default to DPDK support to False
+                LOG.info("Could not determine DPDK support for "
+                         "NIC (vendor %s device: %s), defaulting "
+                         "to False", vendor, device)
+                return dpdksupport
+        self._dpdksupport[key] = dpdksupport
+        return dpdksupport
+
     def pci_get_net_attrs(self, pciaddr):
         ''' For this pciaddr, build a list of network attributes per port '''
         pci_attrs_array = []
 
-        dirpcidev = '/sys/bus/pci/devices/'
+        dirpcidev = SYSFS_PCI_DEVICES
         pciaddrs = os.listdir(dirpcidev)
 
         for a in pciaddrs:
@@ -437,53 +608,19 @@ class PCIOperator(object):
                 # There may be more than 1 net device for this NIC.
                 LOG.debug("Found NIC pci bus: %s " % a)
 
-                dirpcideva = dirpcidev + a
+                device = self._current_scan().get(a)
+                if device is None:
+                    continue
 
-                numa_node = self.get_pci_numa_node(a)
-                sriov_totalvfs = self.get_pci_sriov_totalvfs(a)
-                sriov_numvfs = self.get_pci_sriov_numvfs(a)
-                sriov_vfs_pci_address = self.get_pci_sriov_vfs_pci_address(a, sriov_numvfs)
-                driver = self.get_pci_driver_name(a)
+                numa_node = device['numa_node']
+                sriov_totalvfs = device['sriov_totalvfs']
+                sriov_numvfs = device['sriov_numvfs']
+                sriov_vfs_pci_address = device['sriov_vfs_pci_address']
+                driver = device['driver']
 
                 # Determine DPDK support
-                dpdksupport = False
-                fvendor = dirpcideva + '/vendor'
-                fdevice = dirpcideva + '/device'
-                try:
-                    with open(fvendor, 'r') as f:
-                        vendor = f.readline().strip()
-                except Exception:
-                    LOG.debug("ATTR vendor unknown for: %s " % a)
-                    vendor = None
-
-                try:
-                    with open(fdevice, 'r') as f:
-                        device = f.readline().strip()
-                except Exception:
-                    LOG.debug("ATTR device unknown for: %s " % a)
-                    device = None
-
-                try:
-                    with open(os.devnull, "w") as fnull:
-                        subprocess.check_call(["query_pci_id", "-v " + str(vendor),
-                                               "-d " + str(device)],
-                                              stdout=fnull, stderr=fnull)
-                        dpdksupport = True
-                        LOG.debug("DPDK does support NIC "
-                                  "(vendor: %s device: %s)",
-                                  vendor, device)
-                except subprocess.CalledProcessError as e:
-                    dpdksupport = False
-                    if e.returncode == 1:
-                        # NIC is not supprted
-                        LOG.debug("DPDK does not support NIC "
-                                  "(vendor: %s device: %s)",
-                                  vendor, device)
-                    else:
-                        # command failed, default to DPDK support to False
-                        LOG.info("Could not determine DPDK support for "
-                                 "NIC (vendor %s device: %s), defaulting "
-                                 "to False", vendor, device)
+                dpdksupport = self._get_dpdksupport(
+                    '0x' + device['vendor_id'], '0x' + device['device_id'])
 
                 # determine the net directory for this device
                 dirpcinet = self.get_pci_net_directory(a)
@@ -14,6 +14,7 @@
 import json
 import subprocess
 import sys
+from sysinv.agent import lvm_report
 from sysinv.common import constants
 from sysinv.common import exception
 from sysinv.common import utils as cutils
@@ -33,89 +34,63 @@ class PVOperator(object):
         LOG.error("%s @ %s:%s" % (e, traceback.tb_frame.f_code.co_filename,
                                   traceback.tb_lineno))
 
-    def ipv_get(self, cinder_device=None):
+    def ipv_get(self, cinder_device=None, report=None):
         '''Enumerate physical volume topology based on:
 
         :param self
         :param cinder_device: by-path of cinder device
+        :param report: LVMReport snapshot, collected if not provided
         :returns list of physical volumes and attributes
         '''
         ipv = []
 
-        # keys: matching the field order of pvdisplay command
-        string_keys = ['lvm_pv_name', 'lvm_vg_name', 'lvm_pv_uuid',
-                       'lvm_pv_size', 'lvm_pe_total', 'lvm_pe_alloced']
+        # keys: matching the pv fields of the lvm report
+        key_map = [('lvm_pv_name', 'pv_name'),
+                   ('lvm_pv_uuid', 'pv_uuid'),
+                   ('lvm_pv_size', 'pv_size'),
+                   ('lvm_pe_total', 'pv_pe_count'),
+                   ('lvm_pe_alloced', 'pv_pe_alloc_count')]
 
         # keys that need to be translated into ints
         int_keys = ['lvm_pv_size', 'lvm_pe_total', 'lvm_pe_alloced']
 
-        # pvdisplay command to retrieve the pv data of all pvs present
-        pvdisplay_command = 'pvdisplay -C --separator=";" -o pv_name,vg_name,pv_uuid'\
-                            ',pv_size,pv_pe_count,pv_pe_alloc_count'\
-                            ' --units B --nosuffix --noheadings'
+        if report is None:
+            report = lvm_report.LVMReport.collect(cinder_device)
 
-        # Execute the command
-        try:
-            pvdisplay_process = subprocess.Popen(pvdisplay_command,
-                                             stdout=subprocess.PIPE,
-                                             shell=True)
-            pvdisplay_output = pvdisplay_process.stdout.read()
-        except Exception as e:
-            self.handle_exception("Could not retrieve pvdisplay "
-                                  "information: %s" % e)
-            pvdisplay_output = ""
-
-        # Cinder devices are hidden by global_filter on standby controller,
-        # list them separately.
-        if cinder_device:
-            new_global_filer = ' --config \'devices/global_filter=["a|' + \
-                               cinder_device + '|","r|.*|"]\''
-            pvdisplay_process = pvdisplay_command + new_global_filer
-
-            try:
-                pvdisplay_process = subprocess.Popen(pvdisplay_process,
-                                                     stdout=subprocess.PIPE,
-                                                     shell=True)
-                pvdisplay_output = pvdisplay_output + pvdisplay_process.stdout.read()
-            except Exception as e:
-                self.handle_exception("Could not retrieve vgdisplay "
-                                      "information: %s" % e)
-
-        # parse the output 1 pv/row
-        rows = [row for row in pvdisplay_output.split('\n') if row.strip()]
-        for row in rows:
-            if "unknown device" in row:
+        for vg_name, pv in report.physical_volumes():
+            pv_name = pv.get('pv_name', '')
+            if pv_name in ('unknown device', '[unknown]'):
                 # Found a previously known pv that is now missing
                 # This happens when a disk is physically removed without
                 # being removed from the volume group first
                 # Since the disk is gone we need to forcefully cleanup
                 # the volume group
-                try:
-                    values = row.split(';')
-                    values = [v.strip() for v in values]
-
-                    vgreduce_command = 'vgreduce --removemissing %s' % values[2]
-                    subprocess.Popen(vgreduce_command,
-                                     stdout=subprocess.PIPE,
-                                     shell=True)
-                except Exception as e:
-                    self.handle_exception("Could not execute vgreduce: %s" % e)
+                if vg_name:
+                    try:
+                        vgreduce_command = 'vgreduce --removemissing %s' % \
+                                           vg_name
+                        subprocess.Popen(vgreduce_command,
+                                         stdout=subprocess.PIPE,
+                                         shell=True)
+                    except Exception as e:
+                        self.handle_exception("Could not execute "
+                                              "vgreduce: %s" % e)
                 continue
 
-            # get the values of fields as strings
-            values = row.split(';')
-            values = [v.strip() for v in values]
-
             # create the dict of attributes
-            attr = dict(zip(string_keys, values))
+            attr = dict((k, pv.get(f, '').strip()) for k, f in key_map)
+            attr['lvm_vg_name'] = vg_name
 
             # convert required values from strings to ints
-            for k in int_keys:
-                if k in attr.keys():
+            try:
+                for k in int_keys:
                     attr[k] = int(attr[k])
+            except ValueError:
+                LOG.warn("Skipping pv with invalid attributes: %s" % pv)
+                continue
 
             # Make sure we have attributes and ignore orphaned PVs
-            if attr and attr['lvm_vg_name']:
+            if attr['lvm_vg_name']:
                 # the lvm_pv_name for cinder volumes is always /dev/drbd4
                 if attr['lvm_vg_name'] == constants.LVG_CINDER_VOLUMES:
                     attr['lvm_pv_name'] = constants.CINDER_DRBD_DEVICE
@@ -0,0 +1,68 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# All Rights Reserved.
+#
+
+""" inventory udev event monitor."""
+
+import abc
+import eventlet
+import pyudev
+import six
+
+from eventlet import hubs
+
+from sysinv.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+
+@six.add_metaclass(abc.ABCMeta)
+class UdevMonitor(object):
+    '''Dispatch the kernel uevents of a device subsystem'''
+
+    subsystem = None
+
+    def __init__(self):
+        self._monitor = None
+        self._thread = None
+
+    def start(self):
+        """Subscribe to the kernel uevents of the subsystem."""
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by(self.subsystem)
+        monitor.enable_receiving()
+        self._monitor = monitor
+        self._thread = eventlet.spawn(self._run)
+        LOG.info("%s device monitor started" % self.subsystem)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.kill()
+            self._thread = None
+        self._monitor = None
+
+    def _run(self):
+        # The select module is monkey patched so wait on the netlink socket
+        # with the eventlet hub rather than pyudev's own poll loop.
+        while self._monitor is not None:
+            try:
+                hubs.trampoline(self._monitor.fileno(), read=True)
+                device = self._monitor.poll(timeout=0)
+                if device is not None:
+                    self._device_event(device.action, device)
+            except Exception as e:
+                LOG.exception("%s device monitor error: %s" %
+                              (self.subsystem, e))
+                eventlet.sleep(1)
+
+    @abc.abstractmethod
+    def _device_event(self, action, device):
+        """Handle a uevent of a device of the subsystem."""
@@ -32,7 +32,20 @@ API_SERVICE_OPTS = [
         cfg.IntOpt('api_limit_max',
                    default=2000,
                    help='the maximum number of items returned in a single '
-                        'response from a collection resource')
+                        'response from a collection resource'),
+        cfg.BoolOpt('sysinv_api_resource_locking',
+                    default=False,
+                    help='Serialize the write requests per resource '
+                         'they modify'),
+        cfg.IntOpt('sysinv_api_resource_lock_timeout',
+                   default=60,
+                   help='Seconds a write request waits for the locks of '
+                        'its resources before failing with a conflict'),
+        cfg.BoolOpt('sysinv_api_conditional_get',
+                    default=True,
+                    help='Return an ETag with the hosts, interfaces and '
+                         'labels and honour If-None-Match on their GET '
+                         'requests')
 ]
 
 CONF = cfg.CONF
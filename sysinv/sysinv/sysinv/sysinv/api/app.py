@@ -45,11 +45,11 @@ def setup_app(pecan_config=None, extra_hooks=None):
     policy.init()
 
     #            hooks.DBTransactionHook(),
-    #            hooks.MutexTransactionHook(),
     app_hooks = [hooks.ConfigHook(),
                  hooks.DBHook(),
                  hooks.ContextHook(pecan_config.app.acl_public_routes),
                  hooks.RPCHook(),
+                 hooks.SparseFieldsHook(),
                  hooks.AuditLogging()]
 
     if extra_hooks:
@@ -61,6 +61,16 @@ def setup_app(pecan_config=None, extra_hooks=None):
     if pecan_config.app.enable_acl:
         app_hooks.append(hooks.AdminAuthHook())
 
+    if CONF.sysinv_api_resource_locking:
+        app_hooks.append(hooks.ResourceLockHook(
+            timeout=CONF.sysinv_api_resource_lock_timeout))
+
+    if CONF.query_stats.enabled:
+        app_hooks.append(hooks.QueryStatsHook())
+
+    if CONF.sysinv_api_conditional_get:
+        app_hooks.append(hooks.ConditionalGetHook())
+
     pecan.configuration.set_config(dict(pecan_config), overwrite=True)
 
     app = pecan.make_app(
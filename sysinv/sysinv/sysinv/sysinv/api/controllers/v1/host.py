@@ -100,6 +100,31 @@ LOG = log.getLogger(__name__)
 KEYRING_BM_SERVICE = "BM"
 ERR_CODE_LOCK_SOLE_SERVICE_PROVIDER = "-1003"
 
+# The host sub-resource link fields and their paths
+HOST_RESOURCE_LINKS = [('iinterfaces', 'iinterfaces'),
+                       ('ports', 'ports'),
+                       ('ethernet_ports', 'ethernet_ports'),
+                       ('inodes', 'inodes'),
+                       ('icpus', 'icpus'),
+                       ('imemorys', 'imemorys'),
+                       ('istors', 'istors'),
+                       ('idisks', 'idisks'),
+                       ('partitions', 'partitions'),
+                       ('ceph_mon', 'ceph_mon'),
+                       ('ipvs', 'ipvs'),
+                       ('ilvgs', 'ilvgs'),
+                       ('isensors', 'isensors'),
+                       ('isensorgroups', 'isensorgroups'),
+                       ('pci_devices', 'pci_devices'),
+                       ('lldp_agents', 'lldp_agents'),
+                       ('lldp_neighbours', 'lldp_neighbors'),
+                       ('labels', 'labels')]
+
+# The host fields always loaded from the database when only some fields
+# are requested, since rendering a host depends on them
+HOST_REQUIRED_FIELDS = ['id', 'uuid', 'hostname', 'personality',
+                        'capabilities', 'peer_id']
+
 
 def _get_controller_address(hostname):
     return utils.lookup_static_ip_address(hostname,
@@ -552,7 +577,12 @@ class Host(base.APIBase):
         setattr(self, 'peers', kwargs.get('peers', None))
 
     @classmethod
-    def convert_with_links(cls, rpc_ihost, expand=True):
+    def convert_with_links(cls, rpc_ihost, expand=True, fields=None):
+        """Convert a host object to its API representation.
+
+        :param fields: if set, only these fields are rendered, as requested
+                       with the fields= query parameter.
+        """
         minimum_fields = ['id', 'uuid', 'hostname',
                           'personality', 'subfunctions',
                           'subfunction_oper', 'subfunction_avail',
@@ -571,234 +601,51 @@ class Host(base.APIBase):
                           'install_state', 'install_state_info',
                           'iscsi_initiator_name']
 
-        fields = minimum_fields if not expand else None
-        uhost = Host.from_rpc_object(rpc_ihost, fields)
-        uhost.links = [link.Link.make_link('self', pecan.request.host_url,
-                                           'ihosts', uhost.uuid),
-                       link.Link.make_link('bookmark',
-                                           pecan.request.host_url,
-                                           'ihosts', uhost.uuid,
-                                           bookmark=True)
-                       ]
-        if expand:
-            uhost.iinterfaces = [link.Link.make_link('self',
-                                                     pecan.request.host_url,
-                                                     'ihosts',
-                                                     uhost.uuid + "/iinterfaces"),
-                                 link.Link.make_link(
-                                     'bookmark',
-                                     pecan.request.host_url,
-                                     'ihosts',
-                                     uhost.uuid + "/iinterfaces",
-                                     bookmark=True)
-                                 ]
-            uhost.ports = [link.Link.make_link('self',
-                                               pecan.request.host_url,
-                                               'ihosts',
-                                               uhost.uuid + "/ports"),
-                           link.Link.make_link(
-                               'bookmark',
-                               pecan.request.host_url,
-                               'ihosts',
-                               uhost.uuid + "/ports",
-                               bookmark=True)
-                           ]
-            uhost.ethernet_ports = [link.Link.make_link('self',
-                                                        pecan.request.host_url,
-                                                        'ihosts',
-                                                        uhost.uuid + "/ethernet_ports"),
-                                    link.Link.make_link(
-                                        'bookmark',
-                                        pecan.request.host_url,
-                                        'ihosts',
-                                        uhost.uuid + "/ethernet_ports",
-                                        bookmark=True)
-                                    ]
-            uhost.inodes = [link.Link.make_link('self',
-                                                pecan.request.host_url,
-                                                'ihosts',
-                                                uhost.uuid + "/inodes"),
-                            link.Link.make_link(
-                                'bookmark',
-                                pecan.request.host_url,
-                                'ihosts',
-                                uhost.uuid + "/inodes",
-                                bookmark=True)
-                            ]
-            uhost.icpus = [link.Link.make_link('self',
-                                               pecan.request.host_url,
-                                               'ihosts',
-                                               uhost.uuid + "/icpus"),
-                           link.Link.make_link(
-                               'bookmark',
-                               pecan.request.host_url,
-                               'ihosts',
-                               uhost.uuid + "/icpus",
-                               bookmark=True)
-                           ]
+        sparse = fields is not None
+        if sparse:
+            # only the requested fields were loaded, build the host from
+            # those that are set rather than from as_dict()
+            uhost = Host(**dict((k, rpc_ihost[k]) for k in fields
+                                if k in rpc_ihost.fields and k in rpc_ihost))
+            uhost.unset_fields_except(fields)
+        else:
+            fields = minimum_fields if not expand else None
+            uhost = Host.from_rpc_object(rpc_ihost, fields)
 
-            uhost.imemorys = [link.Link.make_link('self',
-                                                  pecan.request.host_url,
-                                                  'ihosts',
-                                                  uhost.uuid + "/imemorys"),
-                              link.Link.make_link(
-                                  'bookmark',
-                                  pecan.request.host_url,
-                                  'ihosts',
-                                  uhost.uuid + "/imemorys",
-                                  bookmark=True)
-                              ]
-
-            uhost.istors = [link.Link.make_link('self',
-                                                pecan.request.host_url,
-                                                'ihosts',
-                                                uhost.uuid + "/istors"),
-                            link.Link.make_link(
-                                'bookmark',
-                                pecan.request.host_url,
-                                'ihosts',
-                                uhost.uuid + "/istors",
-                                bookmark=True)
-                            ]
-
-            uhost.idisks = [link.Link.make_link('self',
-                                                pecan.request.host_url,
-                                                'ihosts',
-                                                uhost.uuid + "/idisks"),
-                            link.Link.make_link(
-                                'bookmark',
-                                pecan.request.host_url,
-                                'ihosts',
-                                uhost.uuid + "/idisks",
-                                bookmark=True)
-                            ]
-
-            uhost.partitions = [link.Link.make_link('self',
-                                                    pecan.request.host_url,
-                                                    'ihosts',
-                                                    uhost.uuid + "/partitions"),
-                                link.Link.make_link(
-                                'bookmark',
-                                pecan.request.host_url,
-                                'ihosts',
-                                uhost.uuid + "/partitions",
-                                bookmark=True)
-                                ]
-
-            uhost.ceph_mon = [link.Link.make_link('self',
-                                                  pecan.request.host_url,
-                                                  'ihosts',
-                                                  uhost.uuid + "/ceph_mon"),
-                              link.Link.make_link(
-                                  'bookmark',
-                                  pecan.request.host_url,
-                                  'ihosts',
-                                  uhost.uuid + "/ceph_mon",
-                                  bookmark=True)
-                              ]
-
-            uhost.ipvs = [link.Link.make_link('self',
-                                              pecan.request.host_url,
-                                              'ihosts',
-                                              uhost.uuid + "/ipvs"),
-                          link.Link.make_link(
-                              'bookmark',
-                              pecan.request.host_url,
-                              'ihosts',
-                              uhost.uuid + "/ipvs",
-                              bookmark=True)
-                          ]
-
-            uhost.ilvgs = [link.Link.make_link('self',
+        if not sparse or 'links' in fields:
+            uhost.links = [link.Link.make_link('self', pecan.request.host_url,
+                                               'ihosts', rpc_ihost.uuid),
+                           link.Link.make_link('bookmark',
                                                pecan.request.host_url,
-                                               'ihosts',
-                                               uhost.uuid + "/ilvgs"),
-                           link.Link.make_link(
-                               'bookmark',
-                               pecan.request.host_url,
-                               'ihosts',
-                               uhost.uuid + "/ilvgs",
-                               bookmark=True)
+                                               'ihosts', rpc_ihost.uuid,
+                                               bookmark=True)
                            ]
+        for resource, path in HOST_RESOURCE_LINKS:
+            if (sparse and resource in fields) or (expand and not sparse):
+                url_arg = rpc_ihost.uuid + "/" + path
+                setattr(uhost, resource,
+                        [link.Link.make_link('self',
+                                             pecan.request.host_url,
+                                             'ihosts', url_arg),
+                         link.Link.make_link('bookmark',
+                                             pecan.request.host_url,
+                                             'ihosts', url_arg,
+                                             bookmark=True)
+                         ])
 
-            uhost.isensors = [link.Link.make_link('self',
-                                                  pecan.request.host_url,
-                                                  'ihosts',
-                                                  uhost.uuid + "/isensors"),
-                              link.Link.make_link('bookmark',
-                                                  pecan.request.host_url,
-                                                  'ihosts',
-                                                  uhost.uuid + "/isensors",
-                                                  bookmark=True)
-                              ]
-
-            uhost.isensorgroups = [link.Link.make_link('self',
-                                                       pecan.request.host_url,
-                                                       'ihosts',
-                                                       uhost.uuid + "/isensorgroups"),
-                                   link.Link.make_link('bookmark',
-                                                       pecan.request.host_url,
-                                                       'ihosts',
-                                                       uhost.uuid + "/isensorgroups",
-                                                       bookmark=True)
-                                   ]
-
-            uhost.pci_devices = [link.Link.make_link('self',
-                                                     pecan.request.host_url,
-                                                     'ihosts',
-                                                     uhost.uuid + "/pci_devices"),
-                                 link.Link.make_link('bookmark',
-                                                     pecan.request.host_url,
-                                                     'ihosts',
-                                                     uhost.uuid + "/pci_devices",
-                                                     bookmark=True)
-                                 ]
-
-            uhost.lldp_agents = [
-                link.Link.make_link('self',
-                                    pecan.request.host_url,
-                                    'ihosts',
-                                    uhost.uuid + "/lldp_agents"),
-                link.Link.make_link('bookmark',
-                                    pecan.request.host_url,
-                                    'ihosts',
-                                    uhost.uuid + "/lldp_agents",
-                                    bookmark=True)
-                                 ]
-
-            uhost.lldp_neighbours = [
-                link.Link.make_link('self',
-                                    pecan.request.host_url,
-                                    'ihosts',
-                                    uhost.uuid + "/lldp_neighbors"),
-                link.Link.make_link('bookmark',
-                                    pecan.request.host_url,
-                                    'ihosts',
-                                    uhost.uuid + "/lldp_neighbors",
-                                    bookmark=True)
-                                     ]
-
-            uhost.labels = [link.Link.make_link('self',
-                                                pecan.request.host_url,
-                                                'ihosts',
-                                                uhost.uuid + "/labels"),
-                            link.Link.make_link('bookmark',
-                                                pecan.request.host_url,
-                                                'ihosts',
-                                                uhost.uuid + "/labels",
-                                                bookmark=True)
-                            ]
         # Don't expose the vsc_controllers field if we are not configured with
         # the nuage_vrs vswitch or we are not a worker node.
-        vswitch_type = utils.get_vswitch_type()
-        if (vswitch_type != constants.VSWITCH_TYPE_NUAGE_VRS or
-                uhost.personality != constants.WORKER):
-            uhost.vsc_controllers = wtypes.Unset
-
-        uhost.peers = None
-        if uhost.peer_id:
-            ipeers = pecan.request.dbapi.peer_get(uhost.peer_id)
-            uhost.peers = {'name': ipeers.name, 'hosts': ipeers.hosts}
+        if not sparse or 'vsc_controllers' in fields:
+            vswitch_type = utils.get_vswitch_type()
+            if (vswitch_type != constants.VSWITCH_TYPE_NUAGE_VRS or
+                    rpc_ihost.personality != constants.WORKER):
+                uhost.vsc_controllers = wtypes.Unset
+
+        if not sparse or 'peers' in fields:
+            uhost.peers = None
+            if rpc_ihost.peer_id:
+                ipeers = pecan.request.dbapi.peer_get(rpc_ihost.peer_id)
+                uhost.peers = {'name': ipeers.name, 'hosts': ipeers.hosts}
 
         return uhost
 
@@ -814,10 +661,12 @@ class HostCollection(collection.Collection):
 
     @classmethod
     def convert_with_links(cls, ihosts, limit, url=None,
-                           expand=False, **kwargs):
+                           expand=False, fields=None, **kwargs):
         collection = HostCollection()
         collection.ihosts = [
-            Host.convert_with_links(n, expand) for n in ihosts]
+            Host.convert_with_links(n, expand, fields) for n in ihosts]
+        if fields is not None:
+            kwargs['fields'] = ','.join(sorted(fields))
         collection.next = collection.get_next(limit, url=url, **kwargs)
         return collection
 
@@ -1106,7 +955,7 @@ class HostController(rest.RestController):
         # self._name = 'api-host'
 
     def _ihosts_get(self, isystem_id, marker, limit, personality,
-                    sort_key, sort_dir):
+                    sort_key, sort_dir, fields=None):
         if self._from_isystem and not isystem_id:  # TODO: check uuid
             raise exception.InvalidParameterValue(_(
                 "System id not specified."))
@@ -1132,10 +981,13 @@ class HostController(rest.RestController):
                     sort_key=sort_key,
                     sort_dir=sort_dir)
             else:
+                if fields is not None:
+                    fields = list(set(fields) | set(HOST_REQUIRED_FIELDS))
                 ihosts = pecan.request.dbapi.ihost_get_list(
                     limit, marker_obj,
                     sort_key=sort_key,
-                    sort_dir=sort_dir)
+                    sort_dir=sort_dir,
+                    fields=fields)
 
         for h in ihosts:
             self._update_controller_personality(h)
@@ -1183,9 +1035,12 @@ class HostController(rest.RestController):
                 personality=None,
                 sort_key='id', sort_dir='asc'):
         """Retrieve a list of ihosts."""
+        fields = utils.get_sparse_fields()
         ihosts = self._ihosts_get(
-            isystem_id, marker, limit, personality, sort_key, sort_dir)
+            isystem_id, marker, limit, personality, sort_key, sort_dir,
+            fields)
         return HostCollection.convert_with_links(ihosts, limit,
+                                                 fields=fields,
                                                  sort_key=sort_key,
                                                  sort_dir=sort_dir)
 
@@ -1218,12 +1073,15 @@ class HostController(rest.RestController):
         if parent != "ihosts":
             raise exception.HTTPNotFound
 
+        fields = utils.get_sparse_fields()
         ihosts = self._ihosts_get(
-            isystem_id, marker, limit, personality, sort_key, sort_dir)
+            isystem_id, marker, limit, personality, sort_key, sort_dir,
+            fields)
         resource_url = '/'.join(['ihosts', 'detail'])
         return HostCollection.convert_with_links(ihosts, limit,
                                                  url=resource_url,
                                                  expand=True,
+                                                 fields=fields,
                                                  sort_key=sort_key,
                                                  sort_dir=sort_dir)
 
@@ -1237,7 +1095,8 @@ class HostController(rest.RestController):
                                              uuid)
         self._update_controller_personality(rpc_ihost)
 
-        return Host.convert_with_links(rpc_ihost)
+        return Host.convert_with_links(rpc_ihost,
+                                       fields=utils.get_sparse_fields())
 
     def _block_add_host_semantic_checks(self, ihost_dict):
 
@@ -69,6 +69,14 @@ def validate_sort_dir(sort_dir):
     return sort_dir
 
 
+def get_sparse_fields():
+    """Returns the fields requested with the fields= query parameter.
+
+    None is returned if the whole resources were requested.
+    """
+    return getattr(pecan.request, 'sparse_fields', None)
+
+
 def validate_patch(patch):
     """Performs a basic validation on patch."""
 
@@ -19,6 +19,8 @@
 # Copyright (c) 2013-2018 Wind River Systems, Inc.
 #
 
+import hashlib
+import socket
 import time
 from six.moves.urllib.parse import urlparse
 import webob
@@ -28,6 +30,9 @@ from oslo_serialization import jsonutils
 from pecan import hooks
 
 from sysinv.common import context
+from sysinv.common import exception
+from sysinv.common import profiler
+from sysinv.common import resource_lock
 from sysinv.common import utils
 from sysinv.conductor import rpcapi
 from sysinv.db import api as dbapi
@@ -36,7 +41,6 @@ from webob import exc
 
 from sysinv.openstack.common import log
 from sysinv.openstack.common.gettextutils import _
-import eventlet.semaphore
 
 import re
 
@@ -185,45 +189,233 @@ class NoExceptionTracebackHook(hooks.PecanHook):
             state.response.json = json_body
 
 
-class MutexTransactionHook(hooks.TransactionHook):
-    """Custom hook for SysInv transactions.
-       Until transaction based database is enabled, this allows setting mutex
-       on sysinv REST API update operations.
+class ResourceLockHook(hooks.PecanHook):
+    """Serialize the write requests per resource they modify.
+
+    The resource is the collection and uuid at the start of the request
+    path, e.g. a PATCH of /v1/ihosts/<uuid>/... locks the host, along with
+    the host referenced by the ihost_uuid or host_uuid of the request body.
+    A request on a resource of a host, e.g. /v1/iinterfaces/<uuid>, also
+    locks the host that owns it.  Unlike the process wide semaphore this
+    replaces, requests on unrelated resources proceed concurrently.
     """
 
-    SYSINV_API_SEMAPHORE_TIMEOUT = 30
+    read_methods = ['GET', 'HEAD']
+    host_fields = ['ihost_uuid', 'host_uuid']
+
+    # collections of host resources, with the dbapi method that looks up a
+    # resource and the field of the resource holding the uuid of its host
+    host_resources = {
+        'icpus': ('icpu_get', 'ihost_uuid'),
+        'imemorys': ('imemory_get', 'ihost_uuid'),
+        'iinterfaces': ('iinterface_get', 'ihost_uuid'),
+        'ports': ('port_get', 'host_uuid'),
+        'ethernet_ports': ('ethernet_port_get', 'host_uuid'),
+        'istors': ('istor_get', 'ihost_uuid'),
+        'ilvgs': ('ilvg_get', 'ihost_uuid'),
+        'ipvs': ('ipv_get', 'ihost_uuid'),
+        'idisks': ('idisk_get', 'ihost_uuid'),
+        'partitions': ('partition_get', 'ihost_uuid'),
+        'isensors': ('isensor_get', 'host_uuid'),
+        'isensorgroups': ('isensorgroup_get', 'host_uuid'),
+        'pci_devices': ('pci_device_get', 'host_uuid'),
+        'labels': ('label_get', 'host_uuid'),
+    }
+
+    def __init__(self, timeout=None):
+        self.lock_manager = resource_lock.ResourceLockManager(
+            timeout=timeout)
+
+    @classmethod
+    def request_resources(cls, request):
+        path = [p for p in request.path.split('/') if p]
+        if path and path[0] == 'v1':
+            path = path[1:]
+        if not path:
+            return []
+
+        resource_id = None
+        if len(path) > 1 and utils.is_uuid_like(path[1]):
+            resource_id = path[1]
+        resources = [(path[0], resource_id)]
+
+        host_uuid = cls._resource_host_uuid(request, path[0], resource_id)
+        if host_uuid:
+            resources.append(('ihosts', host_uuid))
 
-    def __init__(self):
-        super(MutexTransactionHook, self).__init__(
-            start=self.lock,
-            start_ro=self.start_ro,
-            commit=self.unlock,
-            rollback=self.unlock,
-            clear=self.clear)
-
-        self._sysinv_semaphore = eventlet.semaphore.Semaphore(1)
-        LOG.info("_sysinv_semaphore %s" % self._sysinv_semaphore)
-
-    def lock(self):
-        if not self._sysinv_semaphore.acquire(
-           timeout=self.SYSINV_API_SEMAPHORE_TIMEOUT):
-            LOG.warn("WAIT Time initial expire SYSINV sema %s" %
-                     self.SYSINV_API_SEMAPHORE_TIMEOUT)
-            if not self._sysinv_semaphore.acquire(
-               timeout=self.SYSINV_API_SEMAPHORE_TIMEOUT):
-                LOG.error("WAIT Time expired SYSINV sema %s" %
-                          self.SYSINV_API_SEMAPHORE_TIMEOUT)
-                raise exc.HTTPConflict()
-
-    def start_ro(self):
-        return
+        try:
+            body = request.json
+        except Exception:
+            body = None
+        if isinstance(body, dict):
+            for field in cls.host_fields:
+                if utils.is_uuid_like(body.get(field)):
+                    resources.append(('ihosts', body[field]))
+        return resources
+
+    @classmethod
+    def _resource_host_uuid(cls, request, collection, resource_id):
+        """Return the uuid of the host owning a resource, if any."""
+        if resource_id is None or collection not in cls.host_resources:
+            return None
+        request_dbapi = getattr(request, 'dbapi', None)
+        if request_dbapi is None:
+            return None
+
+        method, field = cls.host_resources[collection]
+        try:
+            resource = getattr(request_dbapi, method)(resource_id)
+        except exception.SysinvException:
+            # the controller reports the missing resource
+            return None
+        return getattr(resource, field, None)
 
-    def unlock(self):
-        self._sysinv_semaphore.release()
-        LOG.debug("unlock SYSINV sema %s" % self._sysinv_semaphore)
+    def before(self, state):
+        if state.request.method in self.read_methods:
+            return
+        resources = self.request_resources(state.request)
+        try:
+            state.request.resource_locks = \
+                self.lock_manager.acquire(resources)
+        except exception.ResourceLockTimeout as e:
+            LOG.error(str(e))
+            raise exc.HTTPConflict(explanation=str(e))
 
-    def clear(self):
-        return
+    def after(self, state):
+        held = getattr(state.request, 'resource_locks', None)
+        if held:
+            state.request.resource_locks = None
+            self.lock_manager.release(held)
+
+    def on_error(self, state, e):
+        self.after(state)
+
+
+class SparseFieldsHook(hooks.PecanHook):
+    """Restrict GET responses to the fields of the fields= query parameter.
+
+    The parameter, a comma separated list of field names, is taken out of
+    the query string before the request is routed, so that every collection
+    and show endpoint accepts it.  The requested fields are left in
+    pecan.request.sparse_fields for the controllers that avoid loading and
+    rendering the other fields; the response is filtered in any case.
+    The uuid of each object is always returned.
+    """
+
+    always_fields = ['uuid']
+
+    def on_route(self, state):
+        request = state.request
+        request.sparse_fields = None
+        if request.method != 'GET' or 'fields' not in request.GET:
+            return
+
+        fields = set(self.always_fields)
+        for value in request.GET.getall('fields'):
+            fields.update(f.strip() for f in value.split(',') if f.strip())
+        request.sparse_fields = fields
+
+        query = request.environ.get('QUERY_STRING', '').split('&')
+        request.environ['QUERY_STRING'] = '&'.join(
+            q for q in query if q.split('=', 1)[0] != 'fields')
+
+    @staticmethod
+    def _filter(obj, fields):
+        if not isinstance(obj, dict):
+            return obj
+        return dict((k, v) for k, v in obj.items() if k in fields)
+
+    def after(self, state):
+        fields = getattr(state.request, 'sparse_fields', None)
+        if (not fields or state.response.status_int != 200 or
+                state.response.content_type != 'application/json'):
+            return
+
+        body = state.response.json
+        if not isinstance(body, dict):
+            return
+        lists = [k for k, v in body.items() if isinstance(v, list)]
+        if len(lists) == 1 and set(body) <= set(lists + ['next']):
+            # a collection, e.g. {"ihosts": [...], "next": ...}
+            body[lists[0]] = [self._filter(obj, fields)
+                              for obj in body[lists[0]]]
+        else:
+            body = self._filter(body, fields)
+        state.response.json = body
+
+
+class ConditionalGetHook(hooks.PecanHook):
+    """Add an ETag to the GET responses of polled resources.
+
+    The ETag is computed from the request and the state of the tables the
+    resource is built from, i.e. their change counters, row counts and
+    latest timestamps, without loading the resources.  A GET whose
+    If-None-Match matches the current ETag is answered with 304 Not
+    Modified before the controller runs.  The ETag is computed before the
+    resources are read, so a concurrent change can only cause an extra
+    full response on the next request.
+    """
+
+    _uuid = '[0-9a-fA-F-]{36}'
+
+    host_tables = ['i_host', 'host_upgrade', 'peers']
+    interface_tables = ['interfaces', 'interface_networks',
+                        'interface_datanetworks', 'address_modes']
+    label_tables = ['label']
+
+    resources = [
+        (re.compile(r'^/v1/ihosts(/detail|/%s)?/?$' % _uuid), host_tables),
+        (re.compile(r'^/v1/ihosts/%s/iinterfaces(/detail)?/?$' % _uuid),
+         interface_tables),
+        (re.compile(r'^/v1/iinterfaces(/detail|/%s)?/?$' % _uuid),
+         interface_tables),
+        (re.compile(r'^/v1/ihosts/%s/labels/?$' % _uuid), label_tables),
+        (re.compile(r'^/v1/labels(/detail|/%s)?/?$' % _uuid), label_tables),
+    ]
+
+    @classmethod
+    def request_tables(cls, request):
+        for pattern, tables in cls.resources:
+            if pattern.match(request.path):
+                return tables
+        return None
+
+    @staticmethod
+    def compute_etag(request, table_state):
+        fields = getattr(request, 'sparse_fields', None)
+        key = repr((request.path,
+                    request.environ.get('QUERY_STRING', ''),
+                    sorted(fields) if fields else None,
+                    # the active controller is reported by the host API
+                    socket.gethostname(),
+                    table_state))
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def before(self, state):
+        request = state.request
+        request.etag = None
+        if request.method != 'GET':
+            return
+        tables = self.request_tables(request)
+        if not tables:
+            return
+
+        request.etag = self.compute_etag(
+            request, request.dbapi.table_state_get(tables))
+        if request.etag in request.if_none_match:
+            raise exc.HTTPNotModified()
+
+    def after(self, state):
+        etag = getattr(state.request, 'etag', None)
+        if etag and state.response.status_int == 200:
+            state.response.etag = etag
+
+    def on_error(self, state, e):
+        if isinstance(e, exc.HTTPNotModified):
+            # answer without the error body added by pecan
+            response = webob.Response(status=304)
+            response.etag = state.request.etag
+            return response
 
 
 class AuditLogging(hooks.PecanHook):
@@ -432,3 +624,21 @@ class DBTransactionHook(hooks.PecanHook):
             session = state.request.context.session
             session.remove()
         return
+
+
+class QueryStatsHook(hooks.PecanHook):
+    """Record the SQL statements issued by each request.
+
+    Requests exceeding the [query_stats] thresholds are logged along with
+    their repeated statements.
+    """
+
+    def before(self, state):
+        name = "%s %s" % (state.request.method, state.request.path)
+        state.request.query_stats = profiler.query_stats_start(name)
+
+    def after(self, state):
+        stats = getattr(state.request, 'query_stats', None)
+        if stats is not None:
+            state.request.query_stats = None
+            profiler.query_stats_stop(stats)
@@ -9,6 +9,7 @@
 System Inventory Helm Utility.
 """
 
+import json
 import sys
 
 from oslo_config import cfg
@@ -20,23 +21,38 @@ from sysinv.helm import helm
 CONF = cfg.CONF
 
 
+def _create_operator(dbapi, path):
+    operator = helm.HelmOperator(dbapi=dbapi, path=path)
+    if CONF.profile:
+        operator.profiler.enable()
+    return operator
+
+
+def _report_profile(operator):
+    if CONF.profile:
+        print(json.dumps(operator.profiler.report(), indent=2))
+
+
 def create_app_overrides_action(path, app_name=None, namespace=None):
     dbapi = api.get_instance()
-    operator = helm.HelmOperator(dbapi=dbapi, path=path)
+    operator = _create_operator(dbapi, path)
     operator.generate_helm_application_overrides(app_name, namespace)
+    _report_profile(operator)
 
 
 def create_armada_app_overrides_action(path, app_name=None, namespace=None):
     dbapi = api.get_instance()
-    operator = helm.HelmOperator(dbapi=dbapi, path=path)
+    operator = _create_operator(dbapi, path)
     operator.generate_helm_application_overrides(app_name, namespace,
                                                  armada_format=True)
+    _report_profile(operator)
 
 
 def create_chart_override_action(path, chart_name=None, namespace=None):
     dbapi = api.get_instance()
-    operator = helm.HelmOperator(dbapi=dbapi, path=path)
+    operator = _create_operator(dbapi, path)
     operator.generate_helm_chart_overrides(chart_name, namespace)
+    _report_profile(operator)
 
 
 def add_action_parsers(subparsers):
@@ -59,6 +75,11 @@ def add_action_parsers(subparsers):
     parser.add_argument('namespace', nargs='?')
 
 
+CONF.register_cli_opt(
+    cfg.BoolOpt('profile',
+                default=False,
+                help='Report the time and DB queries spent in each chart'))
+
 CONF.register_cli_opt(
     cfg.SubCommandOpt('action',
                       title='actions',
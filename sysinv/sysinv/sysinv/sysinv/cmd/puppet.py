@@ -10,6 +10,7 @@
 System Inventory Puppet Utility.
 """
 
+import json
 import sys
 
 from oslo_config import cfg
@@ -21,30 +22,44 @@ from sysinv.puppet import puppet
 CONF = cfg.CONF
 
 
+def _create_operator(dbapi=None, path=None):
+    operator = puppet.PuppetOperator(dbapi=dbapi, path=path)
+    if CONF.profile:
+        operator.profiler.enable()
+    return operator
+
+
+def _report_profile(operator):
+    if CONF.profile:
+        print(json.dumps(operator.profiler.report(), indent=2))
+
+
 def create_static_config_action(path):
-    operator = puppet.PuppetOperator(path=path)
+    operator = _create_operator(path=path)
     operator.create_static_config()
     operator.create_secure_config()
+    _report_profile(operator)
 
 
 def create_system_config_action(path):
     dbapi = api.get_instance()
-    operator = puppet.PuppetOperator(dbapi=dbapi, path=path)
+    operator = _create_operator(dbapi=dbapi, path=path)
     operator.update_system_config()
     operator.update_secure_system_config()
+    _report_profile(operator)
 
 
 def create_host_config_action(path, hostname=None):
     dbapi = api.get_instance()
-    operator = puppet.PuppetOperator(dbapi=dbapi, path=path)
+    operator = _create_operator(dbapi=dbapi, path=path)
 
     if hostname:
         host = dbapi.ihost_get_by_hostname(hostname)
         operator.update_host_config(host)
     else:
         hosts = dbapi.ihost_get_list()
-        for host in hosts:
-            operator.update_host_config(host)
+        operator.update_hosts_config(hosts)
+    _report_profile(operator)
 
 
 def add_action_parsers(subparsers):
@@ -62,6 +77,11 @@ def add_action_parsers(subparsers):
     parser.add_argument('hostname', nargs='?')
 
 
+CONF.register_cli_opt(
+    cfg.BoolOpt('profile',
+                default=False,
+                help='Report the time and DB queries spent in each plugin'))
+
 CONF.register_cli_opt(
     cfg.SubCommandOpt('action',
                       title='actions',
@@ -1535,3 +1535,6 @@ DEFAULT_DNS_SERVICE_IP = '10.96.0.10'
 
 # Ansible bootstrap
 ANSIBLE_BOOTSTRAP_FLAG = os.path.join(tsc.VOLATILE_PATH, ".ansible_bootstrap")
+
+# Config generation counters
+CONFIG_GENERATION_SYSTEM = 'system'
@@ -146,6 +146,10 @@ class Conflict(SysinvException):
     code = 409
 
 
+class ResourceLockTimeout(Conflict):
+    message = _("Timed out waiting for the lock of %(resource)s.")
+
+
 class CephFailure(SysinvException):
     message = _("Ceph failure: %(reason)s")
     code = 408
@@ -1298,6 +1302,10 @@ class InvalidHelmNamespace(Invalid):
     message = _("Invalid helm overrides namespace (%(namespace)s) for chart %(chart)s.")
 
 
+class InvalidHelmOverrides(Invalid):
+    message = _("Invalid helm overrides: %(reason)s")
+
+
 class LocalManagementPersonalityNotFound(NotFound):
     message = _("Local management personality is None: "
                 "config_uuid=%(config_uuid)s, config_dict=%(config_dict)s, "
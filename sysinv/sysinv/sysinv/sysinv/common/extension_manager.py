@@ -19,6 +19,10 @@
 Base class for plugin loader.
 """
 
+import pkg_resources
+import time
+
+from six.moves import collections_abc
 from stevedore import enabled
 
 from sysinv.openstack.common import log
@@ -69,3 +73,103 @@ class ActivatedExtensionManager(enabled.EnabledExtensionManager):
             invoke_args=invoke_args,
             invoke_kwds=invoke_kwds,
         )
+
+
+class LazyExtension(object):
+    """An extension that is only imported and invoked on first use."""
+
+    def __init__(self, entry_point, invoke_args=(), invoke_kwds={}):
+        self.name = entry_point.name
+        self.entry_point = entry_point
+        self.invoke_args = invoke_args
+        self.invoke_kwds = invoke_kwds
+        self._plugin = None
+        self._obj = None
+        self.failed = False
+
+    @property
+    def module_name(self):
+        return self.entry_point.module_name
+
+    @property
+    def plugin(self):
+        if self._plugin is None:
+            self._plugin = self.entry_point.resolve()
+        return self._plugin
+
+    @property
+    def obj(self):
+        """The plugin object, or None if the plugin could not be loaded."""
+        if self._obj is None and not self.failed:
+            start = time.time()
+            try:
+                self._obj = self.plugin(*self.invoke_args, **self.invoke_kwds)
+            except Exception as e:
+                # skip the plugin, as the stevedore extension managers do
+                LOG.warning("Could not load plugin %s: %s" % (self.name, e))
+                self.failed = True
+                return None
+            LOG.debug("Loaded plugin %s in %.3f secs" %
+                      (self.name, time.time() - start))
+        return self._obj
+
+    @property
+    def loaded(self):
+        return self._obj is not None
+
+
+class LazyExtensionManager(object):
+    """Enumerates the extensions of a namespace without importing them.
+
+    Unlike the stevedore ExtensionManager, the plugins are only imported
+    and instantiated when the obj of an extension is first accessed. The
+    extensions are sorted by name. A plugin that fails to load is logged
+    and its obj is None.
+    """
+
+    def __init__(self, namespace, invoke_args=(), invoke_kwds={}):
+        self.namespace = namespace
+        self.extensions = sorted(
+            [LazyExtension(entry_point, invoke_args, invoke_kwds)
+             for entry_point in pkg_resources.iter_entry_points(namespace)],
+            key=lambda x: x.name)
+
+    def names(self):
+        return [e.name for e in self.extensions]
+
+    def __iter__(self):
+        return iter(self.extensions)
+
+    def __len__(self):
+        return len(self.extensions)
+
+
+class LazyPluginMap(collections_abc.MutableMapping):
+    """A mapping of names to lazy extensions which yields the plugin objects.
+
+    The plugin of an extension is only loaded when its name is looked up,
+    iteration over the names does not load anything. A plugin that fails to
+    load is removed from the mapping.
+    """
+
+    def __init__(self):
+        self._extensions = {}
+
+    def __getitem__(self, name):
+        obj = self._extensions[name].obj
+        if obj is None:
+            del self._extensions[name]
+            raise KeyError(name)
+        return obj
+
+    def __setitem__(self, name, extension):
+        self._extensions[name] = extension
+
+    def __delitem__(self, name):
+        del self._extensions[name]
+
+    def __iter__(self):
+        return iter(self._extensions)
+
+    def __len__(self):
+        return len(self._extensions)
@@ -0,0 +1,98 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" System Inventory delta reports of host inventory.
+
+The agent reports each inventory category as a list of records. Once the
+conductor has applied a report, the next one only carries the records that
+changed along with the digest of the previous report it is based on. The
+conductor rebuilds the full list from the records of the previous report
+and checks it against the digest of the new one; any mismatch requires
+the agent to send a full report instead.
+"""
+
+import hashlib
+import json
+import six
+
+CATEGORY_DISK = 'disk'
+CATEGORY_PARTITION = 'partition'
+CATEGORY_PV = 'pv'
+CATEGORY_LVG = 'lvg'
+CATEGORY_MEMORY = 'memory'
+CATEGORY_LLDP_AGENT = 'lldp_agent'
+CATEGORY_LLDP_NEIGHBOUR = 'lldp_neighbour'
+
+# The record fields identifying a record within its category
+RECORD_KEYS = {
+    CATEGORY_DISK: ['device_path', 'device_node'],
+    CATEGORY_PARTITION: ['device_path'],
+    CATEGORY_PV: ['lvm_pv_name'],
+    CATEGORY_LVG: ['lvm_vg_name'],
+    CATEGORY_MEMORY: ['numa_node'],
+    CATEGORY_LLDP_AGENT: ['name_or_uuid'],
+    CATEGORY_LLDP_NEIGHBOUR: ['name_or_uuid', 'msap'],
+}
+
+
+def digest(records):
+    """Return the digest of the content of a list of records"""
+    content = json.dumps(records, sort_keys=True, default=str)
+    if isinstance(content, six.text_type):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def record_key(category, record):
+    return json.dumps([record.get(k) for k in RECORD_KEYS[category]],
+                      default=str)
+
+
+def full_report(records):
+    return {'digest': digest(records),
+            'base_digest': None,
+            'records': records}
+
+
+def delta_report(category, base_records, base_digest, records):
+    """Return the report of the records changed since the base records.
+
+    :returns: the delta report, or None if the records cannot be reported
+              as a delta and a full report is required
+    """
+    keys = [record_key(category, r) for r in records]
+    if len(set(keys)) != len(keys):
+        return None
+
+    base = dict((record_key(category, r), r) for r in base_records)
+    changed = [r for k, r in zip(keys, records) if base.get(k) != r]
+    return {'digest': digest(records),
+            'base_digest': base_digest,
+            'keys': keys,
+            'changed': changed}
+
+
+def apply_report(category, base_records, base_digest, report):
+    """Return the full list of records of a report.
+
+    :returns: the records, or None if the report does not apply to the
+              base records and a full report is required
+    """
+    if report.get('base_digest') is None:
+        records = report['records']
+    elif report['base_digest'] != base_digest:
+        return None
+    else:
+        by_key = dict((record_key(category, r), r) for r in base_records)
+        by_key.update((record_key(category, r), r) for r in report['changed'])
+        try:
+            records = [by_key[k] for k in report['keys']]
+        except KeyError:
+            return None
+
+    if digest(records) != report['digest']:
+        return None
+    return records
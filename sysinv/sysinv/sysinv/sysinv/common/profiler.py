@@ -0,0 +1,179 @@
+#
+# Copyright (c) 2018 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" System Inventory plugin profiling."""
+
+import contextlib
+import json
+import time
+
+from oslo_config import cfg
+
+from sysinv.db.sqlalchemy import api as db_api
+from sysinv.openstack.common import log as logging
+from sysinv.openstack.common.rpc import dispatcher as rpc_dispatcher
+
+
+LOG = logging.getLogger(__name__)
+
+query_stats_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Record the SQL statements issued by each API request '
+                     'and conductor RPC method'),
+    cfg.IntOpt('statement_threshold',
+               default=100,
+               help='Log the requests issuing at least this many SQL '
+                    'statements'),
+    cfg.FloatOpt('time_threshold',
+                 default=1.0,
+                 help='Log the requests spending at least this many seconds '
+                      'in SQL statements'),
+    cfg.IntOpt('repeat_threshold',
+               default=10,
+               help='Flag the SQL statements repeated at least this many '
+                    'times within a request as N+1 query candidates'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(query_stats_opts, group='query_stats')
+
+
+class PluginProfiler(object):
+    """Record the wall time and DB query count of each plugin call"""
+
+    def __init__(self, name, enabled=False):
+        self.name = name
+        self.enabled = False
+        self.records = []
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        db_api.enable_query_count()
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def measure(self, method, plugin):
+        if not self.enabled:
+            yield
+            return
+
+        queries = db_api.get_query_count()
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.records.append((method, plugin,
+                                 time.time() - start,
+                                 db_api.get_query_count() - queries))
+
+    def summary(self):
+        """Aggregate the records per method and plugin, slowest first"""
+        entries = {}
+        for method, plugin, elapsed, queries in self.records:
+            entry = entries.setdefault((method, plugin), {
+                'method': method,
+                'plugin': plugin,
+                'calls': 0,
+                'time': 0.0,
+                'queries': 0,
+            })
+            entry['calls'] += 1
+            entry['time'] += elapsed
+            entry['queries'] += queries
+        return sorted(entries.values(), key=lambda e: e['time'], reverse=True)
+
+    def report(self):
+        """Log the profile as a single structured line and reset it"""
+        summary = self.summary()
+        LOG.info("%s plugin profile: %s" %
+                 (self.name, json.dumps(summary, sort_keys=True)))
+        self.records = []
+        return summary
+
+
+class QueryStats(object):
+    """Record the SQL statements issued on behalf of a request"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.time = 0.0
+        self.statements = {}
+        self.previous = None
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.time += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold):
+        """Return (count, statement) of the statements issued at least
+        threshold times, most repeated first.
+
+        The parameters are not part of the statement text, the same
+        statement run once per row of a previous query shows up here.
+        """
+        return sorted([(count, statement)
+                       for statement, count in self.statements.items()
+                       if count >= threshold], reverse=True)
+
+    def report(self):
+        """Log the stats exceeding the configured thresholds"""
+        conf = CONF.query_stats
+        repeated = self.repeated(conf.repeat_threshold)
+        if (self.count < conf.statement_threshold and
+                self.time < conf.time_threshold and not repeated):
+            return False
+
+        LOG.warning("%s issued %d SQL statements in %.3f seconds" %
+                    (self.name, self.count, self.time))
+        for count, statement in repeated:
+            LOG.warning("%s N+1 query candidate, issued %d times: %s" %
+                        (self.name, count, " ".join(statement.split())))
+        return True
+
+
+def query_stats_start(name):
+    """Start recording the SQL statements of this green thread"""
+    db_api.enable_query_stats()
+    stats = QueryStats(name)
+    stats.previous = db_api.set_query_stats(stats)
+    return stats
+
+
+def query_stats_stop(stats):
+    """Stop recording the SQL statements and report the stats"""
+    db_api.set_query_stats(stats.previous)
+    stats.report()
+    return stats
+
+
+@contextlib.contextmanager
+def query_stats(name):
+    """Record the SQL statements issued within the block, when enabled"""
+    if not CONF.query_stats.enabled:
+        yield None
+        return
+
+    stats = query_stats_start(name)
+    try:
+        yield stats
+    finally:
+        query_stats_stop(stats)
+
+
+class QueryStatsDispatcher(rpc_dispatcher.RpcDispatcher):
+    """Record the SQL statements issued by each RPC method"""
+
+    def dispatch(self, ctxt, version, method, namespace, **kwargs):
+        stats = query_stats_start("rpc %s" % method)
+        try:
+            return super(QueryStatsDispatcher, self).dispatch(
+                ctxt, version, method, namespace, **kwargs)
+        finally:
+            query_stats_stop(stats)
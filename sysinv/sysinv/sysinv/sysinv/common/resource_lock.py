@@ -0,0 +1,151 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" System Inventory per-resource locks.
+
+A resource is identified by its type and id, e.g. ('ihosts', <uuid>), or
+by its type alone for singletons such as the system. Its lock is the
+one taken by cutils.synchronized() with the resource name, so resource
+locks and synchronized methods exclude each other.
+
+The locks of several resources are always acquired in name order, so two
+operations on overlapping sets of resources cannot deadlock. Locks taken
+by synchronized methods while resource locks are held must come after
+them in that order, which holds as long as resource locks are only taken
+before entering the synchronized methods.
+"""
+
+import collections
+import contextlib
+import time
+
+from oslo_concurrency import lockutils
+from oslo_config import cfg
+
+from sysinv.common import constants
+from sysinv.common import exception
+from sysinv.common import utils
+from sysinv.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# Seconds between attempts to take an internal lock held by another thread
+POLL_INTERVAL = 0.05
+
+# Waits longer than this many seconds are logged
+WAIT_LOG_THRESHOLD = 1.0
+
+
+def resource_name(resource_type, resource_id=None):
+    """Return the lock name of a resource."""
+    if resource_id is None:
+        return resource_type
+    return '%s-%s' % (resource_type, resource_id)
+
+
+class ResourceLockManager(object):
+    """Acquire the locks of resources in a deadlock-safe order"""
+
+    def __init__(self, external=True, timeout=None):
+        self.external = external
+        self.timeout = timeout
+        self._metrics = collections.defaultdict(
+            lambda: {'acquired': 0, 'timeouts': 0,
+                     'wait': 0.0, 'max_wait': 0.0})
+
+    def _acquire_internal(self, name, deadline):
+        lock = lockutils.internal_lock(name)
+        if deadline is None:
+            lock.acquire()
+            return lock
+        while not lock.acquire(False):
+            if time.time() >= deadline:
+                return None
+            time.sleep(POLL_INTERVAL)
+        return lock
+
+    def _acquire_external(self, name, deadline):
+        if (not self.external or
+                cfg.CONF.oslo_concurrency.disable_process_locking):
+            return None
+        utils.check_lock_path()
+        lock = lockutils.external_lock(name, lock_file_prefix='sysinv-',
+                                       lock_path=constants.SYSINV_LOCK_PATH)
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline - time.time(), 0)
+        if not lock.acquire(timeout=timeout):
+            raise exception.ResourceLockTimeout(resource=name)
+        return lock
+
+    def _acquire(self, resource_type, name, deadline):
+        start = time.time()
+        internal = self._acquire_internal(name, deadline)
+        if internal is None:
+            self._metrics[resource_type]['timeouts'] += 1
+            raise exception.ResourceLockTimeout(resource=name)
+        try:
+            external = self._acquire_external(name, deadline)
+        except exception.ResourceLockTimeout:
+            internal.release()
+            self._metrics[resource_type]['timeouts'] += 1
+            raise
+
+        waited = time.time() - start
+        metrics = self._metrics[resource_type]
+        metrics['acquired'] += 1
+        metrics['wait'] += waited
+        metrics['max_wait'] = max(metrics['max_wait'], waited)
+        if waited >= WAIT_LOG_THRESHOLD:
+            LOG.info("Waited %.3f seconds for the lock of %s" %
+                     (waited, name))
+        return internal, external
+
+    def acquire(self, resources, timeout=None):
+        """Lock the (type, id) resources and return the held locks.
+
+        Raises ResourceLockTimeout, with none of the locks held, if the
+        locks were not all acquired within timeout seconds.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        names = sorted(set((resource_name(resource_type, resource_id),
+                            resource_type)
+                           for resource_type, resource_id in resources))
+        held = []
+        try:
+            for name, resource_type in names:
+                held.append(self._acquire(resource_type, name, deadline))
+        except Exception:
+            self.release(held)
+            raise
+        return held
+
+    def release(self, held):
+        """Release the locks returned by acquire()."""
+        for internal, external in reversed(held):
+            try:
+                if external is not None:
+                    external.release()
+            finally:
+                internal.release()
+
+    @contextlib.contextmanager
+    def lock(self, *resources, **kwargs):
+        held = self.acquire(resources, timeout=kwargs.get('timeout'))
+        try:
+            yield
+        finally:
+            self.release(held)
+
+    def stats(self):
+        """Return the lock acquisitions and wait times per resource type"""
+        return dict((resource_type, dict(metrics))
+                    for resource_type, metrics in self._metrics.items())
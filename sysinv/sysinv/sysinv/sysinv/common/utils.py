@@ -604,6 +604,137 @@ def hash_file(file_like_object):
     return checksum.hexdigest()
 
 
+class DeviceIndex(object):
+    """Index of the devices of a host on their identification attributes.
+
+    Used to narrow down the devices that an agent reported device can
+    match, instead of comparing it against every device of the host.
+    """
+
+    def __init__(self, devices, attrs):
+        self._devices = list(devices)
+        self._indexes = dict((attr, {}) for attr in attrs)
+        for position, device in enumerate(self._devices):
+            for attr, index in self._indexes.items():
+                index.setdefault(getattr(device, attr), []).append(position)
+
+    def find(self, **kwargs):
+        """Return the devices with any of the given attribute values.
+
+        The devices are returned in their original order.
+        """
+        positions = set()
+        for attr, value in kwargs.items():
+            positions.update(self._indexes[attr].get(value, []))
+        return [self._devices[p] for p in sorted(positions)]
+
+    def first(self, **kwargs):
+        devices = self.find(**kwargs)
+        return devices[0] if devices else None
+
+
+class LRUCache(object):
+    """A dict-like cache bounded to the most recently used entries"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return default
+        self._entries[key] = value
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class DigestIndex(object):
+    """Index of the content digests of the files written to a directory.
+
+    The index is kept in memory and persisted to a sidecar file within the
+    directory so that writers can skip rewriting files whose content has not
+    changed, even across process restarts.  A file is only considered current
+    if its size and modification time still match the recorded values, so
+    files modified or removed by other means are always rewritten.
+    """
+
+    INDEX_FILENAME = '.digests.json'
+
+    def __init__(self, path):
+        self.path = path
+        self._digests = None
+
+    @staticmethod
+    def digest(content):
+        if isinstance(content, six.text_type):
+            content = content.encode('utf-8')
+        return hashlib.sha256(content).hexdigest()
+
+    def _load(self):
+        if self._digests is None:
+            try:
+                with open(os.path.join(self.path, self.INDEX_FILENAME)) as f:
+                    self._digests = json.load(f)
+            except (IOError, OSError, ValueError):
+                self._digests = {}
+        return self._digests
+
+    def _save(self):
+        filepath = os.path.join(self.path, self.INDEX_FILENAME)
+        try:
+            fd, tmppath = tempfile.mkstemp(dir=self.path,
+                                           prefix=self.INDEX_FILENAME)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._digests, f)
+            os.rename(tmppath, filepath)
+        except (IOError, OSError) as e:
+            # the index is only an optimization, the next write will simply
+            # not be skipped
+            LOG.warn("Failed to save digest index %s: %s" % (filepath, e))
+
+    def is_current(self, filename, digest):
+        """Return True if the file exists with content matching the digest"""
+        entry = self._load().get(filename)
+        if not entry or entry.get('digest') != digest:
+            return False
+        try:
+            stat = os.stat(os.path.join(self.path, filename))
+        except OSError:
+            return False
+        return (stat.st_size == entry.get('size') and
+                stat.st_mtime == entry.get('mtime'))
+
+    def update(self, filename, digest):
+        """Record the digest of a file that has just been written"""
+        stat = os.stat(os.path.join(self.path, filename))
+        self._load()[filename] = {'digest': digest,
+                                  'size': stat.st_size,
+                                  'mtime': stat.st_mtime}
+        self._save()
+
+    def remove(self, filename):
+        if self._load().pop(filename, None) is not None:
+            self._save()
+
+
 @contextlib.contextmanager
 def tempdir(**kwargs):
     tempfile.tempdir = CONF.tempdir
@@ -21,6 +21,7 @@ from oslo_service import service
 from oslo_service import wsgi
 from sysinv.api import app
 from sysinv.common import exception
+from sysinv.openstack.common import rpc
 from sysinv.openstack.common.gettextutils import _
 
 
@@ -63,6 +64,11 @@ class WSGIService(service.ServiceBase):
 
         :returns: None
         """
+        # Runs in each forked worker, which shares the listening socket of
+        # the parent but must open its own RPC connections.  The database
+        # connections inherited from the parent are already discarded by
+        # the oslo.db engine process guards on checkout.
+        rpc.reset()
         self.server.start()
 
     def stop(self):
@@ -1077,12 +1077,14 @@ class AppOperator(object):
                 self._update_app_status(
                     app, new_progress=constants.APP_PROGRESS_GENERATE_OVERRIDES)
                 LOG.info("Generating application overrides...")
-                self._helm.generate_helm_application_overrides(
+                changed_files = self._helm.generate_helm_application_overrides(
                     app.name, cnamespace=None, armada_format=True,
                     combined=True)
                 overrides_files = self._get_overrides_files(app.charts)
                 if overrides_files:
-                    LOG.info("Application overrides generated.")
+                    LOG.info("Application overrides generated (%d of %d "
+                             "files changed)." %
+                             (len(changed_files), len(overrides_files)))
                     # Ensure all chart overrides are readable by Armada
                     for file in overrides_files:
                         os.chmod(file, 0o644)
@@ -72,7 +72,9 @@ from sysinv.common import exception
 from sysinv.common import fm
 from sysinv.common import fernet
 from sysinv.common import health
+from sysinv.common import inventory
 from sysinv.common import kubernetes
+from sysinv.common import profiler
 from sysinv.common import retrying
 from sysinv.common import service
 from sysinv.common import utils as cutils
@@ -115,6 +117,10 @@ conductor_opts = [
        cfg.IntOpt('osd_remove_retry_interval',
                   default=5,
                   help='Interval in seconds between retries to remove Ceph OSD.'),
+       cfg.IntOpt('puppet_workers',
+                  default=1,
+                  help=('Maximum number of hosts for which puppet hiera '
+                        'data is generated concurrently.')),
                   ]
 
 CONF = cfg.CONF
@@ -170,6 +176,15 @@ class ConductorManager(service.PeriodicService):
         self._pv_op_timeouts = {}
         self._stor_bck_op_timeouts = {}
 
+        # Last inventory report applied per host and category, the base of
+        # the delta reports sent by the agents
+        self._inventory_reports = {}
+
+    def create_rpc_dispatcher(self):
+        if CONF.query_stats.enabled:
+            return profiler.QueryStatsDispatcher([self], self.serializer)
+        return super(ConductorManager, self).create_rpc_dispatcher()
+
     def start(self):
         self._start()
         # accept API calls and run periodic tasks after
@@ -1474,13 +1489,17 @@ class ConductorManager(service.PeriodicService):
             "classes": ['platform::sysctl::controller::runtime',
                         'platform::remotelogging::runtime']
         }
-        self._config_apply_runtime_manifest(context, config_uuid, config_dict)
+        self._config_apply_runtime_manifest(
+            context, config_uuid, config_dict,
+            domains=[puppet_common.CONFIG_DOMAIN_REMOTELOGGING])
 
         config_dict = {
             "personalities": [constants.WORKER, constants.STORAGE],
             "classes": ['platform::remotelogging::runtime'],
         }
-        self._config_apply_runtime_manifest(context, config_uuid, config_dict)
+        self._config_apply_runtime_manifest(
+            context, config_uuid, config_dict,
+            domains=[puppet_common.CONFIG_DOMAIN_REMOTELOGGING])
 
     def get_magnum_cluster_count(self, context):
         return self._openstack.get_magnum_cluster_count()
@@ -1754,6 +1773,37 @@ class ConductorManager(service.PeriodicService):
                 raise exception.SysinvException(_(
                         "Missing interface on the cloned host"))
 
+    def _bulk_upsert(self, upsert, hostid, values_list, resource, **kwargs):
+        """Write the inventory rows of a host with a bulk upsert.
+
+        If the batch fails, e.g. on two rows with the same MAC address, the
+        rows are written one at a time so that only the offending rows are
+        dropped, as when each row was written on its own.
+
+        :returns: the rows written, in the order of values_list
+        """
+        try:
+            return upsert(hostid, values_list, **kwargs)
+        except (exception.NodeNotFound, exception.ServerNotFound):
+            raise
+        except Exception:
+            LOG.exception("Failed to update %s of host %s, updating them "
+                          "one at a time" % (resource, hostid))
+
+        # the batch also fails once the host is deleted
+        self.dbapi.ihost_get(hostid)
+
+        rows = []
+        for values in values_list:
+            try:
+                rows.extend(upsert(hostid, [values], **kwargs))
+            except (exception.NodeNotFound, exception.ServerNotFound):
+                raise
+            except Exception:
+                LOG.exception("Failed to update %s %s of host %s" %
+                              (resource, values, hostid))
+        return rows
+
     def iport_update_by_ihost(self, context,
                               ihost_uuid, inic_dict_array):
         """Create iports for an ihost with the supplied data.
@@ -1796,6 +1846,8 @@ class ConductorManager(service.PeriodicService):
                 break
 
         cloning = False
+        port_dict_array = []
+        address_updates = []
         for inic in inic_dict_array:
             LOG.debug("Processing inic %s" % inic)
             interface_exists = False
@@ -1806,7 +1858,6 @@ class ConductorManager(service.PeriodicService):
             new_interface = None
             set_address_interface = False
             mtu = constants.DEFAULT_MTU
-            port = None
             vlan_id = self._find_local_mgmt_interface_vlan_id()
             # ignore port if no MAC address present, this will
             # occur for data port after they are configured via DPDK driver
@@ -1971,47 +2022,13 @@ class ConductorManager(service.PeriodicService):
                                 inic['mac'])
                             pass  # at least create the port
 
-                try:
-                    LOG.debug("Attempting to create new port %s on host %s" %
-                              (inic_dict, ihost['id']))
-
-                    port = self.dbapi.ethernet_port_get_by_mac(inic['mac'])
-
-                    # update existing port with updated attributes
-                    try:
-                        port_dict = {
-                            'sriov_totalvfs': inic['sriov_totalvfs'],
-                            'sriov_numvfs': inic['sriov_numvfs'],
-                            'sriov_vfs_pci_address':
-                                inic['sriov_vfs_pci_address'],
-                            'driver': inic['driver'],
-                            'dpdksupport': inic['dpdksupport'],
-                            'speed': inic['speed'],
-                        }
-
-                        LOG.info("port %s update attr: %s" %
-                                 (port.uuid, port_dict))
-                        self.dbapi.ethernet_port_update(port.uuid, port_dict)
-
-                        # During WRL to CentOS upgrades the port name can
-                        # change. This will update the db to reflect that
-                        if port['name'] != inic['pname']:
-                            self._update_port_name(port, inic['pname'])
-                    except Exception:
-                        LOG.exception("Failed to update port %s" % inic['mac'])
-                        pass
-
-                except Exception:
-                    # adjust for field naming differences between the NIC
-                    # dictionary returned by the agent and the Port model
-                    port_dict = inic_dict.copy()
-                    port_dict['name'] = port_dict.pop('pname', None)
-                    port_dict['namedisplay'] = port_dict.pop('pnamedisplay',
-                                                             None)
-
-                    LOG.info("Attempting to create new port %s "
-                             "on host %s" % (inic_dict, ihost.uuid))
-                    port = self.dbapi.ethernet_port_create(ihost.uuid, port_dict)
+                # adjust for field naming differences between the NIC
+                # dictionary returned by the agent and the Port model
+                port_dict = inic_dict.copy()
+                port_dict['name'] = port_dict.pop('pname', None)
+                port_dict['namedisplay'] = port_dict.pop('pnamedisplay',
+                                                         None)
+                port_dict_array.append(port_dict)
 
             except exception.NodeNotFound:
                 raise exception.SysinvException(_(
@@ -2021,31 +2038,64 @@ class ConductorManager(service.PeriodicService):
             except Exception:  # this info may have been posted previously, update ?
                 pass
 
-            # Set interface ID for management address
             if set_address_interface:
-                if new_interface and 'id' in new_interface:
-                    values = {'interface_id': new_interface['id']}
-                    try:
-                        addr_name = cutils.format_address_name(
-                            ihost.hostname, new_interface['networktype'])
-                        address = self.dbapi.address_get_by_name(addr_name)
-                        self.dbapi.address_update(address['uuid'], values)
-                    except exception.AddressNotFoundByName:
-                        pass
-                    # Do any potential distributed cloud config
-                    # We do this here where the interface is created.
-                    cutils.perform_distributed_cloud_config(self.dbapi,
-                                                            new_interface['id'])
-                if port:
-                    values = {'interface_id': port.interface_id}
+                address_updates.append((inic['mac'], new_interface,
+                                        networktype))
+
+        # Create the new ports and update the attributes of existing ones
+        ports = {}
+        if port_dict_array:
+            LOG.info("Updating ports %s on host %s" %
+                     (port_dict_array, ihost.uuid))
+            try:
+                for port in self._bulk_upsert(
+                        self.dbapi.ethernet_port_bulk_upsert,
+                        ihost['id'], port_dict_array, 'ports',
+                        update_fields=['sriov_totalvfs', 'sriov_numvfs',
+                                       'sriov_vfs_pci_address', 'driver',
+                                       'dpdksupport', 'speed']):
+                    ports[port['mac']] = port
+            except (exception.NodeNotFound, exception.ServerNotFound):
+                LOG.exception("Failed to update ports of host %s" %
+                              ihost.uuid)
+
+        for port_dict in port_dict_array:
+            port = ports.get(port_dict['mac'])
+            # During WRL to CentOS upgrades the port name can
+            # change. This will update the db to reflect that
+            if port is not None and port['name'] != port_dict['name']:
+                try:
+                    self._update_port_name(port, port_dict['name'])
+                except Exception:
+                    LOG.exception("Failed to update port %s" %
+                                  port_dict['mac'])
+
+        # Set interface ID for management address
+        for mac, new_interface, networktype in address_updates:
+            port = ports.get(mac)
+            if new_interface and 'id' in new_interface:
+                values = {'interface_id': new_interface['id']}
                 try:
-                    addr_name = cutils.format_address_name(ihost.hostname,
-                                                           networktype)
+                    addr_name = cutils.format_address_name(
+                        ihost.hostname, new_interface['networktype'])
                     address = self.dbapi.address_get_by_name(addr_name)
-                    if address['interface_uuid'] is None:
-                        self.dbapi.address_update(address['uuid'], values)
+                    self.dbapi.address_update(address['uuid'], values)
                 except exception.AddressNotFoundByName:
                     pass
+                # Do any potential distributed cloud config
+                # We do this here where the interface is created.
+                cutils.perform_distributed_cloud_config(self.dbapi,
+                                                        new_interface['id'])
+            if port:
+                values = {'interface_id': port.interface_id}
+            try:
+                addr_name = cutils.format_address_name(ihost.hostname,
+                                                       networktype)
+                address = self.dbapi.address_get_by_name(addr_name)
+                if address['interface_uuid'] is None:
+                    self.dbapi.address_update(address['uuid'], values)
+            except exception.AddressNotFoundByName:
+                pass
 
         if ihost.invprovision not in [constants.PROVISIONED, constants.PROVISIONING]:
             value = {'invprovision': constants.UNPROVISIONED}
@@ -2284,7 +2334,8 @@ class ConductorManager(service.PeriodicService):
                     "Failed to update lldp agent: %s") % e)
 
     def lldp_neighbour_update_by_host(self, context,
-                                      host_uuid, neighbour_dict_array):
+                                      host_uuid, neighbour_dict_array,
+                                      remove_stale=True):
         """Create or update lldp neighbours for an ihost with the supplied data.
 
         This method allows records for lldp neighbours for ihost to be created
@@ -2293,6 +2344,7 @@ class ConductorManager(service.PeriodicService):
         :param context: an admin context
         :param host_uuid: host uuid unique id
         :param neighbour_dict_array: initial values for lldp neighbour objects
+        :param remove_stale: remove the neighbours not in neighbour_dict_array
         :returns: pass or fail
         """
         LOG.debug("Entering lldp_neighbour_update_by_host %s %s" %
@@ -2318,6 +2370,8 @@ class ConductorManager(service.PeriodicService):
 
         reported = set([(d['msap']) for d in neighbour_dict_array])
         stale = [d for d in db_neighbours if (d['msap']) not in reported]
+        if not remove_stale:
+            stale = []
         for neighbour in stale:
             db_neighbour = self.dbapi.lldp_neighbour_destroy(
                             neighbour['uuid'])
@@ -2388,6 +2442,78 @@ class ConductorManager(service.PeriodicService):
                 raise exception.SysinvException(_(
                     "Couldn't update LLDP neighbour: %s") % e)
 
+    def lldp_neighbour_delta_update_by_host(self, context, host_uuid,
+                                            base_dict_array,
+                                            neighbour_dict_array):
+        """Apply the lldp neighbour changes since the last report of an ihost.
+
+        Only the neighbours added, updated or removed since the base report
+        are written. The TLVs of an updated neighbour are compared with the
+        base report rather than read back from the database.
+
+        :param context: an admin context
+        :param host_uuid: host uuid unique id
+        :param base_dict_array: lldp neighbours of the last applied report
+        :param neighbour_dict_array: lldp neighbours of the new report
+        """
+        base = dict((d['msap'], d) for d in base_dict_array)
+        reported = set(d['msap'] for d in neighbour_dict_array)
+        removed = [msap for msap in base if msap not in reported]
+        changed = [d for d in neighbour_dict_array
+                   if base.get(d['msap']) != d]
+        if not removed and not changed:
+            return
+
+        LOG.debug("Applying lldp neighbour changes of host %s: removed %s, "
+                  "changed %s" % (host_uuid, removed, changed))
+        try:
+            db_neighbours = dict(
+                (n['msap'], n) for n in
+                self.dbapi.lldp_neighbour_get_by_host(host_uuid))
+        except Exception:
+            raise exception.SysinvException(_(
+                "Error getting LLDP neighbours for host %s") % host_uuid)
+
+        for msap in removed:
+            if msap in db_neighbours:
+                self.dbapi.lldp_neighbour_destroy(db_neighbours[msap]['uuid'])
+
+        added = []
+        for neighbour in changed:
+            db_neighbour = db_neighbours.get(neighbour['msap'])
+            base_neighbour = base.get(neighbour['msap'])
+            if (db_neighbour is None or base_neighbour is None or
+                    neighbour['state'] ==
+                    constants.LLDP_NEIGHBOUR_STATE_REMOVED):
+                added.append(neighbour)
+                continue
+
+            tlv_dict = self.lldp_tlv_dict(neighbour)
+            base_tlv_dict = self.lldp_tlv_dict(base_neighbour)
+            tlv_update_list = [{'type': k, 'value': v}
+                               for k, v in tlv_dict.items()
+                               if k in base_tlv_dict and
+                               base_tlv_dict[k] != v]
+            tlv_create_list = [{'type': k, 'value': v}
+                               for k, v in tlv_dict.items()
+                               if k not in base_tlv_dict]
+            try:
+                if tlv_update_list:
+                    self.dbapi.lldp_tlv_update_bulk(
+                        tlv_update_list, neighbourid=db_neighbour['id'])
+                if tlv_create_list:
+                    self.dbapi.lldp_tlv_create_bulk(
+                        tlv_create_list, neighbourid=db_neighbour['id'])
+            except Exception as e:
+                # The TLVs in the database do not match the base report
+                LOG.info("Resyncing TLVs of lldp neighbour %s: %s" %
+                         (neighbour['msap'], e))
+                self.lldp_neighbour_tlv_update(tlv_dict, db_neighbour)
+
+        if added:
+            self.lldp_neighbour_update_by_host(context, host_uuid, added,
+                                               remove_stale=False)
+
     def pci_device_update_by_host(self, context,
                                   host_uuid, pci_device_dict_array):
         """Create devices for an ihost with the supplied data.
@@ -2407,56 +2533,30 @@ class ConductorManager(service.PeriodicService):
         except exception.ServerNotFound:
             LOG.exception("Invalid host_uuid %s" % host_uuid)
             return
+        pci_dev_dict_array = []
         for pci_dev in pci_device_dict_array:
             LOG.debug("Processing dev %s" % pci_dev)
-            try:
-                pci_dev_dict = {'host_id': host['id']}
-                pci_dev_dict.update(pci_dev)
-                dev_found = None
-                try:
-                    dev = self.dbapi.pci_device_get(pci_dev['pciaddr'],
-                                                    hostid=host['id'])
-                    dev_found = dev
-                    if not dev:
-                        LOG.info("Attempting to create new device "
-                                 "%s on host %s" % (pci_dev_dict, host['id']))
-                        dev = self.dbapi.pci_device_create(host['id'],
-                                                           pci_dev_dict)
-                except Exception:
-                    LOG.info("Attempting to create new device "
-                             "%s on host %s" % (pci_dev_dict, host['id']))
-                    dev = self.dbapi.pci_device_create(host['id'],
-                                                       pci_dev_dict)
+            pci_dev_dict = {'host_id': host['id']}
+            pci_dev_dict.update(pci_dev)
+            pci_dev_dict_array.append(pci_dev_dict)
 
-                # If the device exists, try to update some of the fields
-                if dev_found:
-                    try:
-                        attr = {
-                            'pclass_id': pci_dev['pclass_id'],
-                            'pvendor_id': pci_dev['pvendor_id'],
-                            'pdevice_id': pci_dev['pdevice_id'],
-                            'pclass': pci_dev['pclass'],
-                            'pvendor': pci_dev['pvendor'],
-                            'psvendor': pci_dev['psvendor'],
-                            'psdevice': pci_dev['psdevice'],
-                            'sriov_totalvfs': pci_dev['sriov_totalvfs'],
-                            'sriov_numvfs': pci_dev['sriov_numvfs'],
-                            'sriov_vfs_pci_address':
-                                pci_dev['sriov_vfs_pci_address'],
-                            'driver': pci_dev['driver']}
-                        LOG.info("attr: %s" % attr)
-                        dev = self.dbapi.pci_device_update(dev['uuid'], attr)
-                    except Exception:
-                        LOG.exception("Failed to update port %s" %
-                                      dev['pciaddr'])
-                        pass
+        if not pci_dev_dict_array:
+            return
 
-            except exception.NodeNotFound:
-                raise exception.SysinvException(_(
-                    "Invalid host_uuid: host not found: %s") %
-                    host_uuid)
-            except Exception:
-                pass
+        # Create the new devices and update some of the fields of the
+        # existing ones
+        try:
+            self._bulk_upsert(
+                self.dbapi.pci_device_bulk_upsert,
+                host['id'], pci_dev_dict_array, 'pci devices',
+                update_fields=['pclass_id', 'pvendor_id', 'pdevice_id',
+                               'pclass', 'pvendor', 'psvendor', 'psdevice',
+                               'sriov_totalvfs', 'sriov_numvfs',
+                               'sriov_vfs_pci_address', 'driver'])
+        except (exception.NodeNotFound, exception.ServerNotFound):
+            raise exception.SysinvException(_(
+                "Invalid host_uuid: host not found: %s") %
+                host_uuid)
 
     def inumas_update_by_ihost(self, context,
                                ihost_uuid, inuma_dict_array):
@@ -2753,30 +2853,29 @@ class ConductorManager(service.PeriodicService):
             functions[numa_node] = self._get_default_cpu_functions(
                 ihost, numa_node, cpu_list, hyperthreading)
 
+        cpu_dict_array = []
         for data in cpu_list:
-            try:
-                forinodeid = None
-                for n in ihost_inodes:
-                    numa_node = int(n.numa_node)
-                    if numa_node == int(data['numa_node']):
-                        forinodeid = n['id']
-                        break
-
-                cpu_dict = {'forihostid': forihostid,
-                            'forinodeid': forinodeid,
-                            'allocated_function': functions[numa_node].pop(0)}
+            forinodeid = None
+            for n in ihost_inodes:
+                numa_node = int(n.numa_node)
+                if numa_node == int(data['numa_node']):
+                    forinodeid = n['id']
+                    break
 
-                cpu_dict.update(data)
+            cpu_dict = {'forihostid': forihostid,
+                        'forinodeid': forinodeid,
+                        'allocated_function': functions[numa_node].pop(0)}
 
-                self.dbapi.icpu_create(forihostid, cpu_dict)
+            cpu_dict.update(data)
+            cpu_dict_array.append(cpu_dict)
 
-            except exception.NodeNotFound:
-                raise exception.SysinvException(_(
-                    "Invalid ihost_uuid: host not found: %s") %
-                    ihost_uuid)
-            except Exception:
-                # info may have already been posted
-                pass
+        try:
+            self._bulk_upsert(self.dbapi.icpu_bulk_upsert, forihostid,
+                              cpu_dict_array, 'cpus')
+        except (exception.NodeNotFound, exception.ServerNotFound):
+            raise exception.SysinvException(_(
+                "Invalid ihost_uuid: host not found: %s") %
+                ihost_uuid)
 
         # if it is the first controller wait for the initial config to
         # be completed
@@ -2796,6 +2895,53 @@ class ConductorManager(service.PeriodicService):
         reserved = cutils.get_required_platform_reserved_memory(ihost, node, low_core)
         return {'platform_reserved_mib': reserved} if reserved else {}
 
+    def inventory_delta_update_by_ihost(self, context, ihost_uuid,
+                                        category, report):
+        """Apply a full or delta inventory report for an ihost.
+
+        The full list of records is rebuilt from the last report applied
+        for the category and handed to the corresponding update method.
+
+        :param context: an admin context
+        :param ihost_uuid: ihost uuid unique id
+        :param category: inventory category of the report
+        :param report: full or delta report of the category records
+        :returns: True if the report was applied, False if the agent must
+                  send a full report
+        """
+        handlers = {
+            inventory.CATEGORY_DISK: self.idisk_update_by_ihost,
+            inventory.CATEGORY_PARTITION: self.ipartition_update_by_ihost,
+            inventory.CATEGORY_PV: self.ipv_update_by_ihost,
+            inventory.CATEGORY_LVG: self.ilvg_update_by_ihost,
+            inventory.CATEGORY_LLDP_AGENT: self.lldp_agent_update_by_host,
+            inventory.CATEGORY_LLDP_NEIGHBOUR:
+                self.lldp_neighbour_update_by_host,
+        }
+
+        key = (ihost_uuid, category)
+        base_digest, base_records = self._inventory_reports.pop(
+            key, (None, []))
+        records = inventory.apply_report(category, base_records,
+                                         base_digest, report)
+        if records is None:
+            LOG.info("Inventory %s report of host %s does not match, "
+                     "requesting a full report" % (category, ihost_uuid))
+            return False
+
+        if category == inventory.CATEGORY_MEMORY:
+            self.imemory_update_by_ihost(context, ihost_uuid, records,
+                                         force_update=False)
+        elif (category == inventory.CATEGORY_LLDP_NEIGHBOUR and
+                report.get('base_digest') is not None):
+            self.lldp_neighbour_delta_update_by_host(context, ihost_uuid,
+                                                     base_records, records)
+        else:
+            handlers[category](context, ihost_uuid, records)
+
+        self._inventory_reports[key] = (report['digest'], records)
+        return True
+
     def imemory_update_by_ihost(self, context,
                                 ihost_uuid, imemory_dict_array,
                                 force_update):
@@ -2826,16 +2972,16 @@ class ConductorManager(service.PeriodicService):
 
         forihostid = ihost['id']
         ihost_inodes = self.dbapi.inode_get_by_ihost(ihost_uuid)
+        imems = dict((imem.forinodeid, imem) for imem in
+                     self.dbapi.imemory_get_by_ihost(ihost_uuid))
 
+        mem_dict_array = []
         for i in imemory_dict_array:
             forinodeid = None
-            inode_uuid = None
             for n in ihost_inodes:
                 numa_node = int(n.numa_node)
                 if numa_node == int(i['numa_node']):
                     forinodeid = n['id']
-                    inode_uuid = n['uuid']
-                    inode_uuid.strip()
                     break
             else:
                 # not found in host_nodes, do not add memory element
@@ -2858,31 +3004,29 @@ class ConductorManager(service.PeriodicService):
                 mem_dict['vm_hugepages_nr_1G_pending'] = None
                 mem_dict['vswitch_hugepages_reqd'] = None
 
-            try:
-                imems = self.dbapi.imemory_get_by_ihost_inode(ihost_uuid,
-                                                              inode_uuid)
-                if not imems:
-                    # Set the amount of memory reserved for platform use.
-                    mem_dict.update(self._get_platform_reserved_memory(
-                            ihost, i['numa_node']))
-                    self.dbapi.imemory_create(forihostid, mem_dict)
-                else:
-                    for imem in imems:
-                        # Include 4K pages in the displayed VM memtotal
-                        if imem.vm_hugepages_nr_4K is not None:
-                            vm_4K_mib = \
-                                (imem.vm_hugepages_nr_4K /
-                                 constants.NUM_4K_PER_MiB)
-                            mem_dict['memtotal_mib'] += vm_4K_mib
-                            mem_dict['memavail_mib'] += vm_4K_mib
-                        self.dbapi.imemory_update(imem['uuid'],
-                                                         mem_dict)
-            except Exception:
+            imem = imems.get(forinodeid)
+            if imem is None:
                 # Set the amount of memory reserved for platform use.
                 mem_dict.update(self._get_platform_reserved_memory(
                         ihost, i['numa_node']))
-                self.dbapi.imemory_create(forihostid, mem_dict)
-                pass
+            elif imem.vm_hugepages_nr_4K is not None:
+                # Include 4K pages in the displayed VM memtotal
+                vm_4K_mib = \
+                    (imem.vm_hugepages_nr_4K /
+                     constants.NUM_4K_PER_MiB)
+                mem_dict['memtotal_mib'] += vm_4K_mib
+                mem_dict['memavail_mib'] += vm_4K_mib
+
+            mem_dict_array.append(mem_dict)
+
+        if mem_dict_array:
+            try:
+                self._bulk_upsert(self.dbapi.imemory_bulk_upsert, forihostid,
+                                  mem_dict_array, 'memory')
+            except (exception.NodeNotFound, exception.ServerNotFound):
+                raise exception.SysinvException(_(
+                    "Invalid ihost_uuid: host not found: %s") %
+                    ihost_uuid)
 
         return
 
@@ -3040,6 +3184,14 @@ class ConductorManager(service.PeriodicService):
 
         idisks = self.dbapi.idisk_get_by_ihost(ihost_uuid)
 
+        # A reported disk can only match the disks with the same device path
+        # or device node, the matching rules are then applied on those only.
+        disk_index = cutils.DeviceIndex(idisks, ['device_path', 'device_node'])
+
+        # The disks to create or update, and the uuids of the disks whose
+        # journals must follow a new device path
+        disk_dict_array = []
+        journal_updates = set()
         for i in idisk_dict_array:
             disk_dict = {'forihostid': forihostid}
             # this could overwrite capabilities - do not overwrite device_function?
@@ -3048,10 +3200,12 @@ class ConductorManager(service.PeriodicService):
             disk_dict.update(i)
 
             if not idisks:
-                disk = self.dbapi.idisk_create(forihostid, disk_dict)
+                disk_dict_array.append(disk_dict)
             else:
                 found = False
-                for idisk in idisks:
+                for idisk in disk_index.find(
+                        device_path=i.get('device_path'),
+                        device_node=i.get('device_node')):
                     LOG.debug("[DiskEnum] for - current idisk: %s - %s -%s" %
                              (idisk.uuid, idisk.device_node, idisk.device_id))
 
@@ -3120,31 +3274,46 @@ class ConductorManager(service.PeriodicService):
                         LOG.debug("[DiskEnum] updating disk uuid %s with"
                                   "values: %s" %
                                   (idisk['uuid'], str(disk_dict)))
-                        disk = self.dbapi.idisk_update(idisk['uuid'],
-                                                       disk_dict)
+                        disk_dict_array.append(
+                            dict(disk_dict, uuid=idisk['uuid']))
                     elif not idisk.device_path:
                         if idisk.device_node == i.get('device_node'):
                             found = True
-                            disk = self.dbapi.idisk_update(idisk['uuid'],
-                                                           disk_dict)
-                            self.dbapi.journal_update_path(disk)
+                            disk_dict_array.append(
+                                dict(disk_dict, uuid=idisk['uuid']))
+                            journal_updates.add(idisk['uuid'])
 
                 if not found:
-                    disk = self.dbapi.idisk_create(forihostid, disk_dict)
+                    disk_dict_array.append(disk_dict)
 
-                # Update the capabilities if the device is a cinder
-                # disk
-                if ((cinder_device is not None) and
-                        (disk.device_path == cinder_device)):
+        disks = []
+        if disk_dict_array:
+            try:
+                disks = self._bulk_upsert(self.dbapi.idisk_bulk_upsert,
+                                          forihostid, disk_dict_array,
+                                          'disks')
+            except (exception.NodeNotFound, exception.ServerNotFound):
+                raise exception.SysinvException(_(
+                    "Invalid ihost_uuid: host not found: %s") %
+                    ihost_uuid)
 
-                    idisk_capabilities = disk.capabilities
-                    if 'device_function' not in idisk_capabilities:
-                        # Only update if it's not already present
-                        idisk_dict = {'device_function': 'cinder_device'}
-                        idisk_capabilities.update(idisk_dict)
+        for disk in disks:
+            if disk.uuid in journal_updates:
+                self.dbapi.journal_update_path(disk)
 
-                        idisk_val = {'capabilities': idisk_capabilities}
-                        self.dbapi.idisk_update(idisk.uuid, idisk_val)
+            # Update the capabilities if the device is a cinder
+            # disk
+            if (idisks and (cinder_device is not None) and
+                    (disk.device_path == cinder_device)):
+
+                idisk_capabilities = disk.capabilities
+                if 'device_function' not in idisk_capabilities:
+                    # Only update if it's not already present
+                    idisk_dict = {'device_function': 'cinder_device'}
+                    idisk_capabilities.update(idisk_dict)
+
+                    idisk_val = {'capabilities': idisk_capabilities}
+                    self.dbapi.idisk_update(disk.uuid, idisk_val)
 
         # Check if this is the controller or storage-0, if so, autocreate.
         # Monitor stor entry if ceph is configured.
@@ -3165,15 +3334,10 @@ class ConductorManager(service.PeriodicService):
         if idisks and len(idisk_dict_array) > 0:
             if len(idisks) > len(idisk_dict_array):
                 # Compare tuples of device_path.
+                cur_device_paths = set(cur_disk.get('device_path') or ""
+                                       for cur_disk in idisk_dict_array)
                 for pre_disk in idisks:
-                    found = False
-                    for cur_disk in idisk_dict_array:
-                        cur_device_path = cur_disk.get('device_path') or ""
-                        if pre_disk.device_path == cur_device_path:
-                            found = True
-                            break
-
-                    if not found:
+                    if pre_disk.device_path not in cur_device_paths:
                         # remove if not associated with storage
                         if not pre_disk.foristorid:
                             LOG.warn("Disk removed: %s dev_node=%s "
@@ -3567,6 +3731,19 @@ class ConductorManager(service.PeriodicService):
         db_parts = self.dbapi.partition_get_by_ihost(ihost_uuid)
         db_disks = self.dbapi.idisk_get_by_ihost(ihost_uuid)
 
+        part_index = cutils.DeviceIndex(db_parts, ['device_path'])
+        disk_index = cutils.DeviceIndex(db_disks, ['device_path'])
+
+        def get_partition_disk(part_device_path):
+            # The partition device path is the disk device path with a
+            # -part<n> suffix, only scan the disks if that lookup fails.
+            disk = disk_index.first(
+                device_path=part_device_path.rpartition('-part')[0])
+            if disk is None:
+                disk = next((d for d in db_disks
+                             if d.device_path in part_device_path), None)
+            return disk
+
         # Check that the DB partitions are in sync with the DB disks and PVs.
         for db_part in db_parts:
             if not db_part.device_path:
@@ -3578,8 +3755,7 @@ class ConductorManager(service.PeriodicService):
                 continue
 
             # Obtain the disk the partition is on.
-            part_disk = next((d for d in db_disks
-                             if d.device_path in db_part.device_path), None)
+            part_disk = get_partition_disk(db_part.device_path)
 
             if not part_disk:
                 # Should not happen as we only store partitions associated
@@ -3618,58 +3794,56 @@ class ConductorManager(service.PeriodicService):
             found = False
 
             # If the paths match, then the partition already exists in the DB.
-            for db_part in db_parts:
-                if ipart['device_path'] == db_part.device_path:
-                    found = True
+            db_part = part_index.first(device_path=ipart['device_path'])
+            if db_part is not None:
+                found = True
 
-                    if ipart['device_node'] != db_part.device_node:
-                        LOG.info("PART update part device node")
-                        self.dbapi.partition_update(
-                            db_part.uuid,
-                            {'device_node': ipart['device_node']})
-                    LOG.debug("PART conductor - found partition: %s" %
-                              db_part.device_path)
+                if ipart['device_node'] != db_part.device_node:
+                    LOG.info("PART update part device node")
+                    self.dbapi.partition_update(
+                        db_part.uuid,
+                        {'device_node': ipart['device_node']})
+                LOG.debug("PART conductor - found partition: %s" %
+                          db_part.device_path)
 
-                    self._fill_partition_info(db_part, ipart)
+                self._fill_partition_info(db_part, ipart)
 
-                    # Try to resize the underlying FS.
-                    if db_part.foripvid:
-                        pv = self.dbapi.ipv_get(db_part.foripvid)
-                        if (pv and pv.lvm_vg_name == constants.LVG_CINDER_VOLUMES):
-                            try:
-                                self._resize_cinder_volumes(delayed=True)
-                            except retrying.RetryError:
-                                LOG.info("Cinder volumes resize failed")
-                    break
+                # Try to resize the underlying FS.
+                if db_part.foripvid:
+                    pv = self.dbapi.ipv_get(db_part.foripvid)
+                    if (pv and pv.lvm_vg_name == constants.LVG_CINDER_VOLUMES):
+                        try:
+                            self._resize_cinder_volumes(delayed=True)
+                        except retrying.RetryError:
+                            LOG.info("Cinder volumes resize failed")
 
             # If we've found no matching path, then this is a new partition.
             if not found:
                 LOG.debug("PART conductor - partition not found, adding...")
                 # Complete disk info.
-                for db_disk in db_disks:
-                    if db_disk.device_path in ipart['device_path']:
-                        part_dict.update({'idisk_id': db_disk.id,
-                                          'idisk_uuid': db_disk.uuid})
-                        LOG.debug("PART conductor - disk - part_dict: %s " %
-                                  str(part_dict))
-
-                        new_part = None
-                        try:
-                            LOG.info("Partition create on host: %s. Details: %s" % (forihostid, part_dict))
-                            new_part = self.dbapi.partition_create(
-                                forihostid, part_dict)
-                        except Exception as e:
-                            LOG.exception("Partition creation failed on host: %s. "
-                                          "Details: %s" % (forihostid, str(e)))
-
-                        # If the partition has been successfully created, update its status.
-                        if new_part:
-                            if new_part.type_guid != constants.USER_PARTITION_PHYSICAL_VOLUME:
-                                status = {'status': constants.PARTITION_IN_USE_STATUS}
-                            else:
-                                status = {'status': constants.PARTITION_READY_STATUS}
-                            self.dbapi.partition_update(new_part.uuid, status)
-                        break
+                db_disk = get_partition_disk(ipart['device_path'])
+                if db_disk is not None:
+                    part_dict.update({'idisk_id': db_disk.id,
+                                      'idisk_uuid': db_disk.uuid})
+                    LOG.debug("PART conductor - disk - part_dict: %s " %
+                              str(part_dict))
+
+                    new_part = None
+                    try:
+                        LOG.info("Partition create on host: %s. Details: %s" % (forihostid, part_dict))
+                        new_part = self.dbapi.partition_create(
+                            forihostid, part_dict)
+                    except Exception as e:
+                        LOG.exception("Partition creation failed on host: %s. "
+                                      "Details: %s" % (forihostid, str(e)))
+
+                    # If the partition has been successfully created, update its status.
+                    if new_part:
+                        if new_part.type_guid != constants.USER_PARTITION_PHYSICAL_VOLUME:
+                            status = {'status': constants.PARTITION_IN_USE_STATUS}
+                        else:
+                            status = {'status': constants.PARTITION_READY_STATUS}
+                        self.dbapi.partition_update(new_part.uuid, status)
                 else:
                     # This shouldn't happen as disks are reported before partitions
                     LOG.warning("Found partition not associated with any disks, "
@@ -3678,13 +3852,11 @@ class ConductorManager(service.PeriodicService):
                                 "ipart_dict_array: %s" % (ihost_uuid, part_dict))
 
         # Check to see if partitions have been removed.
+        ipart_device_paths = set(ipart['device_path']
+                                 for ipart in ipart_dict_array)
         for db_part in db_parts:
-            found = False
-            for ipart in ipart_dict_array:
-                if db_part.device_path:
-                    if ipart['device_path'] == db_part.device_path:
-                        found = True
-                        break
+            found = bool(db_part.device_path and
+                         db_part.device_path in ipart_device_paths)
 
             # PART - TO DO - Maybe some extra checks will be needed here,
             # depending on the status.
@@ -3768,13 +3940,19 @@ class ConductorManager(service.PeriodicService):
             if k not in ipv_uuids:
                 del self._pv_op_timeouts[k]
 
+        # A PV can only match the disks with the same device path or device
+        # node, the matching rules are then applied on those only.
+        disk_index = cutils.DeviceIndex(idisks, ['device_path', 'device_node'])
+
         # Make sure that the Physical Volume to Disk info is still valid
         for ipv in ipvs:
             # Handle the case where the disk has been
             # removed/replaced/re-enumerated.
             pv_disk_is_present = False
             if ipv['pv_type'] == constants.PV_TYPE_DISK:
-                for idisk in idisks:
+                for idisk in disk_index.find(
+                        device_path=ipv['disk_or_part_device_path'],
+                        device_node=ipv['disk_or_part_device_node']):
                     if is_same_disk(idisk, ipv):
                         pv_disk_is_present = True
                         ipv_update_needed = False
@@ -4133,6 +4311,12 @@ class ConductorManager(service.PeriodicService):
         LOG.debug("Calling _agent_update_request")
         update_hosts = {}
 
+        def update_hosts_dict(host_ids, val):
+            for host_id in host_ids:
+                if host_id not in update_hosts:
+                    update_hosts[host_id] = set()
+                update_hosts[host_id].add(val)
+
         # Check if the LVM backend is in flux. If so, skip the audit as we know
         # VG/PV states are going to be transitory. Otherwise, maintain the
         # audit for nova storage.
@@ -4141,84 +4325,65 @@ class ConductorManager(service.PeriodicService):
         if lvm_backend and lvm_backend.state != constants.SB_STATE_CONFIGURED:
             skip_lvm_audit = True
 
+        # The audit is driven by a fixed number of set-based queries so that
+        # its cost does not grow with the number of hosts.
         if not skip_lvm_audit:
-            ipvs = self.dbapi.ipv_get_all()
-            ilvgs = self.dbapi.ilvg_get_all()
-
-            def update_hosts_dict(host_id, val):
-                if host_id not in update_hosts:
-                    update_hosts[host_id] = set()
-                update_hosts[host_id].add(val)
-
             # Check LVGs
-            for ilvg in ilvgs:
-                if ilvg['vg_state'] != constants.PROVISIONED:
-                    host_id = ilvg['forihostid']
-                    update_hosts_dict(host_id, constants.LVG_AUDIT_REQUEST)
+            update_hosts_dict(self.dbapi.ilvg_get_unprovisioned_ihost_ids(),
+                              constants.LVG_AUDIT_REQUEST)
 
             # Check PVs
-            for ipv in ipvs:
-                if ipv['pv_state'] != constants.PROVISIONED:
-                    host_id = ipv['forihostid']
-                    update_hosts_dict(host_id, constants.PV_AUDIT_REQUEST)
+            update_hosts_dict(self.dbapi.ipv_get_unprovisioned_ihost_ids(),
+                              constants.PV_AUDIT_REQUEST)
 
             # Make sure we get at least one good report for PVs & LVGs
-            hosts = self.dbapi.ihost_get_list()
-            for host in hosts:
-                if host.availability != constants.AVAILABILITY_OFFLINE:
-                    idisks = self.dbapi.idisk_get_by_ihost(host.uuid)
-                    if not idisks:
-                        update_hosts_dict(host.id, constants.DISK_AUDIT_REQUEST)
-                    ipvs = self.dbapi.ipv_get_by_ihost(host.uuid)
-                    if not ipvs:
-                        update_hosts_dict(host.id, constants.PARTITION_AUDIT_REQUEST)
-                        update_hosts_dict(host.id, constants.PV_AUDIT_REQUEST)
-                    ilvgs = self.dbapi.ilvg_get_by_ihost(host.uuid)
-                    if not ilvgs:
-                        update_hosts_dict(host.id, constants.LVG_AUDIT_REQUEST)
+            update_hosts_dict(self.dbapi.ihost_get_ids_without_idisks(),
+                              constants.DISK_AUDIT_REQUEST)
+            host_ids = self.dbapi.ihost_get_ids_without_ipvs()
+            update_hosts_dict(host_ids, constants.PARTITION_AUDIT_REQUEST)
+            update_hosts_dict(host_ids, constants.PV_AUDIT_REQUEST)
+            update_hosts_dict(self.dbapi.ihost_get_ids_without_ilvgs(),
+                              constants.LVG_AUDIT_REQUEST)
 
         # Check partitions.
-        partitions = self.dbapi.partition_get_all()
         # Transitory partition states.
         states = [constants.PARTITION_CREATE_IN_SVC_STATUS,
                   constants.PARTITION_CREATE_ON_UNLOCK_STATUS,
                   constants.PARTITION_DELETING_STATUS,
                   constants.PARTITION_MODIFYING_STATUS]
-        for part in partitions:
-            # TODO (rchurch):These mib checks cover an R4->R5 upgrade
-            # scenario.Remove after R5.
-            if ((part.status in states) or
-                    (not part.get('start_mib') or
-                     not part.get('end_mib'))):
-                host_id = part['forihostid']
-                update_hosts_dict(host_id, constants.PARTITION_AUDIT_REQUEST)
+        # TODO (rchurch):The query also reports partitions without start/end
+        # mib to cover an R4->R5 upgrade scenario.Remove after R5.
+        update_hosts_dict(self.dbapi.partition_get_transitory_ihost_ids(states),
+                          constants.PARTITION_AUDIT_REQUEST)
 
         # Send update request if required
         if update_hosts:
+            hosts = dict((h.id, h) for h in
+                         self.dbapi.ihost_get_list(recordtype=None))
+
+            # Get the cinder device to force detection even
+            # when filtered by LVM's global_filter.
+            cinder_devices = self.dbapi.ipv_get_device_paths_by_lvg_name(
+                constants.LVG_CINDER_VOLUMES)
+
             rpcapi = agent_rpcapi.AgentAPI()
             for host_id, update_set in update_hosts.items():
 
-                ihost = self.dbapi.ihost_get(host_id)
+                ihost = hosts.get(host_id)
+                if not ihost:
+                    LOG.error("Host: %s not found in database" % host_id)
+                    continue
                 if (ihost.invprovision != constants.PROVISIONED and
                         tsc.system_type != constants.TIS_AIO_BUILD):
                     continue
-                if ihost:
-                    LOG.info("Sending agent update request for host %s "
-                             "to update (%s)" %
-                             (host_id, (', '.join(update_set))))
-
-                    # Get the cinder device to force detection even
-                    # when filtered by LVM's global_filter.
-                    ipvs = self.dbapi.ipv_get_by_ihost(ihost['uuid'])
-                    cinder_device = None
-                    for ipv in ipvs:
-                        if ipv['lvm_vg_name'] == constants.LVG_CINDER_VOLUMES:
-                            cinder_device = ipv.get('disk_or_part_device_path')
-
-                    rpcapi.agent_update(context, ihost['uuid'],
-                                        list(update_set), cinder_device)
-                else:
-                    LOG.error("Host: %s not found in database" % host_id)
+
+                LOG.info("Sending agent update request for host %s "
+                         "to update (%s)" %
+                         (host_id, (', '.join(update_set))))
+
+                rpcapi.agent_update(context, ihost['uuid'],
+                                    list(update_set),
+                                    cinder_devices.get(host_id))
 
     def _clear_ceph_stor_state(self, ihost_uuid):
         """ Once a node starts, clear status of OSD storage devices
@@ -5561,7 +5726,9 @@ class ConductorManager(service.PeriodicService):
             "classes": ['platform::drbd::runtime',
                         'openstack::cinder::runtime']
         }
-        self._config_apply_runtime_manifest(context, config_uuid, config_dict)
+        self._config_apply_runtime_manifest(
+            context, config_uuid, config_dict,
+            domains=[puppet_common.CONFIG_DOMAIN_DRBD])
 
     def update_external_cinder_config(self, context):
         """Update the manifests for Cinder External(shared) backend"""
@@ -7519,7 +7686,8 @@ class ConductorManager(service.PeriodicService):
             'file_content': file_content,
         }
 
-        self._config_update_file(context, config_uuid, config_dict)
+        self._config_update_file(context, config_uuid, config_dict,
+                                 domains=[puppet_common.CONFIG_DOMAIN_DNS])
 
     def _drbd_connected(self):
         connected = False
@@ -8175,12 +8343,17 @@ class ConductorManager(service.PeriodicService):
         return config_uuid
 
     def _config_update_puppet(self, config_uuid, config_dict, force=False,
-                              host_uuids=None):
+                              host_uuids=None, domains=None):
         """Regenerate puppet hiera data files for each affected host that is
            provisioned. If host_uuid is provided, only that host's puppet
-           hiera data file will be regenerated.
+           hiera data file will be regenerated. If configuration domains are
+           provided, only the hiera data of the puppet plugins depending on
+           them is regenerated.
+
+           Returns the set of hiera data files whose content changed.
         """
-        host_updated = False
+        changed_files = set()
+        update_hosts = []
 
         personalities = config_dict['personalities']
         if not host_uuids:
@@ -8199,8 +8372,7 @@ class ConductorManager(service.PeriodicService):
                     host.invprovision == constants.PROVISIONED or
                     (host.invprovision == constants.PROVISIONING and
                      host.personality == constants.CONTROLLER)):
-                    self._puppet.update_host_config(host, config_uuid)
-                    host_updated = True
+                    update_hosts.append(host)
                 else:
                     LOG.info(
                         "Cannot regenerate the configuration for %s, "
@@ -8209,14 +8381,21 @@ class ConductorManager(service.PeriodicService):
 
         # ensure the system configuration is also updated if hosts require
         # a reconfiguration
-        if host_updated:
-            self._puppet.update_system_config()
-            self._puppet.update_secure_system_config()
+        if update_hosts:
+            changed_files.update(self._puppet.update_hosts_config(
+                update_hosts, config_uuid,
+                workers=CONF.conductor.puppet_workers,
+                domains=domains))
+            changed_files.update(self._puppet.update_system_config(domains))
+            changed_files.update(
+                self._puppet.update_secure_system_config(domains))
+        return changed_files
 
     def _config_update_file(self,
                             context,
                             config_uuid,
-                            config_dict):
+                            config_dict,
+                            domains=None):
 
         """Apply the file on all hosts affected by supplied personalities.
 
@@ -8229,9 +8408,10 @@ class ConductorManager(service.PeriodicService):
         :           action: put(full replacement), patch
         :           action_key: match key (for patch only)
         :          }
+        :param domains: (optional) puppet configuration domains affected
         """
         # Ensure hiera data is updated prior to active apply.
-        self._config_update_puppet(config_uuid, config_dict)
+        self._config_update_puppet(config_uuid, config_dict, domains=domains)
 
         rpcapi = agent_rpcapi.AgentAPI()
         try:
@@ -8246,10 +8426,13 @@ class ConductorManager(service.PeriodicService):
                                        config_uuid,
                                        config_dict,
                                        host_uuids=None,
-                                       force=False):
+                                       force=False,
+                                       domains=None):
 
         """Apply manifests on all hosts affected by the supplied personalities.
-           If host_uuid is set, only update hiera data for that host
+           If host_uuid is set, only update hiera data for that host.
+           If domains is set, only the hiera data depending on these puppet
+           configuration domains is regenerated.
         """
 
         # Update hiera data for all hosts prior to runtime apply if host_uuid
@@ -8257,7 +8440,8 @@ class ConductorManager(service.PeriodicService):
         self._config_update_puppet(config_uuid,
                                    config_dict,
                                    host_uuids=host_uuids,
-                                   force=force)
+                                   force=force,
+                                   domains=domains)
 
         config_dict.update({'force': force})
         rpcapi = agent_rpcapi.AgentAPI()
@@ -9447,7 +9631,9 @@ class ConductorManager(service.PeriodicService):
             "classes": ['platform::snmp::runtime',
                         'platform::fm::runtime'],
         }
-        self._config_apply_runtime_manifest(context, config_uuid, config_dict)
+        self._config_apply_runtime_manifest(
+            context, config_uuid, config_dict,
+            domains=[puppet_common.CONFIG_DOMAIN_SNMP])
 
     def get_ceph_pools_config(self, context):
         return self._ceph.get_pools_config()
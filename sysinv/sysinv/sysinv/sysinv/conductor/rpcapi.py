@@ -313,6 +313,24 @@ class ConductorAPI(sysinv.openstack.common.rpc.proxy.RpcProxy):
                                        icpu_dict_array=icpu_dict_array,
                                        force_grub_update=force_grub_update))
 
+    def inventory_delta_update_by_ihost(self, context, ihost_uuid,
+                                        category, report):
+        """Apply a full or delta inventory report for an ihost.
+
+        :param context: an admin context
+        :param ihost_uuid: ihost uuid unique id
+        :param category: inventory category of the report
+        :param report: full or delta report of the category records
+        :returns: True if the report was applied, False if the agent must
+                  send a full report
+        """
+
+        return self.call(context,
+                         self.make_msg('inventory_delta_update_by_ihost',
+                                       ihost_uuid=ihost_uuid,
+                                       category=category,
+                                       report=report))
+
     def imemory_update_by_ihost(self, context,
                                 ihost_uuid, imemory_dict_array,
                                 force_update=False):
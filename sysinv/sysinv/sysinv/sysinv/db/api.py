@@ -163,7 +163,8 @@ class Connection(object):
 
     @abc.abstractmethod
     def ihost_get_list(self, limit=None, marker=None,
-                       sort_key=None, sort_dir=None, recordtype=None):
+                       sort_key=None, sort_dir=None, recordtype=None,
+                       fields=None):
         """Return a list of iHosts.
 
         :param limit: Maximum number of iHosts to return.
@@ -173,6 +174,7 @@ class Connection(object):
         :param sort_dir: direction in which results should be sorted.
                          (asc, desc)
         :param recordtype: recordtype to filter, default="standard"
+        :param fields: if set, only load these fields of the iHosts.
         """
 
     @abc.abstractmethod
@@ -192,6 +194,27 @@ class Connection(object):
             returns: A server
         """
 
+    @abc.abstractmethod
+    def ihost_get_ids_without_idisks(self):
+        """Return the ids of non-offline hosts that have no disks.
+
+        :returns: A set of ihost ids.
+        """
+
+    @abc.abstractmethod
+    def ihost_get_ids_without_ipvs(self):
+        """Return the ids of non-offline hosts that have no pvs.
+
+        :returns: A set of ihost ids.
+        """
+
+    @abc.abstractmethod
+    def ihost_get_ids_without_ilvgs(self):
+        """Return the ids of non-offline hosts that have no lvgs.
+
+        :returns: A set of ihost ids.
+        """
+
     @abc.abstractmethod
     def ihost_update(self, server, values):
         """Update properties of a server.
@@ -477,6 +500,16 @@ class Connection(object):
         :returns: A cpu.
         """
 
+    @abc.abstractmethod
+    def icpu_bulk_upsert(self, forihostid, values_list):
+        """Create or update the cpus of a host in a single transaction.
+
+        :param forihostid: The id or uuid of the host of the cpus.
+        :param values_list: List of dicts of cpu values, a cpu of the host
+                            with the same cpu number is updated.
+        :returns: A list of cpus, in the order of values_list.
+        """
+
     @abc.abstractmethod
     def icpu_destroy(self, cpu_id):
         """Destroy a cpu and all associated leaves.
@@ -598,6 +631,16 @@ class Connection(object):
         :returns: A memory.
         """
 
+    @abc.abstractmethod
+    def imemory_bulk_upsert(self, forihostid, values_list):
+        """Create or update the memory of a host in a single transaction.
+
+        :param forihostid: The id or uuid of the host of the memory.
+        :param values_list: List of dicts of memory values, the memory of
+                            the host with the same forinodeid is updated.
+        :returns: A list of memories, in the order of values_list.
+        """
+
     @abc.abstractmethod
     def imemory_destroy(self, memory_id):
         """Destroy a memory and all associated leaves.
@@ -814,6 +857,19 @@ class Connection(object):
         :returns: An ethernet port
         """
 
+    @abc.abstractmethod
+    def ethernet_port_bulk_upsert(self, hostid, values_list,
+                                  update_fields=None):
+        """Create or update ethernet ports in a single transaction.
+
+        :param hostid: The id or uuid of the host of the ports.
+        :param values_list: List of dicts of ethernet port values, the
+                            port with the same MAC address is updated.
+        :param update_fields: The fields updated on existing ports, all of
+                              the values if not given.
+        :returns: A list of ethernet ports, in the order of values_list.
+        """
+
     @abc.abstractmethod
     def ethernet_port_destroy(self, port_d):
         """Destroy an ethernet port
@@ -1203,6 +1259,16 @@ class Connection(object):
         :returns: A disk.
         """
 
+    @abc.abstractmethod
+    def idisk_bulk_upsert(self, forihostid, values_list):
+        """Create or update the disks of a host in a single transaction.
+
+        :param forihostid: The id or uuid of the host of the disks.
+        :param values_list: List of dicts of disk values, the disk of the
+                            host with the same uuid is updated.
+        :returns: A list of disks, in the order of values_list.
+        """
+
     @abc.abstractmethod
     def idisk_destroy(self, disk_id):
         """Destroy a disk and all associated leaves.
@@ -1219,6 +1285,16 @@ class Connection(object):
         :returns:  partitions.
         """
 
+    @abc.abstractmethod
+    def partition_get_transitory_ihost_ids(self, states):
+        """Return the ids of hosts owning partitions in a transitory state.
+
+        Partitions without start_mib or end_mib are also reported.
+
+        :param states: A list of partition status values.
+        :returns: A set of ihost ids.
+        """
+
     @abc.abstractmethod
     def partition_get(self, partition_id, forihostid=None):
         """Return a partition.
@@ -1455,6 +1531,13 @@ class Connection(object):
         :returns:  ilvg.
         """
 
+    @abc.abstractmethod
+    def ilvg_get_unprovisioned_ihost_ids(self):
+        """Return the ids of hosts owning an ilvg that is not provisioned.
+
+        :returns: A set of ihost ids.
+        """
+
     @abc.abstractmethod
     def ilvg_get_list(self, limit=None, marker=None,
                        sort_key=None, sort_dir=None):
@@ -1546,6 +1629,21 @@ class Connection(object):
         :returns:  ipv.
         """
 
+    @abc.abstractmethod
+    def ipv_get_unprovisioned_ihost_ids(self):
+        """Return the ids of hosts owning an ipv that is not provisioned.
+
+        :returns: A set of ihost ids.
+        """
+
+    @abc.abstractmethod
+    def ipv_get_device_paths_by_lvg_name(self, lvm_vg_name):
+        """Return the disk or partition device path of the pvs of a VG.
+
+        :param lvm_vg_name: The name of the volume group.
+        :returns: A dict of device paths keyed by ihost id.
+        """
+
     @abc.abstractmethod
     def ipv_get_list(self, limit=None, marker=None,
                        sort_key=None, sort_dir=None):
@@ -3566,6 +3664,19 @@ class Connection(object):
         :returns: A pci device
         """
 
+    @abc.abstractmethod
+    def pci_device_bulk_upsert(self, hostid, values_list,
+                               update_fields=None):
+        """Create or update the pci devices of a host in a single transaction.
+
+        :param hostid: The id or uuid of the host of the pci devices.
+        :param values_list: List of dicts of pci device values, the device
+                            of the host with the same PCI address is updated.
+        :param update_fields: The fields updated on existing devices, all of
+                              the values if not given.
+        :returns: A list of pci devices, in the order of values_list.
+        """
+
     @abc.abstractmethod
     def pci_device_destroy(self, deviceid):
         """Destroy a pci_device
@@ -4351,3 +4462,27 @@ class Connection(object):
 
         :param uuid: The uuid of an interface network association.
         """
+
+    @abc.abstractmethod
+    def config_generation_get(self, name):
+        """Return the current value of a config generation counter.
+
+        :param name: The name of the counter.
+        :returns: The generation, or 0 if the counter was never bumped.
+        """
+
+    @abc.abstractmethod
+    def config_generation_bump(self, name):
+        """Increment a config generation counter.
+
+        :param name: The name of the counter.
+        """
+
+    @abc.abstractmethod
+    def table_state_get(self, tables):
+        """Return the state of tables, which changes with their content.
+
+        :param tables: The names of the tables.
+        :returns: A list of (name, change counter, number of rows, latest
+                  created_at, latest updated_at) tuples, one per table.
+        """
@@ -21,8 +21,12 @@
 """SQLAlchemy storage backend."""
 
 
+import collections
+import copy
 import eventlet
+import functools
 import re
+import time
 
 from oslo_config import cfg
 from oslo_db import exception as db_exc
@@ -31,14 +35,18 @@ from oslo_db.sqlalchemy import enginefacade
 from oslo_db.sqlalchemy import utils as db_utils
 
 
+from sqlalchemy import event
+from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
 
 from sqlalchemy.orm.exc import DetachedInstanceError
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.exc import MultipleResultsFound
 from sqlalchemy.orm import with_polymorphic
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm import subqueryload
 from sqlalchemy.orm import contains_eager
 
@@ -49,6 +57,7 @@ from sysinv.common import utils
 from sysinv.db import api
 from sysinv.db.sqlalchemy import models
 from sysinv import objects
+from sysinv.objects import base as objects_base
 
 
 from sysinv.openstack.common import log
@@ -67,6 +76,29 @@ CONF.import_opt('journal_max_size',
 CONF.import_opt('journal_default_size',
                 'sysinv.api.controllers.v1.storage',
                 group='journal')
+CONF.import_opt('sysinv_api_conditional_get', 'sysinv.api')
+
+cache_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Cache the results of the hot lookups on the system, '
+                     'network, address, address pool and service parameter '
+                     'tables'),
+    cfg.IntOpt('max_entries',
+               default=256,
+               help='Maximum number of cached lookup results'),
+    cfg.IntOpt('ttl',
+               default=60,
+               help='Seconds a cached lookup result remains valid'),
+    cfg.FloatOpt('generation_interval',
+                 default=1,
+                 help='Minimum seconds between the checks of the system '
+                      'config generation bumped by the other processes. '
+                      'Entries changed by another process may be served '
+                      'for up to this long, 0 checks on every lookup'),
+]
+
+CONF.register_opts(cache_opts, group='db_cache')
 
 LOG = log.getLogger(__name__)
 
@@ -89,6 +121,213 @@ def get_backend():
     return Connection()
 
 
+def _count_statement(conn, cursor, statement, parameters, context,
+                     executemany):
+    thread_context = eventlet.greenthread.getcurrent()
+    thread_context._sysinv_query_count = \
+        getattr(thread_context, '_sysinv_query_count', 0) + 1
+
+
+def enable_query_count():
+    """Count the SQL statements executed by each green thread."""
+    if not event.contains(Engine, 'before_cursor_execute', _count_statement):
+        event.listen(Engine, 'before_cursor_execute', _count_statement)
+
+
+def get_query_count():
+    """Return the number of SQL statements executed by this green thread.
+
+    Statements are only counted once enable_query_count() was called.
+    """
+    thread_context = eventlet.greenthread.getcurrent()
+    return getattr(thread_context, '_sysinv_query_count', 0)
+
+
+def _query_stats_start(conn, cursor, statement, parameters, context,
+                       executemany):
+    thread_context = eventlet.greenthread.getcurrent()
+    if getattr(thread_context, '_sysinv_query_stats', None) is not None:
+        if context is not None:
+            context._sysinv_query_start = time.time()
+
+
+def _query_stats_record(conn, cursor, statement, parameters, context,
+                        executemany):
+    thread_context = eventlet.greenthread.getcurrent()
+    stats = getattr(thread_context, '_sysinv_query_stats', None)
+    if stats is not None:
+        start = getattr(context, '_sysinv_query_start', None)
+        stats.record(statement,
+                     time.time() - start if start is not None else 0.0)
+
+
+def enable_query_stats():
+    """Record the SQL statements executed by green threads with stats set."""
+    for identifier, fn in [('before_cursor_execute', _query_stats_start),
+                           ('after_cursor_execute', _query_stats_record)]:
+        if not event.contains(Engine, identifier, fn):
+            event.listen(Engine, identifier, fn)
+
+
+def set_query_stats(stats):
+    """Set the stats recording the SQL statements of this green thread.
+
+    The stats object is called with record(statement, elapsed) after each
+    statement.  Returns the stats previously set, or None.
+    """
+    thread_context = eventlet.greenthread.getcurrent()
+    previous = getattr(thread_context, '_sysinv_query_stats', None)
+    thread_context._sysinv_query_stats = stats
+    return previous
+
+
+def _bump_config_generation(func):
+    """Bump the system config generation once the decorated write succeeds.
+
+    The generation is used to invalidate data cached from the system
+    configuration, such as the generated helm chart overrides and the
+    lookup cache of the other processes.
+    """
+    @functools.wraps(func)
+    def _wrapper(self, *args, **kwargs):
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            _lookup_cache.invalidate()
+        self.config_generation_bump(constants.CONFIG_GENERATION_SYSTEM)
+        return result
+    return _wrapper
+
+
+def _bump_table_generation(*tables):
+    """Bump the change counters of tables once the decorated write succeeds.
+
+    The counters, named after the tables, are part of the table state
+    returned by table_state_get, from which the API computes the ETag of
+    the resources stored in the tables.  Created, updated and deleted rows
+    are seen from the row count and the latest created_at and updated_at of
+    the table, so only the writes that change none of them need a counter.
+    Nothing is bumped when the API does not compute ETags.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def _wrapper(self, *args, **kwargs):
+            result = func(self, *args, **kwargs)
+            if not CONF.sysinv_api_conditional_get:
+                return result
+            for table in tables:
+                try:
+                    self.config_generation_bump(table)
+                except db_exc.DBDuplicateEntry:
+                    # the counter was created by a concurrent write
+                    self.config_generation_bump(table)
+            return result
+        return _wrapper
+    return decorator
+
+
+class _LookupCache(object):
+    """Least recently used cache of lookup results, bounded by size and TTL.
+
+    Entries are dropped whenever this process writes the system config and
+    whenever the system config generation, bumped by the writes of any
+    process, changes.  Callers get a copy of the cached result.
+    """
+
+    @classmethod
+    def _copy(cls, result):
+        """Copy a cached result, sharing its immutable field values."""
+        if isinstance(result, list):
+            return [cls._copy(r) for r in result]
+        if not isinstance(result, objects_base.SysinvObject):
+            return copy.deepcopy(result)
+        obj = result.__class__()
+        for name in result.fields:
+            attrname = objects_base.get_attrname(name)
+            if hasattr(result, attrname):
+                value = getattr(result, attrname)
+                if isinstance(value, (dict, list, set)):
+                    value = copy.deepcopy(value)
+                setattr(obj, attrname, value)
+        return obj
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._version = 0
+        self._generation = None
+        self._checked = 0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self._entries.clear()
+        self._version += 1
+
+    def _check_generation(self, dbapi):
+        now = time.time()
+        if now - self._checked < CONF.db_cache.generation_interval:
+            return
+        generation = dbapi.config_generation_get(
+            constants.CONFIG_GENERATION_SYSTEM)
+        self._checked = now
+        if generation != self._generation:
+            self.invalidate()
+            self._generation = generation
+
+    def get(self, dbapi, key, load):
+        self._check_generation(dbapi)
+
+        now = time.time()
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[0] > now:
+            self._entries[key] = entry
+            self.hits += 1
+            return self._copy(entry[1])
+
+        self.misses += 1
+        version = self._version
+        result = load()
+        if version == self._version:
+            # not invalidated by a write while loading
+            self._entries[key] = (now + CONF.db_cache.ttl, result)
+            while len(self._entries) > CONF.db_cache.max_entries:
+                self._entries.popitem(last=False)
+        return self._copy(result)
+
+    def stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries)}
+
+
+_lookup_cache = _LookupCache()
+
+
+def _cached_lookup(func):
+    """Serve the decorated lookup from the lookup cache, when enabled.
+
+    Only lookups of tables whose writes are decorated with
+    _bump_config_generation may be cached.
+    """
+    @functools.wraps(func)
+    def _wrapper(self, *args, **kwargs):
+        if not CONF.db_cache.enabled:
+            return func(self, *args, **kwargs)
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return func(self, *args, **kwargs)
+        return _lookup_cache.get(self, key,
+                                 lambda: func(self, *args, **kwargs))
+    return _wrapper
+
+
+def get_cache_stats():
+    """Return the hit and miss counters of the lookup cache."""
+    return _lookup_cache.stats()
+
+
 def _session_for_read():
     _context = eventlet.greenthread.getcurrent()
     return enginefacade.reader.using(_context)
@@ -119,6 +358,82 @@ def _paginate_query(model, limit=None, marker=None, sort_key=None,
     return query.all()
 
 
+def _ihost_ids_without(model):
+    """Return the ids of non-offline standard hosts with no rows in model."""
+    owned = model_query(model.forihostid).\
+        filter(model.forihostid.isnot(None))
+    query = model_query(models.ihost.id).\
+        filter(models.ihost.recordtype == "standard").\
+        filter(models.ihost.availability !=
+               constants.AVAILABILITY_OFFLINE).\
+        filter(~models.ihost.id.in_(owned.subquery()))
+    return set(row.id for row in query.all())
+
+
+def _bulk_upsert(session, model, query, keys, values_list,
+                 update_fields=None):
+    """Insert or update a list of rows of a model in a single transaction.
+
+    The existing rows returned by query are loaded once and matched with
+    the values on the keys. Matched rows are updated and the other values
+    inserted, each with multi-row statements.
+
+    :param session: the write session of the transaction
+    :param query: query of the session returning the existing rows the
+                  values may match
+    :param keys: the fields identifying a row among the query rows
+    :param values_list: list of dicts of row values
+    :param update_fields: the fields written to existing rows, all of the
+                          values if not given
+    :returns: the rows of the values, in the same order
+    """
+    def row_key(values):
+        return tuple(values.get(k) for k in keys)
+
+    existing = {}
+    for row in query.all():
+        existing.setdefault(row_key(row), []).append(row['id'])
+
+    mapper = inspect(model)
+    updates = []
+    inserts = []
+    # the rows of the values, by id or by the uuid of the inserted rows
+    refs = []
+    for values in values_list:
+        ids = existing.get(row_key(values))
+        if ids:
+            refs.append(('id', ids[0]))
+            if update_fields is not None:
+                values = dict((k, v) for k, v in values.items()
+                              if k in update_fields)
+            updates.extend(dict(values, id=i) for i in ids)
+        else:
+            values = dict(values)
+            if not values.get('uuid'):
+                values['uuid'] = uuidutils.generate_uuid()
+            if mapper.polymorphic_on is not None:
+                # Bulk inserts skip setting the polymorphic identity
+                values.setdefault(mapper.polymorphic_on.key,
+                                  mapper.polymorphic_identity)
+            refs.append(('uuid', values['uuid']))
+            inserts.append(values)
+
+    if updates:
+        session.bulk_update_mappings(model, updates)
+    if inserts:
+        # Joined table inheritance needs the ids of the base table rows
+        session.bulk_insert_mappings(
+            model, inserts,
+            return_defaults=mapper.inherits is not None)
+    session.flush()
+
+    rows = {}
+    for row in query.populate_existing().all():
+        rows[('id', row['id'])] = row
+        rows[('uuid', row['uuid'])] = row
+    return [rows[r] for r in refs]
+
+
 def model_query(model, *args, **kwargs):
     """Query helper for simpler session usage.
 
@@ -215,13 +530,30 @@ def add_filter_by_many_identities(query, model, values):
         raise exception.InvalidIdentity(identity=value)
 
 
-def add_host_options(query):
-    return query. \
-        options(joinedload(models.ihost.system)). \
-        options(joinedload(models.ihost.host_upgrade).
-                joinedload(models.HostUpgrade.load_software)). \
-        options(joinedload(models.ihost.host_upgrade).
-                joinedload(models.HostUpgrade.load_target))
+# Host fields resolved from the relationships loaded by add_host_options
+HOST_SYSTEM_FIELDS = ['isystem_uuid']
+HOST_UPGRADE_FIELDS = ['software_load', 'target_load']
+
+
+def add_host_options(query, fields=None):
+    """Eager load the host relationships.
+
+    :param fields: if set, only load these columns, along with the
+                   relationships needed by these fields.
+    """
+    if fields is not None:
+        columns = set(inspect(models.ihost).column_attrs.keys())
+        query = query.options(load_only(
+            *[f for f in fields if f in columns]))
+    if fields is None or set(fields) & set(HOST_SYSTEM_FIELDS):
+        query = query.options(joinedload(models.ihost.system))
+    if fields is None or set(fields) & set(HOST_UPGRADE_FIELDS):
+        query = query. \
+            options(joinedload(models.ihost.host_upgrade).
+                    joinedload(models.HostUpgrade.load_software)). \
+            options(joinedload(models.ihost.host_upgrade).
+                    joinedload(models.HostUpgrade.load_target))
+    return query
 
 
 def add_inode_filter_by_ihost(query, value):
@@ -1131,6 +1463,7 @@ class Connection(api.Connection):
         return get_session(autocommit)
 
     @objects.objectify(objects.system)
+    @_bump_config_generation
     def isystem_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -1158,6 +1491,7 @@ class Connection(api.Connection):
 
         return result
 
+    @_cached_lookup
     @objects.objectify(objects.system)
     def isystem_get_one(self):
         query = model_query(models.isystem)
@@ -1187,6 +1521,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.system)
+    @_bump_config_generation
     def isystem_update(self, server, values):
         with _session_for_write() as session:
             query = model_query(models.isystem, session=session)
@@ -1197,6 +1532,7 @@ class Connection(api.Connection):
                 raise exception.ServerNotFound(server=server)
             return query.one()
 
+    @_bump_config_generation
     def isystem_destroy(self, server):
         with _session_for_write() as session:
             query = model_query(models.isystem, session=session)
@@ -1210,6 +1546,11 @@ class Connection(api.Connection):
             # skip cascade delete to leafs otherwise major issue!
             query.delete()
 
+    def _host_id(self, hostid):
+        if utils.is_int_like(hostid):
+            return int(hostid)
+        return self.ihost_get(hostid.strip())['id']
+
     def _host_get(self, server):
         query = model_query(models.ihost)
         query = add_host_options(query)
@@ -1220,6 +1561,7 @@ class Connection(api.Connection):
             raise exception.ServerNotFound(server=server)
 
     @objects.objectify(objects.host)
+    @_bump_config_generation
     def ihost_create(self, values, software_load=None):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -1240,9 +1582,10 @@ class Connection(api.Connection):
 
     @objects.objectify(objects.host)
     def ihost_get_list(self, limit=None, marker=None,
-                       sort_key=None, sort_dir=None, recordtype="standard"):
+                       sort_key=None, sort_dir=None, recordtype="standard",
+                       fields=None):
         query = model_query(models.ihost)
-        query = add_host_options(query)
+        query = add_host_options(query, fields)
         if recordtype:
             query = query.filter_by(recordtype=recordtype)
 
@@ -1279,6 +1622,15 @@ class Connection(api.Connection):
         return _paginate_query(models.ihost, limit, marker,
                                sort_key, sort_dir, query)
 
+    def ihost_get_ids_without_idisks(self):
+        return _ihost_ids_without(models.idisk)
+
+    def ihost_get_ids_without_ipvs(self):
+        return _ihost_ids_without(models.ipv)
+
+    def ihost_get_ids_without_ilvgs(self):
+        return _ihost_ids_without(models.ilvg)
+
     @objects.objectify(objects.host)
     def ihost_get_by_function(self, function,
                               limit=None, marker=None,
@@ -1319,6 +1671,7 @@ class Connection(api.Connection):
                 raise exception.ServerNotFound(server=server)
         return self._host_get(server)
 
+    @_bump_config_generation
     def ihost_destroy(self, server):
         with _session_for_write() as session:
             query = model_query(models.ihost, session=session)
@@ -1597,6 +1950,21 @@ class Connection(api.Connection):
                 raise exception.ServerNotFound(server=cpu_id)
             return query.one()
 
+    @objects.objectify(objects.cpu)
+    def icpu_bulk_upsert(self, forihostid, values_list):
+        forihostid = self._host_id(forihostid)
+        values_list = [dict(v, forihostid=forihostid) for v in values_list]
+
+        with _session_for_write() as session:
+            query = model_query(models.icpu, read_deleted="no",
+                                session=session).\
+                filter_by(forihostid=forihostid)
+            try:
+                return _bulk_upsert(session, models.icpu, query, ['cpu'],
+                                    values_list)
+            except db_exc.DBDuplicateEntry as e:
+                raise exception.CPUAlreadyExists(cpu=e.value)
+
     def icpu_destroy(self, cpu_id):
         with _session_for_write() as session:
             # Delete physically since it has unique columns
@@ -1716,6 +2084,23 @@ class Connection(api.Connection):
                 raise exception.ServerNotFound(server=memory_id)
             return query.one()
 
+    @objects.objectify(objects.memory)
+    def imemory_bulk_upsert(self, forihostid, values_list):
+        forihostid = self._host_id(forihostid)
+        values_list = [dict(v, forihostid=forihostid) for v in values_list]
+        for values in values_list:
+            values.pop('numa_node', None)
+
+        with _session_for_write() as session:
+            query = model_query(models.imemory, read_deleted="no",
+                                session=session).\
+                filter_by(forihostid=forihostid)
+            try:
+                return _bulk_upsert(session, models.imemory, query,
+                                    ['forinodeid'], values_list)
+            except db_exc.DBDuplicateEntry as e:
+                raise exception.MemoryAlreadyExists(uuid=e.value)
+
     def imemory_destroy(self, memory_id):
         with _session_for_write() as session:
             # Delete physically since it has unique columns
@@ -1822,6 +2207,24 @@ class Connection(api.Connection):
 
             return query.one()
 
+    @objects.objectify(objects.pci_device)
+    def pci_device_bulk_upsert(self, hostid, values_list,
+                               update_fields=None):
+        hostid = self._host_id(hostid)
+        values_list = [dict(v, host_id=hostid) for v in values_list]
+
+        with _session_for_write() as session:
+            query = model_query(models.PciDevice, read_deleted="no",
+                                session=session).\
+                filter_by(host_id=hostid)
+            try:
+                return _bulk_upsert(session, models.PciDevice, query,
+                                    ['pciaddr'], values_list,
+                                    update_fields=update_fields)
+            except db_exc.DBDuplicateEntry as e:
+                raise exception.PCIAddrAlreadyExists(pciaddr=e.value,
+                                                     host=hostid)
+
     def pci_device_destroy(self, device_id):
         with _session_for_write() as session:
             if uuidutils.is_uuid_like(device_id):
@@ -2026,6 +2429,25 @@ class Connection(api.Connection):
 
             return query.one()
 
+    @objects.objectify(objects.ethernet_port)
+    def ethernet_port_bulk_upsert(self, hostid, values_list,
+                                  update_fields=None):
+        hostid = self._host_id(hostid)
+        values_list = [dict(v, host_id=hostid) for v in values_list]
+
+        with _session_for_write() as session:
+            # Ports are identified by their MAC address across all hosts
+            query = model_query(models.EthernetPorts, read_deleted="no",
+                                session=session).\
+                filter(models.EthernetPorts.mac.in_(
+                    [v['mac'] for v in values_list]))
+            try:
+                return _bulk_upsert(session, models.EthernetPorts, query,
+                                    ['mac'], values_list,
+                                    update_fields=update_fields)
+            except db_exc.DBDuplicateEntry as e:
+                raise exception.MACAlreadyExists(mac=e.value, host=hostid)
+
     def ethernet_port_destroy(self, portid):
         with _session_for_write() as session:
             # Delete port which should cascade to delete EthernetPort
@@ -2184,6 +2606,7 @@ class Connection(api.Connection):
     def iinterface_destroy(self, iinterface_id):
         return self._interface_destroy(models.Interfaces, iinterface_id)
 
+    @_bump_config_generation
     def _interface_create(self, obj, forihostid, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -2300,6 +2723,9 @@ class Connection(api.Connection):
         query = add_interface_filter_by_ihost(query, ihost)
         return _paginate_query(cls, limit, marker, sort_key, sort_dir, query)
 
+    @_bump_config_generation
+    # updates of the subclass columns leave interfaces.updated_at unchanged
+    @_bump_table_generation('interfaces')
     def _interface_update(self, cls, interface_id, values):
         with _session_for_write() as session:
             entity = with_polymorphic(models.Interfaces, '*')
@@ -2363,6 +2789,7 @@ class Connection(api.Connection):
 
             return query.one()
 
+    @_bump_config_generation
     def _interface_destroy(self, cls, interface_id):
         with _session_for_write() as session:
             # Delete interface which should cascade to delete derived interfaces
@@ -2667,6 +3094,21 @@ class Connection(api.Connection):
                 raise exception.DiskNotFound(disk_id=disk_id)
             return query.one()
 
+    @objects.objectify(objects.disk)
+    def idisk_bulk_upsert(self, forihostid, values_list):
+        forihostid = self._host_id(forihostid)
+        values_list = [dict(v, forihostid=forihostid) for v in values_list]
+
+        with _session_for_write() as session:
+            query = model_query(models.idisk, read_deleted="no",
+                                session=session).\
+                filter_by(forihostid=forihostid)
+            try:
+                return _bulk_upsert(session, models.idisk, query, ['uuid'],
+                                    values_list)
+            except db_exc.DBDuplicateEntry as e:
+                raise exception.DiskAlreadyExists(uuid=e.value)
+
     def idisk_destroy(self, disk_id):
         with _session_for_write() as session:
             # Delete physically since it has unique columns
@@ -2705,6 +3147,16 @@ class Connection(api.Connection):
             query = query.filter_by(foripvid=foripvid)
         return query.all()
 
+    def partition_get_transitory_ihost_ids(self, states):
+        query = model_query(models.partition.forihostid).\
+            filter(or_(models.partition.status.in_(states),
+                       models.partition.start_mib.is_(None),
+                       models.partition.start_mib == 0,
+                       models.partition.end_mib.is_(None),
+                       models.partition.end_mib == 0)).\
+            distinct()
+        return set(row.forihostid for row in query.all())
+
     @objects.objectify(objects.partition)
     def partition_get(self, partition_id, forihostid=None):
         return self._partition_get(partition_id, forihostid)
@@ -3103,6 +3555,13 @@ class Connection(api.Connection):
     def ilvg_get(self, ilvg_id):
         return self._lvg_get(ilvg_id)
 
+    def ilvg_get_unprovisioned_ihost_ids(self):
+        query = model_query(models.ilvg.forihostid).\
+            filter(or_(models.ilvg.vg_state != constants.PROVISIONED,
+                       models.ilvg.vg_state.is_(None))).\
+            distinct()
+        return set(row.forihostid for row in query.all())
+
     @objects.objectify(objects.lvg)
     def ilvg_get_list(self, limit=None, marker=None,
                       sort_key=None, sort_dir=None):
@@ -3183,6 +3642,20 @@ class Connection(api.Connection):
     def ipv_get(self, ipv_id):
         return self._pv_get(ipv_id)
 
+    def ipv_get_unprovisioned_ihost_ids(self):
+        query = model_query(models.ipv.forihostid).\
+            filter(or_(models.ipv.pv_state != constants.PROVISIONED,
+                       models.ipv.pv_state.is_(None))).\
+            distinct()
+        return set(row.forihostid for row in query.all())
+
+    def ipv_get_device_paths_by_lvg_name(self, lvm_vg_name):
+        query = model_query(models.ipv.forihostid,
+                            models.ipv.disk_or_part_device_path).\
+            filter_by(lvm_vg_name=lvm_vg_name)
+        return dict((row.forihostid, row.disk_or_part_device_path)
+                    for row in query.all())
+
     @objects.objectify(objects.pv)
     def ipv_get_list(self, limit=None, marker=None,
                      sort_key=None, sort_dir=None):
@@ -3836,6 +4309,7 @@ class Connection(api.Connection):
             raise exception.ServerNotFound(server=ceph_mon_id)
 
     @objects.objectify(objects.ceph_mon)
+    @_bump_config_generation
     def ceph_mon_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -3873,6 +4347,7 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     @objects.objectify(objects.ceph_mon)
+    @_bump_config_generation
     def ceph_mon_update(self, ceph_mon_id, values):
         with _session_for_write() as session:
             query = model_query(models.CephMon, session=session)
@@ -3883,6 +4358,7 @@ class Connection(api.Connection):
                 raise exception.ServerNotFound(server=ceph_mon_id)
             return query.one()
 
+    @_bump_config_generation
     def ceph_mon_destroy(self, ceph_mon_id):
         with _session_for_write() as session:
             query = model_query(models.CephMon, session=session)
@@ -3933,6 +4409,7 @@ class Connection(api.Connection):
         return self._storage_tier_query(values)
 
     @objects.objectify(objects.storage_tier)
+    @_bump_config_generation
     def storage_tier_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -3948,6 +4425,7 @@ class Connection(api.Connection):
             return self._storage_tier_get(values['uuid'])
 
     @objects.objectify(objects.storage_tier)
+    @_bump_config_generation
     def storage_tier_update(self, storage_tier_uuid, values):
         with _session_for_write() as session:
             storage_tier = self._storage_tier_get(storage_tier_uuid,
@@ -3980,6 +4458,7 @@ class Connection(api.Connection):
                       "return an empty storage_tier list.")
         return storage_tier_list
 
+    @_bump_config_generation
     def storage_tier_destroy(self, storage_tier_uuid):
         query = model_query(models.StorageTier)
         query = add_identity_filter(query, storage_tier_uuid)
@@ -4007,6 +4486,7 @@ class Connection(api.Connection):
                 err="Invalid backend setting: %s" % values['backend'])
         return self._storage_backend_create(backend, values)
 
+    @_bump_config_generation
     def _storage_backend_create(self, obj, values):
 
         if not values.get('uuid'):
@@ -4168,6 +4648,7 @@ class Connection(api.Connection):
             else:
                 return self._storage_backend_update(models.StorageBackend, storage_backend_id, values)
 
+    @_bump_config_generation
     def _storage_backend_update(self, cls, storage_backend_id, values):
         with _session_for_write() as session:
             entity = with_polymorphic(models.StorageBackend, '*')
@@ -4200,6 +4681,7 @@ class Connection(api.Connection):
     def storage_backend_destroy(self, storage_backend_id):
         return self._storage_backend_destroy(models.StorageBackend, storage_backend_id)
 
+    @_bump_config_generation
     def _storage_backend_destroy(self, cls, storage_backend_id):
         with _session_for_write():
             # Delete storage_backend which should cascade to delete derived backends
@@ -4519,6 +5001,7 @@ class Connection(api.Connection):
             raise exception.ServiceNotFound(service=name)
 
     @objects.objectify(objects.service)
+    @_bump_config_generation
     def service_create(self, values):
         service = models.Services()
         service.update(values)
@@ -4558,6 +5041,7 @@ class Connection(api.Connection):
         return query.all()
 
     @objects.objectify(objects.service)
+    @_bump_config_generation
     def service_update(self, name, values):
         with _session_for_write() as session:
             query = model_query(models.Services, session=session)
@@ -4568,6 +5052,7 @@ class Connection(api.Connection):
                 raise exception.ServiceNotFound(service=name)
             return query.one()
 
+    @_bump_config_generation
     def service_destroy(self, service):
         with _session_for_write() as session:
             query = model_query(models.Services, session=session)
@@ -4637,6 +5122,7 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     @objects.objectify(objects.network)
+    @_bump_config_generation
     def network_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -4657,6 +5143,7 @@ class Connection(api.Connection):
     def network_get_by_id(self, network_id):
         return self._network_get_by_id(network_id)
 
+    @_cached_lookup
     @objects.objectify(objects.network)
     def network_get_by_type(self, networktype):
         return self._network_get_by_type(networktype)
@@ -4687,6 +5174,7 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     @objects.objectify(objects.network)
+    @_bump_config_generation
     def network_update(self, network_uuid, values):
         with _session_for_write() as session:
             query = model_query(models.Networks, session=session)
@@ -4697,6 +5185,7 @@ class Connection(api.Connection):
                 raise exception.NetworkNotFound(network_uuid=network_uuid)
             return query.one()
 
+    @_bump_config_generation
     def network_destroy(self, network_uuid):
         query = model_query(models.Networks)
         query = add_identity_filter(query, network_uuid)
@@ -4761,6 +5250,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.interface_network)
+    @_bump_config_generation
     def interface_network_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -4800,6 +5290,7 @@ class Connection(api.Connection):
         return self._interface_network_get_by_interface(
             interface_id, limit, marker, sort_key, sort_dir)
 
+    @_bump_config_generation
     def interface_network_destroy(self, uuid):
         query = model_query(models.InterfaceNetworks)
         query = add_identity_filter(query, uuid)
@@ -4833,6 +5324,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.address)
+    @_bump_config_generation
     def address_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -4850,6 +5342,7 @@ class Connection(api.Connection):
     def address_get(self, address_uuid):
         return self._address_get(address_uuid)
 
+    @_cached_lookup
     @objects.objectify(objects.address)
     def address_get_by_name(self, name):
         query = model_query(models.Addresses)
@@ -4871,6 +5364,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.address)
+    @_bump_config_generation
     def address_update(self, address_uuid, values):
         with _session_for_write() as session:
             query = model_query(models.Addresses, session=session)
@@ -4961,6 +5455,7 @@ class Connection(api.Connection):
                                                 limit, marker,
                                                 sort_key, sort_dir)
 
+    @_bump_config_generation
     def address_destroy(self, address_uuid):
         query = model_query(models.Addresses)
         query = add_identity_filter(query, address_uuid)
@@ -4970,6 +5465,7 @@ class Connection(api.Connection):
             raise exception.AddressNotFound(address_uuid=address_uuid)
         query.delete()
 
+    @_bump_config_generation
     def address_remove_interface(self, address_uuid):
         query = model_query(models.Addresses)
         query = add_identity_filter(query, address_uuid)
@@ -4980,6 +5476,7 @@ class Connection(api.Connection):
         query.update({models.Addresses.interface_id: None},
                      synchronize_session='fetch')
 
+    @_bump_config_generation
     def addresses_destroy_by_interface(self, interface_id, family=None):
         query = model_query(models.Addresses)
         query = query.filter(models.Addresses.interface_id == interface_id)
@@ -4987,6 +5484,7 @@ class Connection(api.Connection):
             query = query.filter(models.Addresses.family == family)
         query.delete()
 
+    @_bump_config_generation
     def addresses_remove_interface_by_interface(self, interface_id,
                                                 family=None):
         query = model_query(models.Addresses)
@@ -5191,6 +5689,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.address_pool)
+    @_bump_config_generation
     def address_pool_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -5221,6 +5720,7 @@ class Connection(api.Connection):
             address_pool.ranges.append(new_range)
 
     @objects.objectify(objects.address_pool)
+    @_bump_config_generation
     def address_pool_update(self, address_pool_uuid, values):
         with _session_for_write() as session:
             address_pool = self._address_pool_get(address_pool_uuid,
@@ -5235,6 +5735,7 @@ class Connection(api.Connection):
 
             return address_pool
 
+    @_cached_lookup
     @objects.objectify(objects.address_pool)
     def address_pool_get(self, address_pool_uuid):
         return self._address_pool_get(address_pool_uuid)
@@ -5278,6 +5779,7 @@ class Connection(api.Connection):
             )
         return result
 
+    @_bump_config_generation
     def address_pool_destroy(self, address_pool_uuid):
         query = model_query(models.AddressPools)
         query = add_identity_filter(query, address_pool_uuid)
@@ -6324,6 +6826,7 @@ class Connection(api.Connection):
             return query.one()
 
     @objects.objectify(objects.service_parameter)
+    @_bump_config_generation
     def service_parameter_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -6391,6 +6894,7 @@ class Connection(api.Connection):
         return _paginate_query(models.ServiceParameter, limit, marker,
                                sort_key, sort_dir, query)
 
+    @_cached_lookup
     @objects.objectify(objects.service_parameter)
     def service_parameter_get_all(self, uuid=None, service=None,
                                   section=None, name=None, limit=None,
@@ -6408,6 +6912,7 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     @objects.objectify(objects.service_parameter)
+    @_bump_config_generation
     def service_parameter_update(self, uuid, values):
         with _session_for_write() as session:
             query = model_query(models.ServiceParameter, session=session)
@@ -6419,6 +6924,7 @@ class Connection(api.Connection):
             session.flush()
             return query.one()
 
+    @_bump_config_generation
     def service_parameter_destroy_uuid(self, id):
         with _session_for_write() as session:
             query = model_query(models.ServiceParameter, session=session)
@@ -6431,6 +6937,7 @@ class Connection(api.Connection):
 
             query.delete()
 
+    @_bump_config_generation
     def service_parameter_destroy(self, name, service, section):
         if not name or not service or not section:
             raise exception.NotFound()
@@ -7296,6 +7803,7 @@ class Connection(api.Connection):
             query.delete()
 
     @objects.objectify(objects.certificate)
+    @_bump_config_generation
     def certificate_create(self, values):
 
         if not values.get('uuid'):
@@ -7352,6 +7860,7 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     @objects.objectify(objects.certificate)
+    @_bump_config_generation
     def certificate_update(self, uuid, values):
         with _session_for_write() as session:
             query = model_query(models.certificate, session=session)
@@ -7362,6 +7871,7 @@ class Connection(api.Connection):
                 raise exception.CertificateNotFound(uuid)
             return query.one()
 
+    @_bump_config_generation
     def certificate_destroy(self, uuid):
         with _session_for_write() as session:
             query = model_query(models.certificate, session=session)
@@ -7383,6 +7893,7 @@ class Connection(api.Connection):
                                                  namespace=namespace)
 
     @objects.objectify(objects.helm_overrides)
+    @_bump_config_generation
     def helm_override_create(self, values):
 
         overrides = models.HelmOverrides()
@@ -7410,6 +7921,7 @@ class Connection(api.Connection):
         return query.all()
 
     @objects.objectify(objects.helm_overrides)
+    @_bump_config_generation
     def helm_override_update(self, name, namespace, values):
         with _session_for_write() as session:
             query = model_query(models.HelmOverrides, session=session)
@@ -7421,6 +7933,7 @@ class Connection(api.Connection):
                                                      namespace=namespace)
             return query.one()
 
+    @_bump_config_generation
     def helm_override_destroy(self, name, namespace):
         with _session_for_write() as session:
             query = model_query(models.HelmOverrides, session=session)
@@ -7444,6 +7957,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.label)
+    @_bump_config_generation
     def label_create(self, host_uuid, values):
 
         if not values.get('uuid'):
@@ -7483,6 +7997,7 @@ class Connection(api.Connection):
         return query.all()
 
     @objects.objectify(objects.label)
+    @_bump_config_generation
     def label_update(self, uuid, values):
         with _session_for_write() as session:
             query = model_query(models.Label, session=session)
@@ -7493,6 +8008,7 @@ class Connection(api.Connection):
                 raise exception.HostLabelNotFound(uuid)
             return query.one()
 
+    @_bump_config_generation
     def label_destroy(self, uuid):
         with _session_for_write() as session:
             query = model_query(models.Label, session=session)
@@ -7628,6 +8144,7 @@ class Connection(api.Connection):
 
         return result
 
+    @_bump_config_generation
     def _datanetwork_create(self, obj, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -7704,6 +8221,7 @@ class Connection(api.Connection):
                                sort_key, sort_dir, query)
 
     @objects.objectify(objects.datanetwork)
+    @_bump_config_generation
     def datanetwork_update(self, datanetwork_uuid, values):
         with _session_for_write() as session:
             query = model_query(models.DataNetworks, session=session)
@@ -7715,6 +8233,7 @@ class Connection(api.Connection):
                     datanetwork_uuid=datanetwork_uuid)
             return query.one()
 
+    @_bump_config_generation
     def datanetwork_destroy(self, datanetwork_uuid):
         query = model_query(models.DataNetworks)
         query = add_identity_filter(query, datanetwork_uuid)
@@ -7793,6 +8312,7 @@ class Connection(api.Connection):
         return result
 
     @objects.objectify(objects.interface_datanetwork)
+    @_bump_config_generation
     def interface_datanetwork_create(self, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -7840,6 +8360,7 @@ class Connection(api.Connection):
         return self._interface_datanetwork_get_by_datanetwork(
             datanetwork_id, limit, marker, sort_key, sort_dir)
 
+    @_bump_config_generation
     def interface_datanetwork_destroy(self, uuid):
         query = model_query(models.InterfaceDataNetworks)
         query = add_identity_filter(query, uuid)
@@ -7852,3 +8373,40 @@ class Connection(api.Connection):
     @objects.objectify(objects.interface_datanetwork)
     def interface_datanetwork_query(self, values):
         return self._interface_datanetwork_query(values)
+
+    def config_generation_get(self, name):
+        query = model_query(models.ConfigGeneration)
+        result = query.filter_by(name=name).first()
+        if result is None:
+            return 0
+        return result.generation
+
+    def config_generation_bump(self, name):
+        with _session_for_write() as session:
+            query = model_query(models.ConfigGeneration, session=session)
+            query = query.filter_by(name=name)
+            count = query.update(
+                {'generation': models.ConfigGeneration.generation + 1},
+                synchronize_session=False)
+            if count == 0:
+                generation = models.ConfigGeneration()
+                generation.update({'name': name, 'generation': 1})
+                session.add(generation)
+                session.flush()
+
+    def table_state_get(self, tables):
+        with _session_for_read() as session:
+            query = model_query(models.ConfigGeneration, session=session)
+            query = query.filter(models.ConfigGeneration.name.in_(tables))
+            generations = dict((g.name, g.generation) for g in query)
+
+            state = []
+            for name in tables:
+                table = models.Base.metadata.tables[name]
+                count, created_at, updated_at = session.query(
+                    func.count(),
+                    func.max(table.c.created_at),
+                    func.max(table.c.updated_at)).select_from(table).one()
+                state.append((name, generations.get(name, 0), count,
+                              created_at, updated_at))
+            return state
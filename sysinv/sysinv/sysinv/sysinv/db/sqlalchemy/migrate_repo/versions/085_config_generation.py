@@ -0,0 +1,51 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from datetime import datetime
+from sqlalchemy import DateTime, String, Integer
+from sqlalchemy import Column, MetaData, Table
+from sysinv.common import constants
+
+ENGINE = 'InnoDB'
+CHARSET = 'utf8'
+
+
+def upgrade(migrate_engine):
+    """
+       This database upgrade creates a new table for storing the generation
+       counters that are bumped on configuration changes.
+    """
+
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    config_generation = Table(
+        'config_generation',
+        meta,
+        Column('created_at', DateTime),
+        Column('updated_at', DateTime),
+        Column('id', Integer, primary_key=True),
+        Column('name', String(255), unique=True, nullable=False),
+        Column('generation', Integer, nullable=False, default=0),
+
+        mysql_engine=ENGINE,
+        mysql_charset=CHARSET,
+    )
+
+    config_generation.create()
+
+    # Create the system counter up front so that it is only ever updated
+    config_generation.insert().execute(
+        {'created_at': datetime.now(),
+         'name': constants.CONFIG_GENERATION_SYSTEM,
+         'generation': 0})
+
+
+def downgrade(migrate_engine):
+    # As per other openstack components, downgrade is
+    # unsupported in this release.
+    raise NotImplementedError('SysInv database downgrade is unsupported.')
@@ -1700,3 +1700,11 @@ class KubeApp(Base):
     manifest_file = Column(String(255), nullable=False)
     status = Column(String(255), nullable=False)
     progress = Column(String(255), nullable=True)
+
+
+class ConfigGeneration(Base):
+    __tablename__ = 'config_generation'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), unique=True, nullable=False)
+    generation = Column(Integer, nullable=False, default=0)
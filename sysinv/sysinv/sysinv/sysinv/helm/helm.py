@@ -8,28 +8,62 @@
 
 from __future__ import absolute_import
 
+import copy
 import eventlet
 import os
 import subprocess
 import tempfile
 import yaml
 
+from oslo_config import cfg
 from six import iteritems
-from stevedore import extension
+from six.moves import collections_abc
 from sysinv.common import constants
 from sysinv.common import exception
+from sysinv.common import extension_manager
+from sysinv.common import profiler
+from sysinv.common import utils
 from sysinv.openstack.common import log as logging
 from sysinv.helm import common
+from sysinv.helm import utils as helm_utils
 
 
 LOG = logging.getLogger(__name__)
 
+helm_opts = [
+    cfg.BoolOpt('verify_overrides_merge',
+                default=False,
+                help='Verify the merged helm chart overrides against the '
+                     'values computed by helm install --dry-run'),
+    cfg.IntOpt('workers',
+               default=1,
+               help='Maximum number of charts of an application for which '
+                    'overrides are generated concurrently'),
+    cfg.IntOpt('overrides_cache_size',
+               default=256,
+               help='Maximum number of generated chart overrides kept in '
+                    'memory, 0 disables the cache'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(helm_opts, group='helm')
+
 # Number of characters to strip off from helm plugin name defined in setup.cfg,
 # in order to allow controlling the order of the helm plugins, without changing
 # the names of the plugins.
 # The convention here is for the helm plugins to be named ###_PLUGINNAME.
 HELM_PLUGIN_PREFIX_LENGTH = 4
 
+# Inventory tables read by the chart plugins.  They are written by the
+# inventory reports of the agents, so their writes do not bump the system
+# config generation and the overrides cache is keyed on their state.
+HELM_INVENTORY_TABLES = ['i_icpu', 'pci_devices', 'ports']
+
+# Host columns read by the chart plugins.  The other columns, e.g. the
+# availability and uptime, are updated continuously by maintenance.
+HELM_HOST_FIELDS = ['id', 'hostname', 'personality', 'subfunctions',
+                    'invprovision']
+
 
 def helm_context(func):
     """Decorate to initialize the local threading context"""
@@ -41,6 +75,53 @@ def helm_context(func):
     return _wrapper
 
 
+class _ChartContext(collections_abc.MutableMapping):
+    """The helm context of a chart generated in its own green thread.
+
+    The context of the caller is only read, the values set by the chart
+    plugins are kept in the chart context.  The dicts, lists and sets read
+    from the caller are copied on first access, so that the plugins updating
+    them in place do not modify the context of the caller either.
+    """
+
+    def __init__(self, parent):
+        self._parent = parent
+        self._local = {}
+
+    def __getitem__(self, key):
+        if key in self._local:
+            return self._local[key]
+        value = self._parent[key]
+        if isinstance(value, (dict, list, set)):
+            value = copy.copy(value)
+            self._local[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._local[key] = value
+
+    def __delitem__(self, key):
+        del self._local[key]
+
+    def __iter__(self):
+        return iter(set(self._parent) | set(self._local))
+
+    def __len__(self):
+        return len(set(self._parent) | set(self._local))
+
+    def merge(self):
+        """Add the values looked up by the chart to the caller's context.
+
+        Only called from the green thread of the caller.
+        """
+        for key, value in self._local.items():
+            current = self._parent.setdefault(key, value)
+            if (current is not value and isinstance(current, dict) and
+                    isinstance(value, dict)):
+                for k, v in value.items():
+                    current.setdefault(k, v)
+
+
 class HelmOperator(object):
     """Class to encapsulate helm override operations for System Inventory"""
 
@@ -51,8 +132,17 @@ class HelmOperator(object):
         self.dbapi = dbapi
         self.path = path
 
-        # register chart operators for lookup
-        self.chart_operators = {}
+        self._digests = utils.DigestIndex(path)
+
+        self.profiler = profiler.PluginProfiler('helm')
+
+        # generated chart overrides keyed by chart, namespace and the
+        # state of the config they were generated from
+        self._overrides_cache = utils.LRUCache(CONF.helm.overrides_cache_size)
+
+        # register chart operators for lookup, the chart plugins are only
+        # loaded when they are first used
+        self.chart_operators = extension_manager.LazyPluginMap()
 
         # dict containing sequence of helm charts per app
         self.helm_applications = self.get_helm_applications()
@@ -61,18 +151,19 @@ class HelmOperator(object):
         """Build a dictionary of supported helm applications"""
 
         helm_application_dict = {}
-        helm_applications = extension.ExtensionManager(namespace='systemconfig.helm_applications')
-        for entry_point in helm_applications.list_entry_points():
+        helm_applications = extension_manager.LazyExtensionManager(
+            namespace='systemconfig.helm_applications')
+        for entry_point in helm_applications:
             helm_application_dict[entry_point.name] = entry_point.module_name
 
         supported_helm_applications = {}
         for name, namespace in helm_application_dict.items():
             supported_helm_applications[name] = []
-            helm_plugins = extension.ExtensionManager(namespace=namespace, invoke_on_load=True, invoke_args=(self,))
-            sorted_helm_plugins = sorted(helm_plugins.extensions, key=lambda x: x.name)
-            for plugin in sorted_helm_plugins:
+            helm_plugins = extension_manager.LazyExtensionManager(
+                namespace=namespace, invoke_args=(self,))
+            for plugin in helm_plugins:
                 plugin_name = plugin.name[HELM_PLUGIN_PREFIX_LENGTH:]
-                self.chart_operators.update({plugin_name: plugin.obj})
+                self.chart_operators.update({plugin_name: plugin})
                 # Remove duplicates, keeping last occurrence only
                 if plugin_name in supported_helm_applications[name]:
                     supported_helm_applications[name].remove(plugin_name)
@@ -142,14 +233,57 @@ class HelmOperator(object):
         """
         overrides = {}
         if chart_name in self.chart_operators:
+            key = self._get_overrides_cache_key(chart_name, cnamespace)
+            cached = self._overrides_cache.get(key)
+            if cached is not None:
+                LOG.debug("Using cached overrides for chart %s" % chart_name)
+                return copy.deepcopy(cached)
             try:
-                overrides.update(
-                    self.chart_operators[chart_name].get_overrides(
-                        cnamespace))
+                with self.profiler.measure('get_overrides', chart_name):
+                    overrides.update(
+                        self.chart_operators[chart_name].get_overrides(
+                            cnamespace))
             except exception.InvalidHelmNamespace:
                 raise
+            if key is not None:
+                self._overrides_cache.put(key, copy.deepcopy(overrides))
         return overrides
 
+    def _get_overrides_cache_key(self, chart_name, cnamespace):
+        """Get the overrides cache key for a chart.
+
+        The config state is read once per helm context, before any
+        overrides are generated, so that concurrent config changes can only
+        cause a cache miss.
+        """
+        if self.dbapi is None or self._overrides_cache.maxsize <= 0:
+            return None
+        return (chart_name, cnamespace, self._get_context_config_state())
+
+    def _get_context_config_state(self):
+        """Get the config state of the current helm context."""
+        state = self.context.get('_config_state')
+        if state is None:
+            state = self._get_config_state()
+            self.context['_config_state'] = state
+        return state
+
+    def _get_config_state(self):
+        """Get the state of the config read by the chart plugins.
+
+        The writes to the system config tables bump the system config
+        generation, the inventory tables are tracked by their row counts
+        and timestamps and the hosts by the columns read by the plugins.
+        """
+        generation = self.dbapi.config_generation_get(
+            constants.CONFIG_GENERATION_SYSTEM)
+        tables = self.dbapi.table_state_get(HELM_INVENTORY_TABLES)
+        hosts = self.dbapi.ihost_get_list(fields=HELM_HOST_FIELDS)
+        return (generation,
+                tuple(tables),
+                tuple(sorted(tuple(h[f] for f in HELM_HOST_FIELDS)
+                             for h in hosts)))
+
     def get_helm_application_namespaces(self, app_name):
         """Get supported application namespaces.
 
@@ -221,14 +355,31 @@ class HelmOperator(object):
         """
         overrides = {}
         if app_name in self.helm_applications:
-            for chart_name in self.helm_applications[app_name]:
+            # Charts are generated in separate green threads, each with its
+            # own context reading the context of the caller.  The values
+            # looked up by a chart are added to the context of the caller
+            # once it completes, so the charts generated after it reuse them.
+            context = self.context
+            if self.dbapi is not None and self._overrides_cache.maxsize > 0:
+                self._get_context_config_state()
+
+            def _get_chart_overrides(chart_name):
+                chart_context = _ChartContext(context)
+                thread_context = eventlet.greenthread.getcurrent()
+                setattr(thread_context, '_helm_context', chart_context)
                 try:
-                    overrides.update({chart_name:
-                                      self._get_helm_chart_overrides(
-                                          chart_name,
-                                          cnamespace)})
+                    return chart_name, chart_context, \
+                        self._get_helm_chart_overrides(chart_name, cnamespace)
                 except exception.InvalidHelmNamespace as e:
                     LOG.info(e)
+                    return chart_name, chart_context, None
+
+            pool = eventlet.GreenPool(max(1, CONF.helm.workers))
+            for chart_name, chart_context, chart_overrides in pool.imap(
+                    _get_chart_overrides, self.helm_applications[app_name]):
+                chart_context.merge()
+                if chart_overrides is not None:
+                    overrides.update({chart_name: chart_overrides})
         return overrides
 
     def _get_helm_chart_location(self, chart_name):
@@ -272,10 +423,29 @@ class HelmOperator(object):
     def merge_overrides(self, file_overrides=[], set_overrides=[]):
         """ Merge helm overrides together.
 
-        :param values: A dict of different types of user override values,
-                       'files' (which generally specify many overrides) and
-                       'set' (which generally specify one override).
+        The values are merged in process with the same semantics as helm:
+        values files are applied in order, followed by the --set overrides.
+
+        :param file_overrides: A list of yaml documents of override values
+                               (which generally specify many overrides).
+        :param set_overrides: A list of helm --set strings (which generally
+                              specify one override).
+        :returns: the merged overrides as a yaml document
         """
+        values = helm_utils.merge_overrides(file_overrides, set_overrides)
+
+        if CONF.helm.verify_overrides_merge:
+            helm_values = self._helm_merge_overrides(file_overrides,
+                                                     set_overrides)
+            if yaml.load(helm_values) != (values or None):
+                LOG.error("Helm overrides merge mismatch: computed %s, "
+                          "helm %s" % (values, helm_values))
+                return helm_values
+
+        return yaml.dump(values, default_flow_style=False)
+
+    def _helm_merge_overrides(self, file_overrides=[], set_overrides=[]):
+        """ Merge helm overrides together by calling out to helm."""
 
         # At this point we have potentially two separate types of overrides
         # specified by system or user, values from files and values passed in
@@ -340,22 +510,24 @@ class HelmOperator(object):
 
         :param chart_name: name of a supported chart
         :param cnamespace: (optional) namespace
+        :returns: set of overrides files whose content changed
         """
 
+        changed_files = set()
         if chart_name in self.chart_operators:
             namespaces = self.chart_operators[chart_name].get_namespaces()
             if cnamespace and cnamespace not in namespaces:
                 LOG.exception("The %s chart does not support namespace: %s" %
                               (chart_name, cnamespace))
-                return
+                return changed_files
 
             try:
                 overrides = self._get_helm_chart_overrides(
                     chart_name,
                     cnamespace)
-                self._write_chart_overrides(chart_name,
-                                            cnamespace,
-                                            overrides)
+                changed_files.update(self._write_chart_overrides(chart_name,
+                                                                 cnamespace,
+                                                                 overrides))
             except Exception as e:
                 LOG.exception("failed to create chart overrides for %s: %s" %
                               (chart_name, e))
@@ -363,15 +535,17 @@ class HelmOperator(object):
             LOG.exception("%s chart is not supported" % chart_name)
         else:
             LOG.exception("chart name is required")
+        return changed_files
 
     @helm_context
     def generate_meta_overrides(self, chart_name, chart_namespace):
         overrides = {}
         if chart_name in self.chart_operators:
             try:
-                overrides.update(
-                    self.chart_operators[chart_name].get_meta_overrides(
-                        chart_namespace))
+                with self.profiler.measure('get_meta_overrides', chart_name):
+                    overrides.update(
+                        self.chart_operators[chart_name].get_meta_overrides(
+                            chart_namespace))
             except exception.InvalidHelmNamespace:
                 raise
         return overrides
@@ -394,8 +568,10 @@ class HelmOperator(object):
                               instead of helm format (with extra header)
         :param combined: (optional) whether to apply user overrides on top of
                          system overrides
+        :returns: set of overrides files whose content changed
         """
 
+        changed_files = set()
         if app_name in self.helm_applications:
             app_overrides = self._get_helm_application_overrides(app_name,
                                                                  cnamespace)
@@ -438,7 +614,8 @@ class HelmOperator(object):
                         new_overrides = self._add_armada_override_header(
                             chart_name, key, overrides[key])
                         overrides[key] = new_overrides
-                self._write_chart_overrides(chart_name, cnamespace, overrides)
+                changed_files.update(self._write_chart_overrides(
+                    chart_name, cnamespace, overrides))
 
                 # Write any meta-overrides for this chart.  These will be in
                 # armada format already.
@@ -447,13 +624,14 @@ class HelmOperator(object):
                                                              cnamespace)
                     if overrides:
                         chart_meta_name = chart_name + '-meta'
-                        self._write_chart_overrides(
-                            chart_meta_name, cnamespace, overrides)
+                        changed_files.update(self._write_chart_overrides(
+                            chart_meta_name, cnamespace, overrides))
 
         elif app_name:
             LOG.exception("%s application is not supported" % app_name)
         else:
             LOG.exception("application name is required")
+        return changed_files
 
     def remove_helm_chart_overrides(self, chart_name, cnamespace=None):
         """Remove the overrides files for a chart"""
@@ -479,11 +657,16 @@ class HelmOperator(object):
                           chart_name)
 
     def _write_chart_overrides(self, chart_name, cnamespace, overrides):
-        """Write a one or more overrides files for a chart. """
+        """Write a one or more overrides files for a chart.
+
+        Returns the set of overrides files whose content changed.
+        """
+
+        changed_files = set()
 
         def _write_file(filename, values):
             try:
-                self._write_overrides(filename, values)
+                changed_files.update(self._write_overrides(filename, values))
             except Exception as e:
                 LOG.exception("failed to write %s overrides: %s: %s" % (
                     chart_name, filename, e))
@@ -493,19 +676,31 @@ class HelmOperator(object):
         else:
             for ns in overrides.keys():
                 _write_file("%s-%s.yaml" % (ns, chart_name), overrides[ns])
+        return changed_files
 
     def _write_overrides(self, filename, overrides):
-        """Write a single overrides file. """
+        """Write a single overrides file unless its content is unchanged.
+
+        Returns the set of changed files, empty if the file was not written.
+        """
 
         filepath = os.path.join(self.path, filename)
         try:
+            content = yaml.dump(overrides, default_flow_style=False)
+            digest = self._digests.digest(content)
+            if self._digests.is_current(filename, digest):
+                LOG.debug("overrides file unchanged: %s" % filepath)
+                return set()
+
             fd, tmppath = tempfile.mkstemp(dir=self.path, prefix=filename,
                                            text=True)
 
             with open(tmppath, 'w') as f:
-                yaml.dump(overrides, f, default_flow_style=False)
+                f.write(content)
             os.close(fd)
             os.rename(tmppath, filepath)
+            self._digests.update(filename, digest)
+            return set([filepath])
         except Exception:
             LOG.exception("failed to write overrides file: %s" % filepath)
             raise
@@ -517,6 +712,7 @@ class HelmOperator(object):
         try:
             if os.path.exists(filepath):
                 os.unlink(filepath)
+            self._digests.remove(filename)
         except Exception:
             LOG.exception("failed to delete overrides file: %s" % filepath)
             raise
@@ -0,0 +1,208 @@
+#
+# Copyright (c) 2018 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Helm compatible merging of chart override values."""
+
+import re
+import yaml
+
+from sysinv.common import exception
+
+
+INTEGER_RE = re.compile(r'^[+-]?[0-9]+$')
+
+
+def merge_values(dest, src):
+    """Merge the src values into dest, as done by helm for --values files.
+
+    Maps present in both are merged recursively, any other value in src
+    replaces the value in dest.
+    """
+    for key, value in src.items():
+        if isinstance(value, dict) and isinstance(dest.get(key), dict):
+            merge_values(dest[key], value)
+        else:
+            dest[key] = value
+    return dest
+
+
+def typed_value(value):
+    """Convert a --set value to the type helm would infer for it."""
+    if value.lower() == 'true':
+        return True
+    if value.lower() == 'false':
+        return False
+    if value.lower() == 'null':
+        return None
+    if value == '0':
+        return 0
+    if value[:1] != '0' and INTEGER_RE.match(value):
+        return int(value)
+    return value
+
+
+def _set_index(values, index, value):
+    if index >= len(values):
+        values.extend([None] * (index + 1 - len(values)))
+    values[index] = value
+    return values
+
+
+class SetValueParser(object):
+    """Parser for the helm --set syntax.
+
+    Supports nested keys (a.b=c), list indices (a[0]=b, a[0].b=c, a[0][1]=b),
+    list values (a={b,c}), multiple assignments separated by commas and
+    backslash escapes (a\\.b=c).
+    """
+
+    def __init__(self, text, data):
+        self.text = text
+        self.pos = 0
+        self.data = data
+
+    def _error(self, reason):
+        return exception.InvalidHelmOverrides(
+            reason="%s in '%s'" % (reason, self.text))
+
+    def _read_until(self, stops):
+        """Read up to one of the stop characters, honouring escapes.
+
+        :returns: the text read and the stop character, or None if the end of
+                  the input was reached.
+        """
+        chars = []
+        while self.pos < len(self.text):
+            c = self.text[self.pos]
+            self.pos += 1
+            if c == '\\':
+                if self.pos < len(self.text):
+                    chars.append(self.text[self.pos])
+                    self.pos += 1
+                continue
+            if c in stops:
+                return ''.join(chars), c
+            chars.append(c)
+        return ''.join(chars), None
+
+    def parse(self):
+        while self._key(self.data):
+            pass
+        return self.data
+
+    def _key(self, data):
+        """Parse one key assignment into data.
+
+        :returns: True if another assignment follows.
+        """
+        key, last = self._read_until('=[,.')
+        if last is None:
+            if key:
+                raise self._error("key '%s' has no value" % key)
+            return False
+        if not key:
+            raise self._error("key with no name")
+        if last == ',':
+            raise self._error("key '%s' has no value (cannot end with ,)" %
+                              key)
+        if last == '=':
+            value, more = self._value()
+            data[key] = value
+            return more
+        if last == '.':
+            inner = data.get(key)
+            if not isinstance(inner, dict):
+                inner = {}
+            more = self._key(inner)
+            data[key] = inner
+            return more
+        # last == '['
+        values = data.get(key)
+        if not isinstance(values, list):
+            values = []
+        values, more = self._list_item(values, self._index())
+        data[key] = values
+        return more
+
+    def _index(self):
+        index, last = self._read_until(']')
+        if last is None or not index.isdigit():
+            raise self._error("invalid list index '%s'" % index)
+        return int(index)
+
+    def _list_item(self, values, index):
+        rest, last = self._read_until('[.=')
+        if rest or last is None:
+            raise self._error("unexpected data at end of list index")
+        if last == '=':
+            value, more = self._value()
+            return _set_index(values, index, value), more
+        if last == '.':
+            inner = values[index] if index < len(values) else None
+            if not isinstance(inner, dict):
+                inner = {}
+            more = self._key(inner)
+            return _set_index(values, index, inner), more
+        # last == '['
+        inner = values[index] if index < len(values) else None
+        if not isinstance(inner, list):
+            inner = []
+        inner, more = self._list_item(inner, self._index())
+        return _set_index(values, index, inner), more
+
+    def _value(self):
+        """Parse a value or a {a,b} list of values.
+
+        :returns: the typed value and whether another assignment follows.
+        """
+        if self.text[self.pos:self.pos + 1] == '{':
+            self.pos += 1
+            values = []
+            while True:
+                value, last = self._read_until(',}')
+                if last is None:
+                    raise self._error("list value is missing a closing '}'")
+                values.append(typed_value(value))
+                if last == '}':
+                    break
+            rest, last = self._read_until(',')
+            if rest:
+                raise self._error("unexpected data after list value")
+            return values, last is not None
+
+        value, last = self._read_until(',')
+        return typed_value(value), last is not None
+
+
+def parse_set_value(text, data=None):
+    """Parse a helm --set string into (or on top of) a dict of values."""
+    if data is None:
+        data = {}
+    return SetValueParser(text, data).parse()
+
+
+def merge_overrides(file_overrides=None, set_overrides=None):
+    """Merge override values the same way helm install does.
+
+    :param file_overrides: yaml documents, applied in order like --values
+    :param set_overrides: helm --set strings, applied in order after the
+                          yaml documents
+    :returns: dict of merged values
+    """
+    values = {}
+    for value_file in file_overrides or []:
+        file_values = yaml.load(value_file)
+        if file_values is None:
+            continue
+        if not isinstance(file_values, dict):
+            raise exception.InvalidHelmOverrides(
+                reason="values must be a map, not '%s'" %
+                       type(file_values).__name__)
+        merge_values(values, file_values)
+
+    for value_set in set_overrides or []:
+        parse_set_value(value_set, values)
+    return values
@@ -94,18 +94,24 @@ from sysinv.objects import storage_ceph_external
 def objectify(klass):
     """Decorator to convert database results into specified objects.
     :param klass: database results class
+
+    Only the fields listed by the fields keyword argument of the decorated
+    function, if given, are converted.
     """
 
     def the_decorator(fn):
         @functools.wraps(fn)
         def wrapper(*args, **kwargs):
             result = fn(*args, **kwargs)
+            args = ()
+            if kwargs.get('fields') is not None:
+                args = (kwargs['fields'],)
             try:
-                return klass.from_db_object(result)
+                return klass.from_db_object(result, *args)
             except TypeError:
                 # TODO(deva): handle lists of objects better
                 #             once support for those lands and is imported.
-                return [klass.from_db_object(obj) for obj in result]
+                return [klass.from_db_object(obj, *args) for obj in result]
 
         return wrapper
 
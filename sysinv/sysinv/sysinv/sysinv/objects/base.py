@@ -460,9 +460,16 @@ class SysinvObject(object):
                     if k != "id" and callable(v))
 
     @staticmethod
-    def _from_db_object(cls_object, db_object):
-        """Converts a database entity to a formal object."""
+    def _from_db_object(cls_object, db_object, fields=None):
+        """Converts a database entity to a formal object.
+
+        :param fields: if set, only these fields are converted, the other
+                       columns and foreign fields are not accessed.
+        """
         for field in cls_object.fields:
+            if fields is not None and field not in fields:
+                continue
+
             if field in cls_object._optional_fields:
                 if not hasattr(db_object, field):
                     continue
@@ -478,8 +485,11 @@ class SysinvObject(object):
         return cls_object
 
     @classmethod
-    def from_db_object(cls, db_obj):
-        return cls._from_db_object(cls(), db_obj)
+    def from_db_object(cls, db_obj, fields=None):
+        if fields is None:
+            # subclasses may override _from_db_object without fields
+            return cls._from_db_object(cls(), db_obj)
+        return cls._from_db_object(cls(), db_obj, fields)
 
 
 class ObjectListBase(object):
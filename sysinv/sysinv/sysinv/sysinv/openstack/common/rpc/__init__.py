@@ -241,6 +241,22 @@ def cleanup():
     return _get_impl().cleanup()
 
 
+def reset():
+    """Forget the connections opened before the process was forked.
+
+    Unlike cleanup(), the connections are not closed, their sockets are
+    shared with the parent process.  A forked worker calls this before its
+    first RPC so that it opens connections of its own.
+
+    :returns: None
+    """
+    if _RPCIMPL is None:
+        return
+    connection_cls = getattr(_RPCIMPL, 'Connection', None)
+    if getattr(connection_cls, 'pool', None) is not None:
+        connection_cls.pool = None
+
+
 def cast_to_server(context, server_params, topic, msg):
     """Invoke a remote method that does not return anything.
 
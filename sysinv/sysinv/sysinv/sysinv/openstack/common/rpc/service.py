@@ -48,8 +48,7 @@ class Service(service.Service):
         LOG.debug(_("Creating Consumer connection for Service %s") %
                   self.topic)
 
-        dispatcher = rpc_dispatcher.RpcDispatcher([self.manager],
-                                                  self.serializer)
+        dispatcher = self.create_rpc_dispatcher()
 
         # Share this same connection for these Consumers
         self.conn.create_consumer(self.topic, dispatcher, fanout=False)
@@ -67,6 +66,10 @@ class Service(service.Service):
         # Consume from all consumers in a thread
         self.conn.consume_in_thread()
 
+    def create_rpc_dispatcher(self):
+        """Return the dispatcher of the messages consumed by the service."""
+        return rpc_dispatcher.RpcDispatcher([self.manager], self.serializer)
+
     def stop(self):
         # Try to shut the connection down, but if we get any sort of
         # errors, go ahead and ignore them.. as we're shutting down anyway
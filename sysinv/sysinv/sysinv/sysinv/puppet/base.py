@@ -36,6 +36,11 @@ class BasePuppet(object):
         'dcorch'
     ]
 
+    # Configuration domains (see puppet.common.CONFIG_DOMAINS) read by the
+    # plugin.  A change limited to these domains only regenerates the hiera
+    # data of the plugins that declare them.
+    CONFIG_DOMAINS = frozenset()
+
     def __init__(self, operator):
         self._operator = operator
 
@@ -55,6 +60,10 @@ class BasePuppet(object):
     def config(self):
         return self._operator.config
 
+    @property
+    def system_context(self):
+        return self._operator.system_context
+
     def get_static_config(self):
         return {}
 
@@ -70,6 +79,10 @@ class BasePuppet(object):
     def get_host_config(self, host):
         return {}
 
+    def depends_on(self, domains):
+        """Return True if the plugin reads any of the configuration domains"""
+        return bool(self.CONFIG_DOMAINS & domains)
+
     @staticmethod
     def quoted_str(value):
         return quoted_str(value)
@@ -81,10 +94,10 @@ class BasePuppet(object):
         return os.urandom(num).encode('hex') + suffix
 
     def _get_system(self):
-        system = self.context.get('_system', None)
+        system = self.system_context.get('_system', None)
         if system is None:
             system = self.dbapi.isystem_get_one()
-            self.context['_system'] = system
+            self.system_context['_system'] = system
         return system
 
     def _sdn_enabled(self):
@@ -166,7 +179,7 @@ class BasePuppet(object):
         """
         Retrieve an address entry by name and scoped by network type
         """
-        addresses = self.context.setdefault('_address_names', {})
+        addresses = self.system_context.setdefault('_address_names', {})
         address_name = utils.format_address_name(name, networktype)
         address = addresses.get(address_name)
         if address is None:
@@ -10,6 +10,7 @@ from sysinv.common import exception
 from sysinv.common import utils
 from sysinv.openstack.common import log as logging
 
+from sysinv.puppet import common
 from sysinv.puppet import openstack
 
 LOG = logging.getLogger(__name__)
@@ -352,6 +353,9 @@ SP_CINDER_SECTION_MAPPING = {
 class CinderPuppet(openstack.OpenstackBasePuppet):
     """Class to encapsulate puppet operations for cinder configuration"""
 
+    # the drbd runtime manifest also applies the cinder lvm configuration
+    CONFIG_DOMAINS = frozenset([common.CONFIG_DOMAIN_DRBD])
+
     SERVICE_NAME = 'cinder'
     SERVICE_TYPE = 'volume'
     SERVICE_PORT = 8776
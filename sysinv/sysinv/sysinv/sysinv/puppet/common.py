@@ -27,6 +27,20 @@ REPORT_FAILURE = 'report_failure'
 
 REPORT_INVENTORY_UPDATE = 'inventory_update'
 
+# configuration domains that puppet plugins declare as dependencies to allow
+# the hiera data to be partially regenerated when only these change
+CONFIG_DOMAIN_DNS = 'dns'
+CONFIG_DOMAIN_DRBD = 'drbd'
+CONFIG_DOMAIN_REMOTELOGGING = 'remotelogging'
+CONFIG_DOMAIN_SNMP = 'snmp'
+
+CONFIG_DOMAINS = frozenset([
+    CONFIG_DOMAIN_DNS,
+    CONFIG_DOMAIN_DRBD,
+    CONFIG_DOMAIN_REMOTELOGGING,
+    CONFIG_DOMAIN_SNMP,
+])
+
 # name of manifest config operations to report back to sysinv conductor
 REPORT_AIO_CINDER_CONFIG = 'aio_cinder_config'
 REPORT_DISK_PARTITON_CONFIG = 'manage_disk_partitions'
@@ -5,12 +5,15 @@
 #
 
 
+from sysinv.puppet import common
 from sysinv.puppet import openstack
 
 
 class FmPuppet(openstack.OpenstackBasePuppet):
     """Class to encapsulate puppet operations for fm configuration"""
 
+    CONFIG_DOMAINS = frozenset([common.CONFIG_DOMAIN_SNMP])
+
     SERVICE_NAME = 'fm'
     SERVICE_PORT = 18002
     BOOTSTRAP_MGMT_IP = '127.0.0.1'
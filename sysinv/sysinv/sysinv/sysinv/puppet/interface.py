@@ -197,15 +197,22 @@ class InterfacePuppet(base.BasePuppet):
         return results
 
     def _get_network_type_index(self):
-        networks = {}
-        for network in self.dbapi.networks_get_all():
-            networks[network['type']] = network
+        networks = self.system_context.get('_networks')
+        if networks is None:
+            networks = {}
+            for network in self.dbapi.networks_get_all():
+                networks[network['type']] = network
+            self.system_context['_networks'] = networks
         return networks
 
     def _get_gateway_index(self):
         """
         Builds a dictionary of gateway IP addresses indexed by network type.
         """
+        gateways = self.system_context.get('_gateways')
+        if gateways is not None:
+            return gateways
+
         gateways = {}
         try:
             mgmt_address = self._get_address_by_name(
@@ -223,12 +230,17 @@ class InterfacePuppet(base.BasePuppet):
         except exception.AddressNotFoundByName:
             pass
 
+        self.system_context['_gateways'] = gateways
         return gateways
 
     def _get_floating_ip_index(self):
         """
         Builds a dictionary of floating ip addresses indexed by network type.
         """
+        floating_ips = self.system_context.get('_floating_ips')
+        if floating_ips is not None:
+            return floating_ips
+
         mgmt_address = self._get_address_by_name(
             constants.CONTROLLER_HOSTNAME, constants.NETWORK_TYPE_MGMT)
 
@@ -277,6 +289,7 @@ class InterfacePuppet(base.BasePuppet):
         except exception.AddressNotFoundByName:
             pass
 
+        self.system_context['_floating_ips'] = floating_ips
         return floating_ips
 
     def _get_datanetworks(self, host):
@@ -92,7 +92,7 @@ class LdapPuppet(base.BasePuppet):
         }
 
     def get_service_config(self, service):
-        configs = self.context.setdefault('_service_configs', {})
+        configs = self.system_context.setdefault('_service_configs', {})
         if service not in configs:
             configs[service] = self._get_service(service)
         return configs[service]
@@ -15,13 +15,13 @@ from sysinv.puppet import base
 class OpenstackBasePuppet(base.BasePuppet):
 
     def _get_service_config(self, service):
-        configs = self.context.setdefault('_service_configs', {})
+        configs = self.system_context.setdefault('_service_configs', {})
         if service not in configs:
             configs[service] = self._get_service(service)
         return configs[service]
 
     def _get_service_parameter_configs(self, service):
-        configs = self.context.setdefault('_service_params', {})
+        configs = self.system_context.setdefault('_service_params', {})
         if service not in configs:
             params = self._get_service_parameters(service)
             if params:
@@ -34,7 +34,7 @@ class OpenstackBasePuppet(base.BasePuppet):
         return self._operator.keystone.get_admin_user_name()
 
     def _get_service_password(self, service):
-        passwords = self.context.setdefault('_service_passwords', {})
+        passwords = self.system_context.setdefault('_service_passwords', {})
         if service not in passwords:
             passwords[service] = self._get_keyring_password(
                 service,
@@ -89,7 +89,7 @@ class OpenstackBasePuppet(base.BasePuppet):
         return url
 
     def _get_database_password(self, service):
-        passwords = self.context.setdefault('_database_passwords', {})
+        passwords = self.system_context.setdefault('_database_passwords', {})
         if service not in passwords:
             passwords[service] = self._get_keyring_password(service,
                                                             'database')
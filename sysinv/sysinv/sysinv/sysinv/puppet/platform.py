@@ -13,6 +13,7 @@ from sysinv.common import utils
 from tsconfig import tsconfig
 
 from sysinv.puppet import base
+from sysinv.puppet import common
 
 HOSTNAME_INFRA_SUFFIX = '-infra'
 
@@ -23,6 +24,11 @@ NOVA_UPGRADE_LEVELS = {'18.03': NOVA_UPGRADE_LEVEL_PIKE}
 class PlatformPuppet(base.BasePuppet):
     """Class to encapsulate puppet operations for platform configuration"""
 
+    CONFIG_DOMAINS = frozenset([common.CONFIG_DOMAIN_DNS,
+                                common.CONFIG_DOMAIN_DRBD,
+                                common.CONFIG_DOMAIN_REMOTELOGGING,
+                                common.CONFIG_DOMAIN_SNMP])
+
     def get_static_config(self):
         config = {}
         config.update(self._get_static_software_config())
@@ -58,7 +64,7 @@ class PlatformPuppet(base.BasePuppet):
         config = {}
         config.update(self._get_hosts_config(host))
         config.update(self._get_nfs_config(host))
-        config.update(self._get_host_platform_config(host, self.config_uuid))
+        config.update(self._get_host_platform_config(host))
         config.update(self._get_host_ntp_config(host))
         config.update(self._get_host_ptp_config(host))
         config.update(self._get_host_sysctl_config(host))
@@ -336,22 +342,13 @@ class PlatformPuppet(base.BasePuppet):
             })
         return config
 
-    def _get_host_platform_config(self, host, config_uuid):
-        if not config_uuid:
-            config_uuid = host.config_target
-
+    def _get_host_platform_config(self, host):
         # required parameters
         config = {
             'platform::params::hostname': host.hostname,
             'platform::params::software_version': self.quoted_str(host.software_load),
         }
 
-        # optional parameters
-        if config_uuid:
-            config.update({
-                'platform::config::params::config_uuid': config_uuid
-            })
-
         if host.personality == constants.CONTROLLER:
 
             controller0_address = self._get_address_by_name(
@@ -851,3 +848,20 @@ class PlatformPuppet(base.BasePuppet):
         return {
             'sysinv::agent::lldp_drivers': driver_list
         }
+
+
+class PlatformConfigPuppet(base.BasePuppet):
+    """Class to encapsulate puppet operations for the platform config uuid"""
+
+    def depends_on(self, domains):
+        # the host configuration carries the config_uuid and must therefore
+        # be regenerated for every configuration change
+        return True
+
+    def get_host_config(self, host):
+        config_uuid = self.config_uuid or host.config_target
+        if not config_uuid:
+            return {}
+        return {
+            'platform::config::params::config_uuid': config_uuid
+        }
@@ -11,10 +11,12 @@ from __future__ import absolute_import
 import eventlet
 import os
 import tempfile
+import time
 import yaml
 
-from stevedore import extension
-
+from sysinv.common import extension_manager
+from sysinv.common import profiler
+from sysinv.common import utils
 from sysinv.openstack.common import log as logging
 from sysinv.puppet import common
 
@@ -27,7 +29,7 @@ def puppet_context(func):
     def _wrapper(self, *args, **kwargs):
         thread_context = eventlet.greenthread.getcurrent()
         setattr(thread_context, '_puppet_context', dict())
-        func(self, *args, **kwargs)
+        return func(self, *args, **kwargs)
     return _wrapper
 
 
@@ -41,15 +43,38 @@ class PuppetOperator(object):
         self.dbapi = dbapi
         self.path = path
 
-        puppet_plugins = extension.ExtensionManager(
+        # system scope context data shared by all hosts that are regenerated
+        # for the same configuration uuid
+        self._system_context_uuid = None
+        self._system_context = {}
+
+        self._digests = utils.DigestIndex(path)
+
+        # name of the plugin that generated each key of a config file, used
+        # to prune the keys a plugin no longer emits when merging
+        self._key_owners = {}
+
+        self.profiler = profiler.PluginProfiler('puppet')
+
+        # the puppet plugins are only loaded when they are first used
+        puppet_plugins = extension_manager.LazyExtensionManager(
             namespace='systemconfig.puppet_plugins',
-            invoke_on_load=True, invoke_args=(self,))
-        self.puppet_plugins = sorted(puppet_plugins, key=lambda x: x.name)
+            invoke_args=(self,))
+        self.puppet_plugins = list(puppet_plugins)
 
+        self._plugins_by_name = {}
         for plugin in self.puppet_plugins:
             plugin_name = plugin.name[4:]
-            setattr(self, plugin_name, plugin.obj)
-            LOG.debug("Loaded puppet plugin %s" % plugin.name)
+            self._plugins_by_name[plugin_name] = plugin
+            LOG.debug("Found puppet plugin %s" % plugin.name)
+
+    def __getattr__(self, name):
+        # expose the puppet plugins by name (without the ordering prefix)
+        plugins = self.__dict__.get('_plugins_by_name', {})
+        if name in plugins and plugins[name].obj is not None:
+            return plugins[name].obj
+        raise AttributeError("'%s' object has no attribute '%s'" %
+                             (type(self).__name__, name))
 
     @property
     def context(self):
@@ -60,6 +85,28 @@ class PuppetOperator(object):
     def config(self):
         return self.context.get('config', {})
 
+    @property
+    def config_uuid(self):
+        return self.context.get('config_uuid')
+
+    @property
+    def system_context(self):
+        """Context data that is not specific to the host being configured"""
+        return self.context.setdefault('_system_context', {})
+
+    def _get_system_context(self, config_uuid):
+        """Return the system context shared for the configuration uuid"""
+        if config_uuid is None:
+            return {}
+        if config_uuid != self._system_context_uuid:
+            self._system_context_uuid = config_uuid
+            self._system_context = {}
+        return self._system_context
+
+    def _clear_system_context(self):
+        self._system_context_uuid = None
+        self._system_context = {}
+
     @puppet_context
     def create_static_config(self):
         """
@@ -75,10 +122,11 @@ class PuppetOperator(object):
         try:
             self.context['config'] = config = {}
             for puppet_plugin in self.puppet_plugins:
-                config.update(puppet_plugin.obj.get_static_config())
+                config.update(self._get_plugin_config(
+                    puppet_plugin, 'get_static_config'))
 
             filename = 'static.yaml'
-            self._write_config(filename, config)
+            return self._write_config(filename, config)
         except Exception:
             LOG.exception("failed to create static config")
             raise
@@ -97,54 +145,96 @@ class PuppetOperator(object):
         try:
             self.context['config'] = config = {}
             for puppet_plugin in self.puppet_plugins:
-                config.update(puppet_plugin.obj.get_secure_static_config())
+                config.update(self._get_plugin_config(
+                    puppet_plugin, 'get_secure_static_config'))
 
             filename = 'secure_static.yaml'
-            self._write_config(filename, config)
+            return self._write_config(filename, config)
         except Exception:
             LOG.exception("failed to create secure config")
             raise
 
     @puppet_context
-    def update_system_config(self):
-        """Update the configuration for the system"""
-        try:
-            # NOTE: order is important due to cached context data
-            self.context['config'] = config = {}
-            for puppet_plugin in self.puppet_plugins:
-                config.update(puppet_plugin.obj.get_system_config())
+    def update_system_config(self, domains=None):
+        """Update the configuration for the system
 
+        If configuration domains are supplied, only the hiera data of the
+        plugins depending on them is regenerated.
+        """
+        try:
             filename = 'system.yaml'
-            self._write_config(filename, config)
+            return self._update_config(
+                filename, 'get_system_config', domains=domains)
         except Exception:
             LOG.exception("failed to create system config")
             raise
 
     @puppet_context
-    def update_secure_system_config(self):
-        """Update the secure configuration for the system"""
-        try:
-            # NOTE: order is important due to cached context data
-            self.context['config'] = config = {}
-            for puppet_plugin in self.puppet_plugins:
-                config.update(puppet_plugin.obj.get_secure_system_config())
+    def update_secure_system_config(self, domains=None):
+        """Update the secure configuration for the system
 
+        If configuration domains are supplied, only the hiera data of the
+        plugins depending on them is regenerated.
+        """
+        try:
             filename = 'secure_system.yaml'
-            self._write_config(filename, config)
+            return self._update_config(
+                filename, 'get_secure_system_config', domains=domains)
         except Exception:
             LOG.exception("failed to create secure_system config")
             raise
 
     @puppet_context
-    def update_host_config(self, host, config_uuid=None):
-        """Update the host hiera configuration files for the supplied host"""
+    def update_host_config(self, host, config_uuid=None, domains=None):
+        """Update the host hiera configuration files for the supplied host
 
-        self.config_uuid = config_uuid
-        self.context['config'] = config = {}
-        for puppet_plugin in self.puppet_plugins:
-            config.update(puppet_plugin.obj.get_host_config(host))
+        If configuration domains are supplied, only the hiera data of the
+        plugins depending on them is regenerated.
+        """
 
-        self._write_host_config(host, config)
+        self.context['config_uuid'] = config_uuid
+        self.context['_system_context'] = \
+            self._get_system_context(config_uuid)
+
+        filename = "%s.yaml" % host.mgmt_ip
+        return self._update_config(
+            filename, 'get_host_config', (host,), domains)
+
+    def update_hosts_config(self, hosts, config_uuid=None, workers=1,
+                            domains=None):
+        """Update the host hiera configuration files for the supplied hosts
+
+        The configuration of each host is generated in its own green thread,
+        with up to the specified number of workers running concurrently.
+        Each worker has its own puppet context, so host specific data is
+        never shared between hosts.  System scope data is looked up once
+        and shared by all hosts regenerated for the configuration uuid.
+
+        :returns: The set of configuration files that were changed.
+        """
+        def _update_host_config(host):
+            start = time.time()
+            changed = self.update_host_config(host, config_uuid, domains)
+            return host, changed, time.time() - start
+
+        start = time.time()
+        count = 0
+        changed_files = set()
+        pool = eventlet.GreenPool(max(1, workers))
+        try:
+            for host, changed, elapsed in pool.imap(_update_host_config,
+                                                    hosts):
+                LOG.info("Generated host config for %s in %.3f secs" %
+                         (host.hostname, elapsed))
+                changed_files.update(changed)
+                count += 1
+        finally:
+            self._clear_system_context()
+
+        LOG.info("Generated host config for %d hosts in %.3f secs "
+                 "(workers=%d, changed=%d)" %
+                 (count, time.time() - start, workers, len(changed_files)))
+        return changed_files
 
     def remove_host_config(self, host):
         """Remove the configuration for the supplied host"""
@@ -154,20 +244,93 @@ class PuppetOperator(object):
         except Exception:
             LOG.exception("failed to remove host config: %s" % host.uuid)
 
-    def _write_host_config(self, host, config):
-        """Update the configuration for a specific host"""
-        filename = "%s.yaml" % host.mgmt_ip
-        self._write_config(filename, config)
+    def _get_domain_plugins(self, domains):
+        """Return the plugins that depend on the configuration domains"""
+        domains = set(domains)
+        return [p for p in self.puppet_plugins
+                if p.obj is not None and p.obj.depends_on(domains)]
+
+    def _get_plugin_config(self, puppet_plugin, method, *args):
+        """Invoke a configuration method of a plugin, profiling the call"""
+        if puppet_plugin.obj is None:
+            # the plugin failed to load and is skipped
+            return {}
+        with self.profiler.measure(method, puppet_plugin.name):
+            return getattr(puppet_plugin.obj, method)(*args)
+
+    def _update_config(self, filename, method, args=(), domains=None):
+        """Generate and write a configuration file
+
+        Without configuration domains the hiera data of every plugin is
+        generated.  Otherwise only the plugins that depend on the domains are
+        run and their hiera data replaces the keys they generated before in
+        the existing configuration file.  The file is fully regenerated if it
+        does not exist yet or its keys were not generated by this operator.
+        """
+        config = None
+        plugins = self.puppet_plugins
+        owners = self._key_owners.get(filename)
+        if domains is not None and owners is not None:
+            config = self._read_config(filename)
+            if config is not None:
+                owners = dict(owners)
+                plugins = self._get_domain_plugins(domains)
+                LOG.debug("Regenerating %s for domains %s with plugins %s" %
+                          (filename, ', '.join(domains),
+                           ', '.join(p.name for p in plugins)))
+
+                # drop the keys of the regenerated plugins, so that keys
+                # they no longer emit are not kept in the file
+                names = set(p.name for p in plugins)
+                for key in [k for k, n in owners.items() if n in names]:
+                    config.pop(key, None)
+                    del owners[key]
+
+        if config is None:
+            config = {}
+            owners = {}
+
+        # NOTE: order is important due to cached context data
+        self.context['config'] = config
+        for puppet_plugin in plugins:
+            plugin_config = self._get_plugin_config(
+                puppet_plugin, method, *args)
+            config.update(plugin_config)
+            owners.update(dict.fromkeys(plugin_config, puppet_plugin.name))
+
+        changed = self._write_config(filename, config)
+        self._key_owners[filename] = owners
+        return changed
+
+    def _read_config(self, filename):
+        """Read an existing config file, returning None if it is missing"""
+        filepath = os.path.join(self.path, filename)
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, 'r') as f:
+            return yaml.load(f) or {}
 
     def _write_config(self, filename, config):
+        """Write a config file unless its content is unchanged
+
+        :returns: The set of changed files, empty if the file was not written.
+        """
         filepath = os.path.join(self.path, filename)
         try:
+            content = yaml.dump(config, default_flow_style=False)
+            digest = self._digests.digest(content)
+            if self._digests.is_current(filename, digest):
+                LOG.debug("config file unchanged: %s" % filepath)
+                return set()
+
             fd, tmppath = tempfile.mkstemp(dir=self.path, prefix=filename,
                                            text=True)
             with open(tmppath, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False)
+                f.write(content)
             os.close(fd)
             os.rename(tmppath, filepath)
+            self._digests.update(filename, digest)
+            return set([filepath])
         except Exception:
             LOG.exception("failed to write config file: %s" % filepath)
             raise
@@ -177,6 +340,8 @@ class PuppetOperator(object):
         try:
             if os.path.exists(filepath):
                 os.unlink(filepath)
+            self._digests.remove(filename)
+            self._key_owners.pop(filename, None)
         except Exception:
             LOG.exception("failed to delete config file: %s" % filepath)
             raise
@@ -0,0 +1,68 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the block device udev event monitor."""
+
+import mock
+
+from sysinv.agent import block_monitor
+from sysinv.common import inventory
+from sysinv.tests import base
+
+
+class FakeDevice(dict):
+
+    def __init__(self, sys_name, **properties):
+        super(FakeDevice, self).__init__(**properties)
+        self.sys_name = sys_name
+
+
+class BlockDeviceMonitorTestCase(base.TestCase):
+
+    def setUp(self):
+        super(BlockDeviceMonitorTestCase, self).setUp()
+        self.monitor = block_monitor.BlockDeviceMonitor()
+
+    def test_device_categories_disk(self):
+        device = FakeDevice('sdb', DEVTYPE='disk')
+        self.assertEqual(set(block_monitor.CATEGORIES),
+                         self.monitor.device_categories(device))
+
+    def test_device_categories_partition(self):
+        device = FakeDevice('sdb1', DEVTYPE='partition')
+        self.assertEqual(set([inventory.CATEGORY_DISK,
+                              inventory.CATEGORY_PARTITION,
+                              inventory.CATEGORY_PV]),
+                         self.monitor.device_categories(device))
+
+    def test_device_categories_device_mapper(self):
+        device = FakeDevice('dm-3', DEVTYPE='disk', DM_NAME='cgts--vg-lv')
+        self.assertEqual(set([inventory.CATEGORY_PV, inventory.CATEGORY_LVG]),
+                         self.monitor.device_categories(device))
+
+    def test_device_categories_ignored(self):
+        for name in ['loop0', 'ram1', 'sr0']:
+            device = FakeDevice(name, DEVTYPE='disk')
+            self.assertEqual(set(), self.monitor.device_categories(device))
+
+    def test_pop_dirty(self):
+        self.monitor._device_event('change',
+                                   FakeDevice('dm-0', DEVTYPE='disk'))
+        self.monitor._device_event('add',
+                                   FakeDevice('loop0', DEVTYPE='disk'))
+        self.assertEqual(set([inventory.CATEGORY_PV, inventory.CATEGORY_LVG]),
+                         self.monitor.pop_dirty())
+        self.assertEqual(set(), self.monitor.pop_dirty())
+
+    @mock.patch('eventlet.spawn_after')
+    def test_rescan_debounced(self, mock_spawn_after):
+        callback = mock.Mock()
+        monitor = block_monitor.BlockDeviceMonitor(callback=callback)
+        monitor._device_event('add', FakeDevice('sdc', DEVTYPE='disk'))
+        monitor._device_event('add', FakeDevice('sdc1', DEVTYPE='partition'))
+        mock_spawn_after.assert_called_once_with(block_monitor.SETTLE_TIME,
+                                                 monitor._notify)
+        monitor._notify()
+        callback.assert_called_once_with()
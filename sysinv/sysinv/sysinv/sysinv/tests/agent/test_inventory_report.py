@@ -0,0 +1,59 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the agent inventory category reports."""
+
+import mock
+
+from sysinv.agent import manager
+from sysinv.common import inventory
+from sysinv.openstack.common.rpc.common import RemoteError
+from sysinv.tests import base
+
+
+class InventoryReportTestCase(base.TestCase):
+
+    def setUp(self):
+        super(InventoryReportTestCase, self).setUp()
+        with mock.patch('sysinv.agent.lldp.plugin.SysinvLldpPlugin'):
+            self.agent = manager.AgentManager('test-host', 'test-topic')
+        self.rpcapi = mock.Mock()
+        self.context = mock.Mock()
+        self.disks = [{'device_path': '/dev/disk/by-path/pci-0-sda',
+                       'device_node': '/dev/sda', 'size_mib': 1024}]
+
+    def _report(self, category=inventory.CATEGORY_DISK, records=None):
+        self.agent._report_inventory_category(
+            self.context, self.rpcapi, 'host-uuid', category,
+            records if records is not None else self.disks)
+
+    def test_delta_report(self):
+        self.rpcapi.inventory_delta_update_by_ihost.return_value = True
+        self._report()
+        self._report()
+        # the unchanged records are not reported again
+        self.assertEqual(
+            1, self.rpcapi.inventory_delta_update_by_ihost.call_count)
+        self.assertFalse(self.rpcapi.idisk_update_by_ihost.called)
+
+    def test_conductor_without_delta_report(self):
+        self.rpcapi.inventory_delta_update_by_ihost.side_effect = \
+            RemoteError('AttributeError', "No such RPC function")
+        self._report()
+        self.rpcapi.idisk_update_by_ihost.assert_called_once_with(
+            self.context, 'host-uuid', self.disks)
+
+        # the delta report is not retried until the retry time
+        self._report(inventory.CATEGORY_MEMORY, [{'numa_node': 0}])
+        self.assertEqual(
+            1, self.rpcapi.inventory_delta_update_by_ihost.call_count)
+        self.rpcapi.imemory_update_by_ihost.assert_called_once_with(
+            self.context, 'host-uuid', [{'numa_node': 0}])
+
+    def test_conductor_delta_report_error(self):
+        self.rpcapi.inventory_delta_update_by_ihost.side_effect = \
+            RemoteError('SysinvException', "Failed")
+        self.assertRaises(RemoteError, self._report)
+        self.assertFalse(self.rpcapi.idisk_update_by_ihost.called)
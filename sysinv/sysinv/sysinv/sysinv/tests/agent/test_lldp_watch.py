@@ -0,0 +1,122 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the lldp neighbour watch."""
+
+import json
+import mock
+
+from six import StringIO
+
+from sysinv.agent.lldp.drivers.lldpd import driver as lldpd_driver
+from sysinv.agent.lldp import plugin
+from sysinv.agent import manager
+from sysinv.tests import base
+
+
+def _iface(name, chassis_id, port_id, system_name=None):
+    chassis = {"id": [{"type": "mac", "value": chassis_id}]}
+    if system_name:
+        chassis["name"] = [{"value": system_name}]
+    return {"name": name,
+            "chassis": [chassis],
+            "port": [{"id": [{"type": "ifname", "value": port_id}],
+                      "ttl": [{"value": "120"}]}]}
+
+
+def _event(event, *ifaces):
+    return json.dumps({event: [{"interface": list(ifaces)}]}, indent=2)
+
+
+class LldpdWatchTestCase(base.TestCase):
+
+    def setUp(self):
+        super(LldpdWatchTestCase, self).setUp()
+        self.driver = lldpd_driver.SysinvLldpdAgentDriver()
+
+    def _events(self, output):
+        return list(self.driver._lldpd_watch_events(StringIO(output)))
+
+    def test_watch_events(self):
+        output = '\n'.join([
+            _event("lldp-added", _iface("eth0", "aa:bb", "1/1", "sw1")),
+            _event("lldp-updated", _iface("eth0", "aa:bb", "1/1", "sw2")),
+            _event("lldp-deleted", _iface("eth0", "aa:bb", "1/1"))])
+
+        events = self._events(output)
+        self.assertEqual([plugin.NEIGHBOUR_ADDED,
+                          plugin.NEIGHBOUR_UPDATED,
+                          plugin.NEIGHBOUR_REMOVED],
+                         [change for change, iface in events])
+        self.assertEqual(["eth0"] * 3,
+                         [iface["name"] for change, iface in events])
+
+    def test_watch_events_partial_document(self):
+        # A document is only decoded once complete
+        stream = mock.Mock()
+        added = _event("lldp-added", _iface("eth1", "cc:dd", "2/1"))
+        lines = [l + '\n' for l in added.split('\n')]
+        stream.readline.side_effect = lines + ['']
+
+        events = list(self.driver._lldpd_watch_events(stream))
+        self.assertEqual(1, len(events))
+        self.assertEqual(len(lines) + 1, stream.readline.call_count)
+
+    def test_watch_events_ignores_other_documents(self):
+        output = '\n'.join([
+            json.dumps({"lldp": [{"interface": []}]}),
+            _event("lldp-added")])
+        self.assertEqual([], self._events(output))
+
+    @mock.patch('subprocess.Popen')
+    def test_neighbours_watch(self, mock_popen):
+        output = '\n'.join([
+            _event("lldp-added", _iface("eth0", "aa:bb", "1/1", "sw1"),
+                   _iface("eth1", "cc:dd", "2/1")),
+            _event("lldp-deleted", _iface("eth1", "cc:dd", "2/1"))])
+        mock_popen.return_value.stdout = StringIO(output)
+        mock_popen.return_value.poll.return_value = 0
+
+        changes = []
+        self.driver.lldp_neighbours_watch(
+            lambda change, neighbour: changes.append((change, neighbour)))
+
+        self.assertEqual(
+            [(plugin.NEIGHBOUR_ADDED, "aa:bb,1/1"),
+             (plugin.NEIGHBOUR_ADDED, "cc:dd,2/1"),
+             (plugin.NEIGHBOUR_REMOVED, "cc:dd,2/1")],
+            [(change, n.msap) for change, n in changes])
+        self.assertEqual("sw1", changes[0][1].system_name)
+        self.assertEqual("eth0", changes[0][1].key.portname)
+        mock_popen.return_value.wait.assert_called_once_with()
+        self.assertTrue(mock_popen.call_args[1]['universal_newlines'])
+
+
+class AgentLldpWatchTestCase(base.TestCase):
+
+    def setUp(self):
+        super(AgentLldpWatchTestCase, self).setUp()
+        with mock.patch('sysinv.agent.lldp.plugin.SysinvLldpPlugin'):
+            self.agent = manager.AgentManager('test-host', 'test-topic')
+        self.agent._ihost_uuid = 'host-uuid'
+        self.agent._lldp_neighbours = {}
+
+    @mock.patch('sysinv.conductor.rpcapi.ConductorAPI')
+    def test_neighbours_changed_reported(self, mock_rpcapi):
+        with mock.patch.object(self.agent, '_is_config_complete',
+                               return_value=True), \
+                mock.patch.object(self.agent,
+                                  '_lldp_neighbours_report') as mock_report:
+            self.agent._lldp_neighbours_changed()
+        self.assertTrue(mock_report.called)
+
+    @mock.patch('sysinv.conductor.rpcapi.ConductorAPI')
+    def test_neighbours_changed_config_incomplete(self, mock_rpcapi):
+        with mock.patch.object(self.agent, '_is_config_complete',
+                               return_value=False), \
+                mock.patch.object(self.agent,
+                                  '_lldp_neighbours_report') as mock_report:
+            self.agent._lldp_neighbours_changed()
+        self.assertFalse(mock_report.called)
@@ -0,0 +1,87 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the single pass LVM inventory."""
+
+import json
+
+from sysinv.agent import lvg
+from sysinv.agent import lvm_report
+from sysinv.agent import pv
+from sysinv.common import constants
+from sysinv.tests import base
+
+
+FULLREPORT = {
+    "report": [
+        {"vg": [{"vg_name": "cgts-vg", "vg_uuid": "vg-uuid-1",
+                 "vg_attr": "wz--n-", "max_lv": "0", "lv_count": "3",
+                 "max_pv": "0", "pv_count": "1", "vg_size": "1048576",
+                 "vg_extent_count": "256", "vg_free_count": "16"}],
+         "pv": [{"pv_name": "/dev/sda4", "pv_uuid": "pv-uuid-1",
+                 "pv_size": "1048576", "pv_pe_count": "256",
+                 "pv_pe_alloc_count": "240"}],
+         "lv": [{"lv_name": "scratch-lv", "lv_attr": "-wi-ao----"},
+                {"lv_name": "log-lv", "lv_attr": "-wi-ao----"},
+                {"lv_name": "nova-local-pool", "lv_attr": "twi-aotz--"},
+                {"lv_name": "[nova-local-pool_tdata]",
+                 "lv_attr": "Twi-ao----"}],
+         "pvseg": [], "seg": []},
+        {"vg": [],
+         "pv": [{"pv_name": "/dev/sdb", "pv_uuid": "pv-uuid-2",
+                 "pv_size": "2097152", "pv_pe_count": "0",
+                 "pv_pe_alloc_count": "0"}],
+         "lv": [], "pvseg": [], "seg": []},
+    ]
+}
+
+CINDER_FULLREPORT = {
+    "report": [
+        {"vg": [{"vg_name": constants.LVG_CINDER_VOLUMES,
+                 "vg_uuid": "vg-uuid-2", "vg_attr": "wz--n-",
+                 "max_lv": "0", "lv_count": "1", "max_pv": "0",
+                 "pv_count": "1", "vg_size": "4194304",
+                 "vg_extent_count": "1024", "vg_free_count": "0"}],
+         "pv": [{"pv_name": "/dev/sdc", "pv_uuid": "pv-uuid-3",
+                 "pv_size": "4194304", "pv_pe_count": "1024",
+                 "pv_pe_alloc_count": "1024"}],
+         "lv": [{"lv_name": constants.CINDER_LVM_POOL_LV,
+                 "lv_attr": "twi-aotz--"}],
+         "pvseg": [], "seg": []},
+    ]
+}
+
+
+class LVMReportTestCase(base.TestCase):
+
+    def setUp(self):
+        super(LVMReportTestCase, self).setUp()
+        self.report = lvm_report.LVMReport(
+            lvm_report.LVMReport.parse(json.dumps(FULLREPORT)) +
+            lvm_report.LVMReport.parse(json.dumps(CINDER_FULLREPORT)))
+
+    def test_parse_invalid(self):
+        self.assertEqual([], lvm_report.LVMReport.parse('not json'))
+
+    def test_ipv_get(self):
+        ipv = pv.PVOperator().ipv_get(report=self.report)
+        self.assertEqual([
+            {'lvm_pv_name': '/dev/sda4', 'lvm_vg_name': 'cgts-vg',
+             'lvm_pv_uuid': 'pv-uuid-1', 'lvm_pv_size': 1048576,
+             'lvm_pe_total': 256, 'lvm_pe_alloced': 240},
+            {'lvm_pv_name': constants.CINDER_DRBD_DEVICE,
+             'lvm_vg_name': constants.LVG_CINDER_VOLUMES,
+             'lvm_pv_uuid': 'pv-uuid-3', 'lvm_pv_size': 4194304,
+             'lvm_pe_total': 1024, 'lvm_pe_alloced': 1024}], ipv)
+
+    def test_ilvg_get(self):
+        ilvg = lvg.LVGOperator().ilvg_get(report=self.report)
+        self.assertEqual(['cgts-vg', constants.LVG_CINDER_VOLUMES],
+                         [vg['lvm_vg_name'] for vg in ilvg])
+        self.assertEqual('wz--n-', ilvg[0]['lvm_vg_access'])
+        self.assertEqual(256, ilvg[0]['lvm_vg_total_pe'])
+        # thin pools are not counted as logical volumes
+        self.assertEqual(2, ilvg[0]['lvm_cur_lv'])
+        self.assertEqual(0, ilvg[1]['lvm_cur_lv'])
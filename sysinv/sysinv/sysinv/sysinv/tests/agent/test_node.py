@@ -0,0 +1,68 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the NUMA node memory collector."""
+
+import mock
+import os
+import shutil
+import tempfile
+
+from sysinv.agent import node
+from sysinv.tests import base
+
+
+MEMINFO = """Node 0 MemTotal:       16314544 kB
+Node 0 MemFree:         8155184 kB
+Node 0 MemUsed:         8159360 kB
+Node 0 FilePages:       1048576 kB
+Node 0 SReclaimable:     524288 kB
+Node 0 HugePages_Total:     0
+"""
+
+
+class NodeMemoryTestCase(base.TestCase):
+
+    def setUp(self):
+        super(NodeMemoryTestCase, self).setUp()
+        self.sysfs = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sysfs)
+        node_path = self.sysfs + '/node0'
+        os.makedirs(node_path)
+        with open(node_path + '/meminfo', 'w') as f:
+            f.write(MEMINFO)
+        for subdir, nr, free in [('hugepages-2048kB', 1024, 512),
+                                 ('hugepages-1048576kB', 4, 1)]:
+            path = node_path + '/hugepages/' + subdir
+            os.makedirs(path)
+            for name, value in [('nr_hugepages', nr),
+                                ('free_hugepages', free)]:
+                with open(path + '/' + name, 'w') as f:
+                    f.write('%d\n' % value)
+
+    def test_read(self):
+        memory = node.NodeMemory(0).read(self.sysfs)
+        self.assertEqual(16314544, memory.meminfo['MemTotal'])
+        self.assertEqual(524288, memory.meminfo['SReclaimable'])
+        self.assertEqual(0, memory.meminfo['CommitLimit'])
+        self.assertEqual([(node.SIZE_2M_MB, 1024, 512),
+                          (node.SIZE_1G_MB, 4, 1)],
+                         sorted(memory.hugepages))
+
+    def test_read_missing_node(self):
+        memory = node.NodeMemory(1).read(self.sysfs)
+        self.assertEqual(0, memory.meminfo['MemTotal'])
+        self.assertEqual([], memory.hugepages)
+
+    def test_memory_nonhugepages(self):
+        operator = node.NodeOperator()
+        operator.num_nodes = 1
+        with mock.patch.object(node, 'NODE_SYSFS_PATH', self.sysfs):
+            imemory = operator._inode_get_memory_nonhugepages()
+        self.assertEqual([{'numa_node': 0,
+                           'memtotal_mib': 16314544 / 1024,
+                           'memavail_mib': (8155184 + 1048576 +
+                                            524288) / 1024,
+                           'hugepages_configured': 'False'}], imemory)
@@ -0,0 +1,167 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the sysfs PCI device scanner."""
+
+import mock
+import os
+import shutil
+import tempfile
+
+from sysinv.agent import pci
+from sysinv.tests import base
+
+
+PCI_IDS = """# pci.ids excerpt
+8086  Intel Corporation
+\t10fb  82599ES 10-Gigabit SFI/SFP+ Network Connection
+\t\t8086 000c  Ethernet Server Adapter X520-2
+\t10ed  82599 Ethernet Controller Virtual Function
+C 02  Network controller
+\t00  Ethernet controller
+C 06  Bridge
+\t00  Host bridge
+"""
+
+
+class PCIIdsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(PCIIdsTestCase, self).setUp()
+        self.ids = pci.PCIIds()
+        self.ids._parse(PCI_IDS.splitlines(True))
+
+    def test_names(self):
+        self.assertEqual('Intel Corporation', self.ids.vendor_name('8086'))
+        self.assertEqual('82599ES 10-Gigabit SFI/SFP+ Network Connection',
+                         self.ids.device_name('8086', '10fb'))
+        self.assertEqual('Ethernet Server Adapter X520-2',
+                         self.ids.subsystem_name('8086', '10fb',
+                                                 '8086', '000c'))
+        self.assertEqual('Ethernet controller',
+                         self.ids.class_name('020000'))
+        self.assertEqual('Network controller',
+                         self.ids.class_name('028000'))
+
+    def test_unknown_names(self):
+        self.assertEqual('Vendor 1234', self.ids.vendor_name('1234'))
+        self.assertEqual('Device 5678', self.ids.device_name('8086', '5678'))
+        self.assertEqual('Class ff00', self.ids.class_name('ff0000'))
+
+
+class PCIOperatorTestCase(base.TestCase):
+
+    def setUp(self):
+        super(PCIOperatorTestCase, self).setUp()
+        self.sysfs = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sysfs)
+        self.sysfs_devices = self.sysfs + '/devices/'
+        os.mkdir(self.sysfs_devices)
+
+        ids = pci.PCIIds()
+        ids._parse(PCI_IDS.splitlines(True))
+        p = mock.patch.object(pci.PCIIds, 'load', return_value=ids)
+        p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch.object(pci, 'SYSFS_PCI_DEVICES', self.sysfs_devices)
+        p.start()
+        self.addCleanup(p.stop)
+
+        self._add_device('0000:00:00.0', '0x060000', '0x8086', '0x0c00')
+        self._add_device('0000:05:00.0', '0x020000', '0x8086', '0x10fb',
+                         subsystem=('0x8086', '0x000c'), revision='0x01',
+                         sriov=('63', '1'))
+        self._add_device('0000:05:10.0', '0x020000', '0x8086', '0x10ed',
+                         physfn='0000:05:00.0')
+        self.operator = pci.PCIOperator()
+
+    def _write(self, path, value):
+        with open(path, 'w') as f:
+            f.write(value + '\n')
+
+    def _add_device(self, pciaddr, pclass, vendor, device,
+                    subsystem=('0x0000', '0x0000'), revision='0x00',
+                    sriov=None, physfn=None):
+        path = self.sysfs_devices + pciaddr
+        os.mkdir(path)
+        for attr, value in [('class', pclass), ('vendor', vendor),
+                            ('device', device), ('revision', revision),
+                            ('subsystem_vendor', subsystem[0]),
+                            ('subsystem_device', subsystem[1]),
+                            ('numa_node', '0')]:
+            self._write(path + '/' + attr, value)
+        if sriov:
+            self._write(path + '/sriov_totalvfs', sriov[0])
+            self._write(path + '/sriov_numvfs', sriov[1])
+        if physfn:
+            os.symlink(self.sysfs_devices + physfn, path + '/physfn')
+            os.symlink('../' + pciaddr,
+                       self.sysfs_devices + physfn + '/virtfn0')
+
+    def test_inics_get(self):
+        inics = self.operator.inics_get()
+        self.assertEqual(1, len(inics))
+        inic = inics[0]
+        self.assertEqual('0000:05:00.0', inic.pciaddr)
+        self.assertEqual('Ethernet controller', inic.pclass)
+        self.assertEqual('Intel Corporation', inic.pvendor)
+        self.assertEqual('-r01', inic.prevision)
+        self.assertEqual('Intel Corporation', inic.psvendor)
+        self.assertEqual('Ethernet Server Adapter X520-2', inic.psdevice)
+
+    def test_pci_devices_get_ignores_bridges(self):
+        self.assertEqual([], self.operator.pci_devices_get())
+
+    def test_pci_get_device_attrs(self):
+        attrs = self.operator.pci_get_device_attrs('05:00.0')
+        self.assertEqual(1, len(attrs))
+        self.assertEqual('pci_0000_05_00_0', attrs[0]['name'])
+        self.assertEqual('8086', attrs[0]['pvendor_id'])
+        self.assertEqual('10fb', attrs[0]['pdevice_id'])
+        self.assertEqual('020000', attrs[0]['pclass_id'])
+        self.assertEqual('0', attrs[0]['numa_node'])
+        self.assertEqual('63', attrs[0]['sriov_totalvfs'])
+        self.assertEqual('1', attrs[0]['sriov_numvfs'])
+        self.assertEqual('0000:05:10.0', attrs[0]['sriov_vfs_pci_address'])
+
+    def test_scan_not_cached(self):
+        scan = self.operator.pci_scan()
+        self.assertIsNot(scan, self.operator.pci_scan())
+
+    def test_scan_cached(self):
+        self.operator.enable_cache()
+        scan = self.operator.pci_scan()
+        self.assertIs(scan, self.operator.pci_scan())
+        self.operator.invalidate()
+        self.assertIsNot(scan, self.operator.pci_scan())
+
+    def test_scan_numvfs_changed(self):
+        self.operator.enable_cache()
+        scan = self.operator.pci_scan()
+        self._write(self.sysfs_devices + '0000:05:00.0/sriov_numvfs', '0')
+        rescan = self.operator.pci_scan()
+        self.assertIsNot(scan, rescan)
+        self.assertEqual('0', rescan['0000:05:00.0']['sriov_numvfs'])
+
+    def test_scan_cached_driver_changed(self):
+        self.operator.enable_cache()
+        scan = self.operator.pci_scan()
+        self.assertIsNone(scan['0000:05:00.0']['driver'])
+
+        drivers = self.sysfs_devices + '0000:05:00.0/driver/module/drivers'
+        os.makedirs(drivers)
+        os.symlink(self.sysfs + '/pci:ixgbe', drivers + '/pci:ixgbe')
+        rescan = self.operator.pci_scan()
+        self.assertIs(scan, rescan)
+        self.assertEqual('pci:ixgbe', rescan['0000:05:00.0']['driver'])
+
+    def test_device_lookup_uses_current_scan(self):
+        scan = self.operator.pci_scan()
+        with mock.patch.object(self.operator,
+                               'get_pci_sriov_numvfs') as numvfs:
+            self.operator.pci_get_net_attrs('0000:05:00.0')
+            self.operator.pci_get_device_attrs('0000:05:00.0')
+            self.assertFalse(numvfs.called)
+        self.assertIs(scan, self.operator._scan)
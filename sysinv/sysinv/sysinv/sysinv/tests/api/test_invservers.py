@@ -184,6 +184,60 @@ class TestListServers(base.FunctionalTest):
         next_marker = data['ihosts'][-1]['uuid']
         self.assertIn(next_marker, data['next'])
 
+    def test_detail_sparse_fields(self):
+        ndict = dbutils.get_test_ihost(forisystemid=self.system.id)
+        ihost = self.dbapi.ihost_create(ndict)
+        data = self.get_json('/ihosts/detail?fields=hostname,ports')
+        self.assertEqual(1, len(data['ihosts']))
+        self.assertEqual(set(['uuid', 'hostname', 'ports']),
+                         set(data['ihosts'][0].keys()))
+        self.assertEqual(ihost['uuid'], data['ihosts'][0]['uuid'])
+        self.assertIn('/ports', data['ihosts'][0]['ports'][0]['href'])
+
+    def test_one_sparse_fields(self):
+        ndict = dbutils.get_test_ihost(forisystemid=self.system.id)
+        self.dbapi.ihost_create(ndict)
+        data = self.get_json('/ihosts/%s?fields=hostname,links' %
+                             ndict['uuid'])
+        self.assertEqual(set(['uuid', 'hostname', 'links']),
+                         set(data.keys()))
+
+    def test_collection_links_sparse_fields(self):
+        for id in range(2):
+            ndict = dbutils.get_test_ihost(id=id, hostname=id, mgmt_mac=id,
+                                           forisystemid=self.system.id,
+                                           mgmt_ip="%s.%s.%s.%s" % (id, id, id, id),
+                                           uuid=uuidutils.generate_uuid())
+            self.dbapi.ihost_create(ndict)
+        data = self.get_json('/ihosts/?limit=1&fields=hostname')
+        self.assertEqual(set(['uuid', 'hostname']),
+                         set(data['ihosts'][0].keys()))
+        self.assertIn('fields=hostname,uuid', data['next'])
+
+    def test_conditional_get(self):
+        ndict = dbutils.get_test_ihost(forisystemid=self.system.id)
+        self.dbapi.ihost_create(ndict)
+        response = self.get_json('/ihosts', expect_errors=True)
+        self.assertEqual(200, response.status_int)
+        etag = response.headers['ETag']
+
+        headers = {'If-None-Match': etag}
+        response = self.get_json('/ihosts', headers=headers,
+                                 expect_errors=True)
+        self.assertEqual(304, response.status_int)
+        self.assertEqual(etag, response.headers['ETag'])
+
+        # another representation of the hosts has another ETag
+        response = self.get_json('/ihosts/detail', headers=headers,
+                                 expect_errors=True)
+        self.assertEqual(200, response.status_int)
+
+        self.dbapi.ihost_update(ndict['uuid'], {'administrative': 'unlocked'})
+        response = self.get_json('/ihosts', headers=headers,
+                                 expect_errors=True)
+        self.assertEqual(200, response.status_int)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
     def test_ports_subresource_link(self):
         ndict = dbutils.get_test_ihost(forisystemid=self.system.id)
         self.dbapi.ihost_create(ndict)
@@ -22,6 +22,8 @@
 
 """Test class for Sysinv ManagerService."""
 
+import mock
+
 from sysinv.common import exception
 from sysinv.conductor import manager
 from sysinv.db import api as dbapi
@@ -172,6 +174,37 @@ class ManagerTestCase(base.DbTestCase):
 
     dnsmasq_hosts_file = '/tmp/dnsmasq.hosts'
 
+    def test_bulk_upsert_falls_back_per_row(self):
+        def _upsert(hostid, values_list, update_fields=None):
+            if len(values_list) > 1 or values_list[0]['mac'] == 'bad':
+                raise exception.MACAlreadyExists(mac='bad', host=hostid)
+            return [values_list[0]['mac']]
+
+        ihost = self._create_test_ihost()
+        upsert = mock.Mock(side_effect=_upsert)
+        rows = self.service._bulk_upsert(
+            upsert, ihost['id'], [{'mac': 'a'}, {'mac': 'bad'}, {'mac': 'b'}],
+            'ports', update_fields=['speed'])
+        self.assertEqual(['a', 'b'], rows)
+        self.assertEqual(4, upsert.call_count)
+
+    def test_bulk_upsert_host_not_found(self):
+        upsert = mock.Mock(side_effect=exception.ServerNotFound(server=1))
+        self.assertRaises(exception.ServerNotFound,
+                          self.service._bulk_upsert,
+                          upsert, 1, [{'mac': 'a'}], 'ports')
+        self.assertEqual(1, upsert.call_count)
+
+    def test_bulk_upsert_host_deleted(self):
+        # the batch fails on the rows of a host that no longer exists
+        upsert = mock.Mock(side_effect=exception.MACAlreadyExists(
+            mac='a', host=12345))
+        self.assertRaises(exception.ServerNotFound,
+                          self.service._bulk_upsert,
+                          upsert, 12345, [{'mac': 'a'}, {'mac': 'b'}],
+                          'ports')
+        self.assertEqual(1, upsert.call_count)
+
     def test_configure_ihost_new(self):
         # Test skipped to prevent error message in Jenkins. Error thrown is:
         # in test_configure_ihost_new
@@ -0,0 +1,91 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the DB API lookup cache."""
+
+import mock
+
+from sysinv.common import constants
+from sysinv.db import api as dbapi
+from sysinv.db.sqlalchemy import api as sqlalchemy_api
+from sysinv.tests.db import base
+from sysinv.tests.db import utils
+
+
+class LookupCacheTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super(LookupCacheTestCase, self).setUp()
+        self.dbapi = dbapi.get_instance()
+        self.system = utils.create_test_isystem()
+        self.config(enabled=True, max_entries=2, ttl=60,
+                    generation_interval=0, group='db_cache')
+        p = mock.patch.object(sqlalchemy_api, '_lookup_cache',
+                              sqlalchemy_api._LookupCache())
+        self.cache = p.start()
+        self.addCleanup(p.stop)
+
+    def test_lookup_cached(self):
+        system = self.dbapi.isystem_get_one()
+        system.description = 'changed'
+        res = self.dbapi.isystem_get_one()
+        self.assertEqual(self.system['description'], res.description)
+        self.assertEqual({'hits': 1, 'misses': 1, 'entries': 1},
+                         sqlalchemy_api.get_cache_stats())
+
+    def test_lookup_copies_mutable_values(self):
+        system = self.dbapi.isystem_get_one()
+        system.capabilities['sdn_enabled'] = False
+        res = self.dbapi.isystem_get_one()
+        self.assertTrue(res.capabilities['sdn_enabled'])
+
+    def test_generation_checked_per_interval(self):
+        self.config(generation_interval=60, ttl=120, group='db_cache')
+        with mock.patch('time.time', return_value=1000.0):
+            self.dbapi.isystem_get_one()
+        self.dbapi.config_generation_bump(constants.CONFIG_GENERATION_SYSTEM)
+        with mock.patch('time.time', return_value=1030.0):
+            self.dbapi.isystem_get_one()
+        self.assertEqual(1, self.cache.hits)
+        with mock.patch('time.time', return_value=1061.0):
+            self.dbapi.isystem_get_one()
+        self.assertEqual(2, self.cache.misses)
+
+    def test_lookup_invalidated_by_write(self):
+        self.dbapi.isystem_get_one()
+        self.dbapi.isystem_update(self.system['uuid'],
+                                  {'description': 'changed'})
+        res = self.dbapi.isystem_get_one()
+        self.assertEqual('changed', res.description)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_lookup_invalidated_by_generation(self):
+        self.dbapi.isystem_get_one()
+        # a write from another process only bumps the generation
+        self.dbapi.config_generation_bump(constants.CONFIG_GENERATION_SYSTEM)
+        self.dbapi.isystem_get_one()
+        self.assertEqual(0, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_lookup_expired(self):
+        with mock.patch('time.time', return_value=1000.0):
+            self.dbapi.isystem_get_one()
+        with mock.patch('time.time', return_value=1061.0):
+            self.dbapi.isystem_get_one()
+        self.assertEqual(2, self.cache.misses)
+
+    def test_lookup_max_entries(self):
+        self.dbapi.isystem_get_one()
+        self.dbapi.service_parameter_get_all(service='identity')
+        self.dbapi.service_parameter_get_all(service='platform')
+        self.assertEqual(2, self.cache.stats()['entries'])
+        self.dbapi.isystem_get_one()
+        self.assertEqual(4, self.cache.misses)
+
+    def test_lookup_disabled(self):
+        self.config(enabled=False, group='db_cache')
+        self.dbapi.isystem_get_one()
+        self.dbapi.isystem_get_one()
+        self.assertEqual(0, self.cache.misses)
@@ -0,0 +1,61 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the per request SQL statement stats."""
+
+from sysinv.common import profiler
+from sysinv.db import api as dbapi
+from sysinv.tests.db import base
+from sysinv.tests.db import utils
+
+
+class QueryStatsTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super(QueryStatsTestCase, self).setUp()
+        self.dbapi = dbapi.get_instance()
+        self.system = utils.create_test_isystem()
+        self.config(enabled=True, statement_threshold=100,
+                    time_threshold=10.0, repeat_threshold=3,
+                    group='query_stats')
+
+    def test_query_stats(self):
+        with profiler.query_stats('test') as stats:
+            self.dbapi.isystem_get_one()
+            self.dbapi.isystem_get_by_systemname(self.system['name'])
+        self.assertEqual(2, stats.count)
+        self.assertEqual(2, len(stats.statements))
+        self.assertEqual([], stats.repeated(3))
+        self.assertFalse(stats.report())
+
+        # statements are no longer recorded once stopped
+        self.dbapi.isystem_get_one()
+        self.assertEqual(2, stats.count)
+
+    def test_query_stats_repeated(self):
+        with profiler.query_stats('test') as stats:
+            for i in range(3):
+                self.dbapi.isystem_get(self.system['uuid'])
+            self.dbapi.isystem_get_one()
+        self.assertEqual(4, stats.count)
+        repeated = stats.repeated(3)
+        self.assertEqual(1, len(repeated))
+        self.assertEqual(3, repeated[0][0])
+        self.assertTrue(stats.report())
+
+    def test_query_stats_disabled(self):
+        self.config(enabled=False, group='query_stats')
+        with profiler.query_stats('test') as stats:
+            self.dbapi.isystem_get_one()
+        self.assertIsNone(stats)
+
+    def test_query_stats_nested(self):
+        outer = profiler.query_stats_start('outer')
+        with profiler.query_stats('inner') as inner:
+            self.dbapi.isystem_get_one()
+        self.dbapi.isystem_get_one()
+        profiler.query_stats_stop(outer)
+        self.assertEqual(1, inner.count)
+        self.assertEqual(1, outer.count)
@@ -94,6 +94,47 @@ class DbNodeTestCase(base.DbTestCase):
         res = self.dbapi.ihost_update(n['id'], {'availability': new_state})
         self.assertEqual(new_state, res['availability'])
 
+    def test_ihost_table_state(self):
+        n = self._create_test_ihost()
+        state = self.dbapi.table_state_get(['i_host'])
+        self.assertEqual(1, len(state))
+        name, generation, count = state[0][:3]
+        self.assertEqual('i_host', name)
+        self.assertEqual(1, count)
+
+        self.dbapi.ihost_update(n['id'], {'administrative': 'unlocked'})
+        updated = self.dbapi.table_state_get(['i_host'])
+        # the update is seen from updated_at, without bumping the counter
+        self.assertEqual(generation, updated[0][1])
+        self.assertNotEqual(state, updated)
+
+    def test_ihost_table_state_create_destroy(self):
+        state = self.dbapi.table_state_get(['i_host'])
+        n = self._create_test_ihost()
+        created = self.dbapi.table_state_get(['i_host'])
+        self.assertNotEqual(state, created)
+
+        self.dbapi.ihost_destroy(n['id'])
+        destroyed = self.dbapi.table_state_get(['i_host'])
+        self.assertNotEqual(created, destroyed)
+        # seen from the row count and created_at only
+        self.assertEqual(0, self.dbapi.config_generation_get('i_host'))
+
+    def test_interface_table_state_subclass_update(self):
+        n = self._create_test_ihost()
+        interface = utils.create_test_interface(forihostid=n['id'])
+        generation = self.dbapi.config_generation_get('interfaces')
+        self.dbapi.iinterface_update(interface['uuid'],
+                                     {'imac': '02:11:22:33:44:55'})
+        self.assertEqual(generation + 1,
+                         self.dbapi.config_generation_get('interfaces'))
+
+        self.config(sysinv_api_conditional_get=False)
+        self.dbapi.iinterface_update(interface['uuid'],
+                                     {'imac': '02:11:22:33:44:66'})
+        self.assertEqual(generation + 1,
+                         self.dbapi.config_generation_get('interfaces'))
+
     def test_destroy_ihost(self):
         n = self._create_test_ihost()
 
@@ -136,6 +177,50 @@ class DbNodeTestCase(base.DbTestCase):
                 utils.get_test_port(name='eth0', pciaddr="00:03.0"))
         self.assertEqual(n['id'], p['host_id'])
 
+    def test_icpu_bulk_upsert(self):
+        n = self._create_test_ihost()
+
+        cpus = self.dbapi.icpu_bulk_upsert(n['id'], [
+            {'cpu': 0, 'core': 0, 'thread': 0},
+            {'cpu': 1, 'core': 1, 'thread': 0}])
+        self.assertEqual([0, 1], [c['cpu'] for c in cpus])
+
+        res = self.dbapi.icpu_bulk_upsert(n['id'], [
+            {'cpu': 2, 'core': 2, 'thread': 0},
+            {'cpu': 0, 'core': 0, 'thread': 1}])
+        self.assertEqual([2, 0], [c['cpu'] for c in res])
+        self.assertEqual(cpus[0]['uuid'], res[1]['uuid'])
+        self.assertEqual(1, res[1]['thread'])
+        self.assertEqual(3, len(self.dbapi.icpu_get_by_ihost(n['uuid'])))
+
+    def test_icpu_bulk_upsert_normalized_key(self):
+        n = self._create_test_ihost()
+
+        # the key is stored as an integer, and each value gets its row
+        cpus = self.dbapi.icpu_bulk_upsert(n['id'], [
+            {'cpu': '3', 'core': 3, 'thread': 0},
+            {'cpu': '3', 'core': 3, 'thread': 1}])
+        self.assertEqual([3, 3], [c['cpu'] for c in cpus])
+        self.assertEqual([0, 1], [c['thread'] for c in cpus])
+
+    def test_ethernet_port_bulk_upsert_update_fields(self):
+        n = self._create_test_ihost()
+
+        ports = self.dbapi.ethernet_port_bulk_upsert(n['id'], [
+            {'name': 'eth0', 'mac': '08:00:27:ea:93:8e', 'speed': 1000},
+            {'name': 'eth1', 'mac': '08:00:27:ea:93:8f', 'speed': 1000}])
+        self.assertEqual(['eth0', 'eth1'], [p['name'] for p in ports])
+        self.assertEqual(n['id'], ports[0]['host_id'])
+
+        res = self.dbapi.ethernet_port_bulk_upsert(n['id'], [
+            {'name': 'enp0s3', 'mac': '08:00:27:ea:93:8e', 'speed': 10000}],
+            update_fields=['speed'])
+        self.assertEqual(ports[0]['uuid'], res[0]['uuid'])
+        self.assertEqual('eth0', res[0]['name'])
+        self.assertEqual(10000, res[0]['speed'])
+        self.assertEqual(2, len(self.dbapi.ethernet_port_get_by_host(
+            n['uuid'])))
+
     def test_create_storageVolume_on_a_server(self):
         n = self._create_test_ihost()
 
@@ -145,6 +230,66 @@ class DbNodeTestCase(base.DbTestCase):
                 utils.get_test_idisk(deviceId='sda0'))
         self.assertEqual(n['id'], p['forihostid'])
 
+    def test_ihost_get_ids_without_idisks(self):
+        n = self._create_test_ihost(availability='available')
+        self.assertEqual(set([n['id']]),
+                         self.dbapi.ihost_get_ids_without_idisks())
+
+        self.dbapi.idisk_create(n['id'],
+                utils.get_test_idisk(deviceId='sda0'))
+        self.assertEqual(set(), self.dbapi.ihost_get_ids_without_idisks())
+
+    def test_ihost_get_ids_without_idisks_offline(self):
+        self._create_test_ihost(availability='offline')
+        self.assertEqual(set(), self.dbapi.ihost_get_ids_without_idisks())
+
+    def test_ipv_and_ilvg_get_unprovisioned_ihost_ids(self):
+        n = self._create_test_ihost(availability='available')
+        forihostid = n['id']
+
+        lvg = self.dbapi.ilvg_create(forihostid,
+                utils.get_test_lvg(lvm_vg_name=constants.LVG_CINDER_VOLUMES,
+                                   forihostid=forihostid))
+        self.dbapi.ipv_create(forihostid,
+                utils.get_test_pv(lvm_vg_name=constants.LVG_CINDER_VOLUMES,
+                                  forihostid=forihostid,
+                                  forilvgid=lvg['id']))
+        self.assertEqual(set([forihostid]),
+                         self.dbapi.ilvg_get_unprovisioned_ihost_ids())
+        self.assertEqual(set([forihostid]),
+                         self.dbapi.ipv_get_unprovisioned_ihost_ids())
+        self.assertEqual(set(), self.dbapi.ihost_get_ids_without_ipvs())
+        self.assertEqual(set(), self.dbapi.ihost_get_ids_without_ilvgs())
+
+        self.dbapi.ilvg_update(lvg['id'],
+                               {'vg_state': constants.PROVISIONED})
+        self.assertEqual(set(),
+                         self.dbapi.ilvg_get_unprovisioned_ihost_ids())
+
+        paths = self.dbapi.ipv_get_device_paths_by_lvg_name(
+            constants.LVG_CINDER_VOLUMES)
+        self.assertEqual(['/dev/disk/by-path/pci-0000:00:0d.0-ata-3.0'],
+                         list(paths.values()))
+
+    def test_config_generation_bumped_on_config_change(self):
+        generation = self.dbapi.config_generation_get(
+            constants.CONFIG_GENERATION_SYSTEM)
+
+        self.dbapi.helm_override_create({'name': 'chart',
+                                         'namespace': 'openstack'})
+        self.assertEqual(generation + 1, self.dbapi.config_generation_get(
+            constants.CONFIG_GENERATION_SYSTEM))
+
+        self.dbapi.helm_override_destroy('chart', 'openstack')
+        self.assertEqual(generation + 2, self.dbapi.config_generation_get(
+            constants.CONFIG_GENERATION_SYSTEM))
+
+    def test_config_generation_bump_new_counter(self):
+        self.assertEqual(0, self.dbapi.config_generation_get('test'))
+        self.dbapi.config_generation_bump('test')
+        self.dbapi.config_generation_bump('test')
+        self.assertEqual(2, self.dbapi.config_generation_get('test'))
+
     # Storage Backend: Base class
     def _create_test_storage_backend(self, **kwargs):
         kwargs['forisystemid'] = self.system['id']
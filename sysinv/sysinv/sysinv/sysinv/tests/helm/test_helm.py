@@ -0,0 +1,68 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the helm overrides operator."""
+
+import tempfile
+
+from sysinv.helm import helm
+from sysinv.tests import base as test_base
+from sysinv.tests.db import base
+from sysinv.tests.db import utils
+
+
+class HelmOperatorTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super(HelmOperatorTestCase, self).setUp()
+        self.system = utils.create_test_isystem()
+        self.load = utils.create_test_load()
+        self.host = utils.create_test_ihost(forisystemid=self.system['id'])
+        self.operator = helm.HelmOperator(self.dbapi, tempfile.mkdtemp())
+
+    def test_config_state_ignores_maintenance_updates(self):
+        state = self.operator._get_config_state()
+        self.dbapi.ihost_update(self.host['id'], {'uptime': 1000,
+                                                  'task': 'Testing'})
+        self.assertEqual(state, self.operator._get_config_state())
+
+    def test_config_state_host_provisioned(self):
+        state = self.operator._get_config_state()
+        self.dbapi.ihost_update(self.host['id'],
+                                {'invprovision': 'provisioned'})
+        self.assertNotEqual(state, self.operator._get_config_state())
+
+    def test_config_state_inventory_changes(self):
+        state = self.operator._get_config_state()
+        self.dbapi.icpu_create(self.host['id'],
+                               utils.get_test_icpu(forinodeid=3, cpu=2))
+        self.assertNotEqual(state, self.operator._get_config_state())
+
+
+class ChartContextTestCase(test_base.TestCase):
+
+    def test_chart_context_does_not_modify_parent(self):
+        parent = {'_system': 'system', '_service_configs': {'nova': 1}}
+        context = helm._ChartContext(parent)
+        context['_address_names'] = {}
+        context.setdefault('_service_configs', {})['cinder'] = 2
+
+        self.assertEqual('system', context['_system'])
+        self.assertEqual({'nova': 1, 'cinder': 2},
+                         context['_service_configs'])
+        self.assertEqual({'_system': 'system',
+                          '_service_configs': {'nova': 1}}, parent)
+        self.assertEqual(3, len(context))
+
+    def test_chart_context_merge(self):
+        parent = {'_service_configs': {'nova': 1}}
+        context = helm._ChartContext(parent)
+        context['_system'] = 'system'
+        context['_service_configs']['cinder'] = 2
+        context.merge()
+
+        self.assertEqual({'_system': 'system',
+                          '_service_configs': {'nova': 1, 'cinder': 2}},
+                         parent)
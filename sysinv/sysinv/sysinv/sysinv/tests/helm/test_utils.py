@@ -0,0 +1,51 @@
+# Copyright (c) 2018 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from sysinv.common import exception
+from sysinv.helm import utils
+from sysinv.tests import base
+
+
+class MergeOverridesTestCase(base.TestCase):
+
+    def test_set_nested_keys(self):
+        values = utils.parse_set_value('a.b=c,a.d=1,e=true')
+        self.assertEqual({'a': {'b': 'c', 'd': 1}, 'e': True}, values)
+
+    def test_set_escaped_dot(self):
+        values = utils.parse_set_value(r'annotations.app\.kubernetes\.io=x')
+        self.assertEqual({'annotations': {'app.kubernetes.io': 'x'}}, values)
+
+    def test_set_list_index(self):
+        values = utils.parse_set_value('a[1]=x,a[2].b=y,c[0][1]=z')
+        self.assertEqual({'a': [None, 'x', {'b': 'y'}],
+                          'c': [[None, 'z']]}, values)
+
+    def test_set_list_value(self):
+        values = utils.parse_set_value('a={x,2,false}')
+        self.assertEqual({'a': ['x', 2, False]}, values)
+
+    def test_set_typed_values(self):
+        values = utils.parse_set_value('a=0,b=010,c=-3,d=null,e=FALSE,f=1.5')
+        self.assertEqual({'a': 0, 'b': '010', 'c': -3, 'd': None,
+                          'e': False, 'f': '1.5'}, values)
+
+    def test_set_invalid(self):
+        for value in ['a', 'a,b=1', 'a[x]=1', 'a={b']:
+            self.assertRaises(exception.InvalidHelmOverrides,
+                              utils.parse_set_value, value)
+
+    def test_merge_files_in_order(self):
+        values = utils.merge_overrides(
+            ['a: {b: 1, c: 2}\nl: [1, 2]\n',
+             '',
+             'a: {b: 3, d: {e: 4}}\nl: [5]\n'],
+            ['a.d.e=5,a.c=null'])
+        self.assertEqual({'a': {'b': 3, 'c': None, 'd': {'e': 5}},
+                          'l': [5]}, values)
+
+    def test_merge_invalid_file(self):
+        self.assertRaises(exception.InvalidHelmOverrides,
+                          utils.merge_overrides, ['- a\n- b\n'])
@@ -0,0 +1,66 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the partial regeneration of the puppet hiera data."""
+
+import mock
+import os
+import tempfile
+import yaml
+
+from sysinv.puppet import puppet
+from sysinv.tests.db import base
+
+
+class PuppetOperatorTestCase(base.DbTestCase):
+
+    def setUp(self):
+        super(PuppetOperatorTestCase, self).setUp()
+        self.operator = puppet.PuppetOperator(self.dbapi, tempfile.mkdtemp())
+        self.dns = self._plugin('001_dns', ['dns'],
+                                {'dns::servers': ['8.8.8.8'],
+                                 'dns::search': 'example.com'})
+        self.other = self._plugin('002_other', [], {'other::value': 1})
+        self.operator.puppet_plugins = [self.dns, self.other]
+
+    def _plugin(self, name, domains, config):
+        plugin = mock.Mock()
+        plugin.name = name
+        plugin.obj.depends_on.side_effect = \
+            lambda d: bool(set(domains) & d)
+        plugin.obj.get_system_config.return_value = config
+        return plugin
+
+    def _read(self):
+        with open(os.path.join(self.operator.path, 'system.yaml')) as f:
+            return yaml.load(f)
+
+    def test_domain_update_merges_plugin_config(self):
+        self.operator.update_system_config()
+        self.dns.obj.get_system_config.return_value = {
+            'dns::servers': ['1.1.1.1'], 'dns::search': 'example.com'}
+        self.operator.update_system_config(['dns'])
+
+        self.assertEqual({'dns::servers': ['1.1.1.1'],
+                          'dns::search': 'example.com',
+                          'other::value': 1}, self._read())
+        self.assertEqual(1, self.other.obj.get_system_config.call_count)
+
+    def test_domain_update_prunes_stale_keys(self):
+        self.operator.update_system_config()
+        self.dns.obj.get_system_config.return_value = {
+            'dns::servers': ['1.1.1.1']}
+        self.operator.update_system_config(['dns'])
+
+        self.assertEqual({'dns::servers': ['1.1.1.1'],
+                          'other::value': 1}, self._read())
+
+    def test_domain_update_without_key_owners(self):
+        self.operator.update_system_config()
+        self.operator._key_owners.clear()
+        self.operator.update_system_config(['dns'])
+
+        # the owners of the keys are unknown, so every plugin is run
+        self.assertEqual(2, self.other.obj.get_system_config.call_count)
@@ -0,0 +1,36 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the lazy plugin loading."""
+
+import mock
+
+from sysinv.common import extension_manager
+from sysinv.tests import base
+
+
+class LazyPluginMapTestCase(base.TestCase):
+
+    def _extension(self, name, plugin):
+        entry_point = mock.Mock()
+        entry_point.name = name
+        entry_point.resolve.return_value = plugin
+        return extension_manager.LazyExtension(entry_point, invoke_args=(1,))
+
+    def test_plugin_loaded_on_lookup(self):
+        plugin = mock.Mock()
+        plugins = extension_manager.LazyPluginMap()
+        plugins['good'] = self._extension('good', plugin)
+        self.assertFalse(plugin.called)
+        self.assertEqual(plugin.return_value, plugins['good'])
+        plugin.assert_called_once_with(1)
+
+    def test_plugin_load_failure_skipped(self):
+        plugin = mock.Mock(side_effect=ImportError('broken'))
+        plugins = extension_manager.LazyPluginMap()
+        plugins['broken'] = self._extension('broken', plugin)
+        self.assertNotIn('broken', plugins)
+        self.assertRaises(KeyError, plugins.__getitem__, 'broken')
+        self.assertEqual(0, len(plugins))
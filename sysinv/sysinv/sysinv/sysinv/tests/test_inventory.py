@@ -0,0 +1,65 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the delta reports of host inventory."""
+
+import copy
+
+from sysinv.common import inventory
+from sysinv.tests import base
+
+
+class InventoryReportTestCase(base.TestCase):
+
+    def setUp(self):
+        super(InventoryReportTestCase, self).setUp()
+        self.category = inventory.CATEGORY_PV
+        self.records = [{'lvm_pv_name': '/dev/sda5', 'lvm_pe_total': 10},
+                        {'lvm_pv_name': '/dev/sdb', 'lvm_pe_total': 20}]
+        self.digest = inventory.digest(self.records)
+
+    def _delta(self, records):
+        return inventory.delta_report(self.category, self.records,
+                                      self.digest, records)
+
+    def _apply(self, report, base_digest=None):
+        return inventory.apply_report(self.category, self.records,
+                                      base_digest or self.digest, report)
+
+    def test_full_report(self):
+        report = inventory.full_report(self.records)
+        self.assertEqual(self.records, inventory.apply_report(
+            self.category, [], None, report))
+
+    def test_delta_report_changed(self):
+        records = copy.deepcopy(self.records)
+        records[1]['lvm_pe_total'] = 30
+        records.append({'lvm_pv_name': '/dev/sdc', 'lvm_pe_total': 5})
+        report = self._delta(records)
+        self.assertEqual(records[1:], report['changed'])
+        self.assertEqual(records, self._apply(report))
+
+    def test_delta_report_removed(self):
+        records = self.records[1:]
+        report = self._delta(records)
+        self.assertEqual([], report['changed'])
+        self.assertEqual(records, self._apply(report))
+
+    def test_delta_report_unchanged(self):
+        report = self._delta(self.records)
+        self.assertEqual(self.digest, report['digest'])
+        self.assertEqual(self.records, self._apply(report))
+
+    def test_delta_report_duplicate_keys(self):
+        self.assertIsNone(self._delta(self.records + self.records[:1]))
+
+    def test_apply_report_base_mismatch(self):
+        report = self._delta(self.records[1:])
+        self.assertIsNone(self._apply(report, base_digest='other'))
+
+    def test_apply_report_digest_mismatch(self):
+        report = self._delta(self.records[1:])
+        report['digest'] = self.digest
+        self.assertIsNone(self._apply(report))
@@ -0,0 +1,102 @@
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Tests for the per-resource locks."""
+
+import mock
+
+from sysinv.api import hooks
+from sysinv.common import exception
+from sysinv.common import resource_lock
+from sysinv.common import utils as cutils
+from sysinv.tests import base
+
+HOST_UUID = '1be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+OTHER_HOST_UUID = '2be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+
+
+class ResourceLockTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ResourceLockTestCase, self).setUp()
+        self.manager = resource_lock.ResourceLockManager(external=False)
+
+    def test_lock_order(self):
+        acquired = []
+        real_acquire = self.manager._acquire
+
+        def _acquire(resource_type, name, deadline):
+            acquired.append(name)
+            return real_acquire(resource_type, name, deadline)
+
+        with mock.patch.object(self.manager, '_acquire', _acquire):
+            with self.manager.lock(('ihosts', OTHER_HOST_UUID),
+                                   ('system', None),
+                                   ('ihosts', HOST_UUID),
+                                   ('ihosts', OTHER_HOST_UUID)):
+                pass
+        self.assertEqual(['ihosts-' + HOST_UUID,
+                          'ihosts-' + OTHER_HOST_UUID,
+                          'system'], acquired)
+
+    def test_lock_timeout_releases_held(self):
+        held = self.manager.acquire([('ihosts', OTHER_HOST_UUID)])
+        self.assertRaises(exception.ResourceLockTimeout,
+                          self.manager.acquire,
+                          [('ihosts', HOST_UUID), ('ihosts', OTHER_HOST_UUID)],
+                          timeout=0)
+        # the lock acquired before the timeout was released
+        self.manager.release(self.manager.acquire([('ihosts', HOST_UUID)],
+                                                  timeout=0))
+        self.manager.release(held)
+
+        stats = self.manager.stats()['ihosts']
+        self.assertEqual(3, stats['acquired'])
+        self.assertEqual(1, stats['timeouts'])
+
+    def test_lock_shared_with_synchronized(self):
+        name = resource_lock.resource_name('ihosts', HOST_UUID)
+
+        @cutils.synchronized(name, external=False)
+        def _locked():
+            self.assertRaises(exception.ResourceLockTimeout,
+                              self.manager.acquire,
+                              [('ihosts', HOST_UUID)], timeout=0)
+
+        _locked()
+        self.manager.release(self.manager.acquire([('ihosts', HOST_UUID)],
+                                                  timeout=0))
+
+    def test_request_resources(self):
+        request = mock.Mock(path='/v1/ihosts/%s/iinterfaces' % HOST_UUID,
+                            json=None, dbapi=None)
+        self.assertEqual([('ihosts', HOST_UUID)],
+                         hooks.ResourceLockHook.request_resources(request))
+
+        request = mock.Mock(path='/v1/iinterfaces',
+                            json={'ihost_uuid': OTHER_HOST_UUID},
+                            dbapi=None)
+        self.assertEqual([('iinterfaces', None),
+                          ('ihosts', OTHER_HOST_UUID)],
+                         hooks.ResourceLockHook.request_resources(request))
+
+    def test_request_resources_host_resource(self):
+        dbapi = mock.Mock()
+        dbapi.iinterface_get.return_value = mock.Mock(ihost_uuid=HOST_UUID)
+        request = mock.Mock(path='/v1/iinterfaces/%s' % OTHER_HOST_UUID,
+                            json=None, dbapi=dbapi)
+        self.assertEqual([('iinterfaces', OTHER_HOST_UUID),
+                          ('ihosts', HOST_UUID)],
+                         hooks.ResourceLockHook.request_resources(request))
+        dbapi.iinterface_get.assert_called_once_with(OTHER_HOST_UUID)
+
+    def test_request_resources_host_resource_not_found(self):
+        dbapi = mock.Mock()
+        dbapi.imemory_get.side_effect = exception.ServerNotFound(
+            server=OTHER_HOST_UUID)
+        request = mock.Mock(path='/v1/imemorys/%s' % OTHER_HOST_UUID,
+                            json=None, dbapi=dbapi)
+        self.assertEqual([('imemorys', OTHER_HOST_UUID)],
+                         hooks.ResourceLockHook.request_resources(request))
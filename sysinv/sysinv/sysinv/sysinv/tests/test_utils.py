@@ -15,6 +15,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import errno
 import mock
 import os
@@ -341,6 +342,87 @@ class MkfsTestCase(base.TestCase):
         utils.mkfs('swap', '/my/swap/block/dev', 'swap-vol')
 
 
+class DeviceIndexTestCase(base.TestCase):
+
+    def test_find(self):
+        Device = collections.namedtuple('Device', 'name path node')
+        devices = [Device('a', '/dev/by-path/a', '/dev/sda'),
+                   Device('b', None, '/dev/sdb'),
+                   Device('c', '/dev/by-path/c', '/dev/sdb')]
+        index = utils.DeviceIndex(devices, ['path', 'node'])
+        self.assertEqual(['a'], [d.name for d in index.find(
+            path='/dev/by-path/a', node='/dev/sda')])
+        self.assertEqual(['b', 'c'], [d.name for d in index.find(
+            path='/dev/by-path/c', node='/dev/sdb')])
+        self.assertEqual([], index.find(path='/dev/by-path/d'))
+        self.assertEqual('b', index.first(node='/dev/sdb').name)
+        self.assertIsNone(index.first(node='/dev/sdd'))
+
+
+class LRUCacheTestCase(base.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = utils.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+
+    def test_disabled(self):
+        cache = utils.LRUCache(0)
+        cache.put('a', 1)
+        self.assertNotIn('a', cache)
+
+
+class DigestIndexTestCase(base.TestCase):
+
+    def setUp(self):
+        super(DigestIndexTestCase, self).setUp()
+        self.path = tempfile.mkdtemp()
+        self.filename = 'test.yaml'
+        self.digest = utils.DigestIndex.digest('key: value\n')
+
+    def _write(self, index, content='key: value\n'):
+        utils.write_to_file(os.path.join(self.path, self.filename), content)
+        index.update(self.filename, utils.DigestIndex.digest(content))
+
+    def test_is_current(self):
+        index = utils.DigestIndex(self.path)
+        self.assertFalse(index.is_current(self.filename, self.digest))
+        self._write(index)
+        self.assertTrue(index.is_current(self.filename, self.digest))
+        self.assertFalse(index.is_current(
+            self.filename, utils.DigestIndex.digest('key: other\n')))
+
+    def test_is_current_persisted(self):
+        self._write(utils.DigestIndex(self.path))
+        index = utils.DigestIndex(self.path)
+        self.assertTrue(index.is_current(self.filename, self.digest))
+
+    def test_is_current_file_removed(self):
+        index = utils.DigestIndex(self.path)
+        self._write(index)
+        os.unlink(os.path.join(self.path, self.filename))
+        self.assertFalse(index.is_current(self.filename, self.digest))
+
+    def test_is_current_file_modified(self):
+        index = utils.DigestIndex(self.path)
+        self._write(index)
+        utils.write_to_file(os.path.join(self.path, self.filename),
+                            'key: modified\n')
+        self.assertFalse(index.is_current(self.filename, self.digest))
+
+    def test_remove(self):
+        index = utils.DigestIndex(self.path)
+        self._write(index)
+        index.remove(self.filename)
+        self.assertFalse(index.is_current(self.filename, self.digest))
+
+
 class IntLikeTestCase(base.TestCase):
 
     def test_is_int_like(self):
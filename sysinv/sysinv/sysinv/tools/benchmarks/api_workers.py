@@ -0,0 +1,161 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+ Benchmark the sysinv-api throughput against its number of workers.
+
+ For each worker count a sysinv-api instance is started on the loopback
+ address with the configuration of the running system, an unused port and
+ authentication disabled. Concurrent clients then issue GET requests on the
+ given paths for a fixed duration, as the orchestrators polling the hosts,
+ labels and applications do.
+
+ usage: python -m tools.benchmarks.api_workers [options]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from six.moves import http_client as httplib
+
+DEFAULT_PATHS = ['/v1/ihosts/detail', '/v1/labels', '/v1/apps']
+
+STARTUP_TIMEOUT = 60
+
+
+def _config(workers, port):
+    config = tempfile.NamedTemporaryFile(mode='w', suffix='.conf',
+                                         delete=False)
+    config.write("[DEFAULT]\n"
+                 "sysinv_api_workers = %d\n"
+                 "sysinv_api_bind_ip = 127.0.0.1\n"
+                 "sysinv_api_port = %d\n"
+                 "sysinv_api_pxeboot_ip =\n"
+                 "auth_strategy = noauth\n" % (workers, port))
+    config.close()
+    return config.name
+
+
+def _start_api(config_file, workers, port):
+    override = _config(workers, port)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'sysinv.cmd.api',
+         '--config-file', config_file, '--config-file', override],
+        preexec_fn=os.setsid)
+
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        try:
+            conn = httplib.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return process, override
+        except Exception:
+            if process.poll() is not None:
+                break
+            time.sleep(0.5)
+    _stop_api(process, override)
+    raise RuntimeError("sysinv-api with %d workers did not start" % workers)
+
+
+def _stop_api(process, override):
+    if process.poll() is None:
+        # the launcher and its workers share the process group
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+    os.unlink(override)
+
+
+def _client(port, paths, deadline, latencies, errors):
+    conn = httplib.HTTPConnection('127.0.0.1', port, timeout=60)
+    i = 0
+    while time.time() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.time()
+        try:
+            conn.request('GET', path,
+                         headers={'Accept': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except Exception as e:
+            errors.append(str(e))
+            conn.close()
+            conn = httplib.HTTPConnection('127.0.0.1', port, timeout=60)
+            continue
+        latencies.append(time.time() - start)
+    conn.close()
+
+
+def _load(port, paths, concurrency, duration):
+    latencies = []
+    errors = []
+    deadline = time.time() + duration
+    clients = [threading.Thread(target=_client,
+                                args=(port, paths, deadline,
+                                      latencies, errors))
+               for _ in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    latencies.sort()
+    if not latencies:
+        return {'rate': 0.0, 'p50': 0.0, 'p99': 0.0, 'errors': len(errors)}
+    return {'rate': len(latencies) / float(duration),
+            'p50': latencies[len(latencies) // 2],
+            'p99': latencies[min(len(latencies) - 1,
+                                 int(len(latencies) * 0.99))],
+            'errors': len(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the sysinv-api throughput per worker count')
+    parser.add_argument('--config-file', default='/etc/sysinv/sysinv.conf')
+    parser.add_argument('--workers', default='1,2,4',
+                        help='comma separated worker counts')
+    parser.add_argument('--port', type=int, default=16385)
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='number of concurrent clients')
+    parser.add_argument('--duration', type=int, default=20,
+                        help='seconds of load per worker count')
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(',')]:
+        process, override = _start_api(args.config_file, workers, args.port)
+        try:
+            # warm up the workers before measuring
+            _load(args.port, args.paths, args.concurrency, 2)
+            results.append((workers, _load(args.port, args.paths,
+                                           args.concurrency, args.duration)))
+        finally:
+            _stop_api(process, override)
+
+    base_rate = results[0][1]['rate'] or 1.0
+    print("%7s %10s %9s %9s %7s %7s" %
+          ('workers', 'req/sec', 'p50 ms', 'p99 ms', 'errors', 'scale'))
+    for workers, result in results:
+        print("%7d %10.1f %9.1f %9.1f %7d %6.2fx" %
+              (workers, result['rate'], result['p50'] * 1000,
+               result['p99'] * 1000, result['errors'],
+               result['rate'] / base_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+ Benchmark the processing of agent disk and partition reports by the
+ conductor for synthetic hosts with many disks.
+
+ The matching of the reported disks against the disks of the host is
+ measured with a linear scan of the host disks, as previously done for
+ every reported disk, and with the device index now used by the conductor.
+ The conductor report handlers are then timed end to end against a fake
+ database API, so only the matching and bookkeeping cost is measured.
+
+ usage: python -m tools.benchmarks.disk_matching [disks] [partitions]
+                                                  [iterations]
+"""
+
+import mock
+import sys
+import timeit
+
+from sysinv.common import constants
+from sysinv.common import utils as cutils
+from sysinv.conductor import manager
+
+HOST_UUID = '1be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+
+
+class FakeRecord(dict):
+    """A DB object stand-in supporting item and attribute access"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def as_dict(self):
+        return dict(self)
+
+
+def _device_path(index):
+    return '/dev/disk/by-path/pci-0000:00:%02x.0-sas-0x%04x-lun-0' % (
+        index // 16, index)
+
+
+def _device_node(index):
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(ord('a') + rest) + name
+    return '/dev/sd' + name
+
+
+def make_host(disks, partitions):
+    """Return the DB and reported disks and partitions of a host"""
+    db_disks = []
+    db_parts = []
+    for index in range(disks):
+        disk = {
+            'device_path': _device_path(index),
+            'device_node': _device_node(index),
+            'device_wwn': '0x5000c500%08x' % index,
+            'serial_id': 'SERIAL%04d' % index,
+            'capabilities': {},
+            'available_mib': 0,
+        }
+        db_disks.append(FakeRecord(disk, id=index + 1,
+                                   uuid='disk-%d' % index,
+                                   forihostid=1, foripvid=None,
+                                   foristorid=None))
+        for part in range(1, partitions + 1):
+            db_parts.append(FakeRecord(
+                uuid='part-%d-%d' % (index, part),
+                idisk_uuid='disk-%d' % index,
+                device_path='%s-part%d' % (disk['device_path'], part),
+                device_node='%s%d' % (disk['device_node'], part),
+                status=constants.PARTITION_IN_USE_STATUS,
+                foripvid=None, start_mib=1, end_mib=2, size_mib=1,
+                type_name='', type_guid=''))
+
+    # report the disks in reverse order, the worst case for a scan
+    reported_disks = [dict((k, d[k]) for k in
+                           ['device_path', 'device_node', 'device_wwn',
+                            'serial_id', 'capabilities', 'available_mib'])
+                      for d in reversed(db_disks)]
+    reported_parts = [dict((k, p[k]) for k in
+                           ['device_path', 'device_node', 'start_mib',
+                            'end_mib', 'size_mib', 'type_name',
+                            'type_guid'])
+                      for p in reversed(db_parts)]
+    return db_disks, db_parts, reported_disks, reported_parts
+
+
+def match_scan(db_disks, reported_disks):
+    for i in reported_disks:
+        [d for d in db_disks
+         if (d.device_path == i.get('device_path') or
+             d.device_node == i.get('device_node'))]
+
+
+def match_index(db_disks, reported_disks):
+    index = cutils.DeviceIndex(db_disks, ['device_path', 'device_node'])
+    for i in reported_disks:
+        index.find(device_path=i.get('device_path'),
+                   device_node=i.get('device_node'))
+
+
+def make_conductor(db_disks, db_parts):
+    conductor = manager.ConductorManager.__new__(manager.ConductorManager)
+    conductor.dbapi = dbapi = mock.MagicMock()
+    dbapi.ihost_get.return_value = FakeRecord(
+        id=1, uuid=HOST_UUID, hostname='storage-1',
+        personality=constants.STORAGE, subfunctions=constants.STORAGE,
+        rootfs_device='/dev/sda', capabilities={})
+    dbapi.idisk_get_by_ihost.return_value = db_disks
+    dbapi.partition_get_by_ihost.return_value = db_parts
+    dbapi.partition_get_by_idisk.return_value = []
+    return conductor
+
+
+def main():
+    disks = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    partitions = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    db_disks, db_parts, reported_disks, reported_parts = make_host(
+        disks, partitions)
+    conductor = make_conductor(db_disks, db_parts)
+
+    def _time(func, *args):
+        return min(timeit.repeat(lambda: func(*args), repeat=3,
+                                 number=iterations)) / iterations
+
+    results = [
+        ('disk match (scan)', _time(match_scan, db_disks, reported_disks)),
+        ('disk match (index)', _time(match_index, db_disks, reported_disks)),
+        ('idisk_update_by_ihost',
+         _time(conductor.idisk_update_by_ihost, None, HOST_UUID,
+               reported_disks)),
+        ('ipartition_update_by_ihost',
+         _time(conductor.ipartition_update_by_ihost, None, HOST_UUID,
+               reported_parts)),
+    ]
+
+    print("%d disks, %d partitions per disk" % (disks, partitions))
+    for name, elapsed in results:
+        print("%-28s %10.3f msecs" % (name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
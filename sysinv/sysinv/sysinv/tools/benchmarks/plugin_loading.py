@@ -0,0 +1,78 @@
+#
+# Copyright (c) 2019 Wind River Systems, Inc.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+ Benchmark the construction time of the helm and puppet operators.
+
+ Each measurement is done in a new python process so that module imports
+ are part of the cost, as they are when sysinv-conductor or the
+ sysinv-helm / sysinv-puppet commands start. The eager mode instantiates
+ every plugin up front, as done when the plugins were loaded on
+ construction, the lazy mode only builds the operators and the chart mode
+ additionally generates the operator of a single chart.
+
+ usage: python -m tools.benchmarks.plugin_loading [iterations]
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ['lazy', 'chart', 'eager']
+
+
+def _measure(mode):
+    start = time.time()
+
+    from sysinv.helm import helm
+    from sysinv.puppet import puppet
+
+    helm_operator = helm.HelmOperator(path=tempfile.mkdtemp())
+    puppet_operator = puppet.PuppetOperator(path=tempfile.mkdtemp())
+
+    if mode == 'chart':
+        helm_operator.chart_operators['ingress']
+    elif mode == 'eager':
+        for chart_name in helm_operator.chart_operators:
+            helm_operator.chart_operators[chart_name]
+        for plugin in puppet_operator.puppet_plugins:
+            plugin.obj
+
+    return time.time() - start
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--measure':
+        print(json.dumps(_measure(sys.argv[2])))
+        return
+
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = {}
+    for mode in MODES:
+        samples = []
+        for _ in range(iterations):
+            output = subprocess.check_output(
+                [sys.executable, '-m', 'tools.benchmarks.plugin_loading',
+                 '--measure', mode])
+            samples.append(json.loads(output.splitlines()[-1]))
+        results[mode] = _median(samples)
+
+    for mode in MODES:
+        print("%-6s %8.3f secs (median of %d)" %
+              (mode, results[mode], iterations))
+    print("lazy speedup over eager: %.1fx" %
+          (results['eager'] / results['lazy']))
+
+
+if __name__ == '__main__':
+    main()